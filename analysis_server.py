@@ -0,0 +1,284 @@
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import socketserver
+import sys
+import threading
+
+import main_analyzer
+from analyzers import syntaxer
+from analyzers import result_store
+from analyzers import execution_cache
+
+syntaxer.JAVA_ROOT_PATH = "."
+
+ABSTRACTIONS = ["integrated", "prefix", "bricks", "sign", "interval"]
+FUZZ_OPTIONS = ["max_executions", "max_seconds", "stop_on_full_coverage", "plateau", "max_length", "max_combinations", "history", "history_fp_rate", "concolic",
+                "guided"]
+MONTE_CARLO_OPTIONS = ["max_samples", "margin", "confidence", "int_range", "max_length", "null_rate", "alphabet", "seed"]
+STATIC_BUDGETS = ["max_seconds", "max_states", "max_value_size"]
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RequestError(Exception):
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class AnalysisServer(object):
+    """Answers analysis requests from warm caches of parsed methods and results"""
+
+    def __init__(self, store_path=None):
+        self.cases = {}  # case name -> (source mtime, source hash, {method name: JavaMethod})
+        self.store = result_store.ResultStore(store_path)
+        self.executions = execution_cache.ExecutionCache(None)
+        self.running = True
+        self.handlers = {
+            "methods": self.handle_methods,
+            "test": self.handle_test,
+            "fuzz": self.handle_fuzz,
+            "analyze": self.handle_analyze,
+            "estimate": self.handle_estimate,
+            "invalidate": self.handle_invalidate,
+            "stats": self.handle_stats,
+            "shutdown": self.handle_shutdown,
+        }
+
+    def get_methods(self, case_name):
+        """Parsed methods of a case, recompiled per file.
+
+        javac and javap work on the whole case file, so a change to one method parses and
+        decompiles every method of the file again. Results stay reusable per method since
+        they are keyed on each method's own bytecode, and a file touched without changing
+        its content is not recompiled at all.
+        """
+        src_path = "/".join([syntaxer.JAVA_ROOT_PATH, syntaxer.JAVA_MAIN_PATH, syntaxer.JAVA_CASE_PATH, "{}.java".format(case_name)])
+        try:
+            mtime = os.path.getmtime(src_path)
+        except OSError:
+            raise RequestError(INVALID_PARAMS, "Unknown case: {}".format(case_name))
+
+        cached = self.cases.get(case_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[2]
+
+        with open(src_path, "rb") as f:
+            source_hash = hashlib.sha256(f.read()).hexdigest()
+        if cached is None or cached[1] != source_hash:
+            # only a changed source pays for parsing and the javac/javap runs again
+            methods = {method.name: method for method in syntaxer.get_simplify_ast(case_name)}
+        else:
+            methods = cached[2]
+        self.cases[case_name] = (mtime, source_hash, methods)
+        return methods
+
+    def select_methods(self, params):
+        if "case" not in params:
+            raise RequestError(INVALID_PARAMS, "Missing parameter: case")
+
+        methods = self.get_methods(params["case"])
+        if params.get("method") is None:
+            return list(methods.values())
+        if params["method"] not in methods:
+            raise RequestError(INVALID_PARAMS, "Unknown method: {}".format(params["method"]))
+        return [methods[params["method"]]]
+
+    def reuse(self, method, config, compute):
+        key = result_store.method_fingerprint(method.bytecodes, config)
+        value, _ = self.store.fetch(key, compute)
+        return value
+
+    def handle_methods(self, params):
+        return [{
+            "name": method.name,
+            "parameters": ["{}{}".format(p["type"][0], "[]" if p["type"][1] else "") for p in method.parameters],
+            "cases": len(method.cases),
+        } for method in self.select_methods(params)]
+
+    def handle_test(self, params):
+        response = {}
+        for method in self.select_methods(params):
+            outcomes = self.reuse(method, {"phase": "cases", "cases": repr(method.cases)}, lambda: main_analyzer.run_cases(method, self.executions))
+            response[method.name] = [{
+                "inputs": case["inputs"],
+                "expected": case["result"],
+                "result": case_result,
+                "coverage": len(pc_set) / len(method.bytecodes[1]),
+            } for case, (case_result, pc_set) in zip(method.cases, outcomes)]
+        return response
+
+    def handle_fuzz(self, params):
+        options = {key: params[key] for key in FUZZ_OPTIONS if key in params}
+        response = {}
+        for method in self.select_methods(params):
+            interest, total_pc_set, results, findings = self.reuse(method, main_analyzer.fuzz_config(method, options),
+                                                         lambda: main_analyzer.run_fuzz(method, self.executions, options))
+            response[method.name] = {
+                "coverage": len(total_pc_set) / len(method.bytecodes[1]),
+                "results": results,
+                "interest": [sorted(values, key=repr) for values in interest],
+                "findings": findings,
+            }
+            if params.get("reduce", False):
+                response[method.name]["reproducers"] = self.reuse(
+                    method, {"phase": "reduce", "findings": repr(sorted(findings.items()))},
+                    lambda: main_analyzer.run_reduce(method, findings, self.executions))
+        return response
+
+    def handle_analyze(self, params):
+        abstraction = params.get("abstraction", "integrated")
+        if abstraction not in ABSTRACTIONS:
+            raise RequestError(INVALID_PARAMS, "Unknown abstraction: {}".format(abstraction))
+
+        is_strings = abstraction not in ["sign", "interval"]
+        abs_mode = "str" if is_strings else "int"
+        product = bool(params.get("product", False))
+        budget = {key: params.get(key) for key in STATIC_BUDGETS}
+
+        response = {}
+        for method in self.select_methods(params):
+            static = self.reuse(method, {"phase": "static", "abs": abs_mode, "product": product, "budget": repr(sorted(budget.items()))},
+                                lambda: main_analyzer.run_static(method, is_strings, product, budget))
+            if is_strings:
+                summary, errors, coverage = static[abstraction]
+                response[method.name] = {"result": summary, "errors": sorted(errors), "coverage": coverage}
+            else:
+                summary, path_counter = static[abstraction]
+                response[method.name] = {"result": summary, "paths": dict(path_counter)}
+            response[method.name]["degraded"] = static["degraded"].get(abstraction)
+        return response
+
+    def handle_estimate(self, params):
+        options = {key: params[key] for key in MONTE_CARLO_OPTIONS if key in params}
+        response = {}
+        for method in self.select_methods(params):
+            estimate = self.reuse(method, {"phase": "monte carlo", "options": repr(sorted(options.items()))},
+                                  lambda: main_analyzer.run_monte_carlo(method, options))
+            response[method.name] = {
+                "samples": estimate.samples,
+                "stop_reason": estimate.stop_reason,
+                "results": {result: {"probability": estimate.probability(result), "interval": list(estimate.interval(result))}
+                            for result in estimate.counts},
+                "unseen_bound": estimate.unseen_bound(),
+            }
+        return response
+
+    def handle_invalidate(self, params):
+        if params.get("case") is None:
+            self.cases.clear()
+        else:
+            self.cases.pop(params["case"], None)
+        return True
+
+    def handle_stats(self, params):
+        return {
+            "cases": sorted(self.cases),
+            "stored_results": len(self.store),
+            "reused": self.store.hits,
+            "computed": self.store.misses,
+            "executions": len(self.executions),
+        }
+
+    def handle_shutdown(self, params):
+        self.running = False
+        return True
+
+    def handle(self, request):
+        """Answer one JSON-RPC request object, returning the response object (None for notifications)"""
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                raise RequestError(INVALID_REQUEST, "Invalid request")
+            if request["method"] not in self.handlers:
+                raise RequestError(METHOD_NOT_FOUND, "Method not found: {}".format(request["method"]))
+
+            params = request.get("params") or {}
+            if not isinstance(params, dict):
+                raise RequestError(INVALID_PARAMS, "Parameters must be an object")
+
+            # the analyzers report progress on stdout, which may be the protocol channel
+            with contextlib.redirect_stdout(sys.stderr):
+                result = self.handlers[request["method"]](params)
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except RequestError as e:
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": INTERNAL_ERROR, "message": "{}: {}".format(type(e).__name__, e)}}
+
+        if isinstance(request, dict) and "id" not in request:
+            return None
+        return response
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": str(e)}}
+        return self.handle(request)
+
+    def serve_stream(self, reader, writer):
+        for line in reader:
+            line = line.strip()
+            if line == "":
+                continue
+            response = self.handle_line(line)
+            if response is not None:
+                writer.write(json.dumps(response, default=sorted) + "\n")
+                writer.flush()
+            if not self.running:
+                break
+        self.store.save()
+
+
+def serve_unix(server, socket_path):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reader = (line.decode("utf-8") for line in self.rfile)
+            server.serve_stream(reader, WriterAdapter(self.wfile))
+            if not server.running:
+                # shutdown() waits for serve_forever, which is running this handler
+                threading.Thread(target=self.server.shutdown).start()
+
+    class WriterAdapter(object):
+        def __init__(self, wfile):
+            self.wfile = wfile
+
+        def write(self, text):
+            self.wfile.write(text.encode("utf-8"))
+
+        def flush(self):
+            self.wfile.flush()
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    with socketserver.UnixStreamServer(socket_path, Handler) as unix_server:
+        try:
+            unix_server.serve_forever()
+        finally:
+            server.store.save()
+            os.remove(socket_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Analysis Server")
+    parser.add_argument("-socket", type=str, default=None, help="Listen on this Unix socket instead of stdin/stdout.")
+    parser.add_argument("-store", type=str, default=None, help="File to load and save results, kept in memory only by default.")
+
+    args = parser.parse_args()
+
+    server = AnalysisServer(args.store)
+    if args.socket is None:
+        server.serve_stream(sys.stdin, sys.stdout)
+    else:
+        serve_unix(server, args.socket)
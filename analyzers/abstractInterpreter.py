@@ -1,12 +1,63 @@
 from typing import Dict, List, Set, Tuple, Optional, Union
 from collections import Counter
+from dataclasses import dataclass, replace
+from enum import Enum
 from .sign import Sign, AbstractInt
 from .intervalInt import IntervalInt
 from .finite_height_string import StringAbstraction
 from .string_adapter import StringOperations
 from .bricks_string_analysis import Brick,BricksAbstractValue,BricksAnalysis,BricksNormalizer
 from .integrated_string import IntegratedStringValue
+from .path_count import count_paths
 import re
+import time
+
+
+class ErrorKind(Enum):
+    """Kinds of errors the analysis reports, valued by their summary label"""
+    DIVIDE_BY_ZERO = "divide by zero"
+    ASSERTION = "assertion error"
+    NULL_POINTER = "null pointer exception"
+    INDEX_OUT_OF_BOUNDS = "index out of bounds"
+    INDEX_RANGE = "index range exception"
+    NUMBER_FORMAT = "number format exception"
+    EXCEPTION = "error"
+
+
+DEFINITE = "Definite"
+POSSIBLE = "Possible"
+
+
+@dataclass(frozen=True)
+class ErrorRecord(object):
+    pc: int
+    kind: ErrorKind
+    certainty: str
+    abstraction: str
+    detail: str = ""
+
+    @property
+    def key(self):
+        return self.pc, self.kind
+
+    def __str__(self):
+        detail = f" {self.detail}" if self.detail else ""
+        return f"PC {self.pc}: {self.certainty} {self.kind.value}{detail}"
+
+
+def add_error(errors, record):
+    """Add record to the errors indexed by (pc, kind), a definite error met again as possible becomes possible"""
+    old = errors.get(record.key)
+    if old is None or (old.certainty == DEFINITE and record.certainty == POSSIBLE):
+        errors[record.key] = record
+
+
+def value_size(value):
+    """Rough cost of an abstract value: the length of its text for strings, 1 otherwise"""
+    if isinstance(value, (StringAbstraction, BricksAbstractValue, IntegratedStringValue)):
+        return len(str(value))
+    return 1
+
 
 class AbstractFrame(object):  
     def __init__(self, locals, stack):
@@ -101,6 +152,27 @@ class AbstractState(object):
         
         return AbstractState(pc=self.pc, frame=AbstractFrame(locals=new_locals, stack=new_stack))
     
+    def narrow(self, other):
+        """Interval locals and stack values narrowed by a descending iterate, the others kept"""
+        assert self.pc == other.pc
+
+        new_locals = {}
+        for idx, val in self.frame.locals.items():
+            other_val = other.frame.locals.get(idx)
+            if isinstance(val, IntervalInt) and isinstance(other_val, IntervalInt):
+                new_locals[idx] = val.narrow(other_val)
+            else:
+                new_locals[idx] = val
+
+        new_stack = []
+        for v1, v2 in zip(self.frame.stack, other.frame.stack):
+            if isinstance(v1, IntervalInt) and isinstance(v2, IntervalInt):
+                new_stack.append(v1.narrow(v2))
+            else:
+                new_stack.append(v1)
+
+        return AbstractState(pc=self.pc, frame=AbstractFrame(locals=new_locals, stack=new_stack))
+    
     def __eq__(self, other):
         if not isinstance(other, AbstractState):
             return False
@@ -115,9 +187,12 @@ class AbstractState(object):
 
 
 class StateSet(object):
-    def __init__(self):
+    def __init__(self, widening_delay=0):
         self.per_inst = {}
         self.needswork = set()
+        # a loop head is joined this many times before its updates are widened
+        self.widening_delay = widening_delay
+        self.loop_visits = {}  # loop head pc -> updates merged into its state so far
     
     def add_initial(self, state):
         self.per_inst[state.pc] = state
@@ -140,6 +215,8 @@ class StateSet(object):
             old_state = self.per_inst[pc]
             
             if use_widening and loop_heads and pc in loop_heads and constants:
+                self.loop_visits[pc] = self.loop_visits.get(pc, 0) + 1
+            if self.widens(pc, use_widening, loop_heads, constants):
                 merged = old_state.widen(new_state, constants)
             else:
                 merged = old_state.join(new_state)
@@ -151,6 +228,11 @@ class StateSet(object):
             
             return False
     
+    def widens(self, pc, use_widening=False, loop_heads=None, constants=None):
+        """True if the last update of pc was a widening"""
+        return bool(use_widening and loop_heads and pc in loop_heads and constants
+                    and self.loop_visits.get(pc, 0) > self.widening_delay)
+    
     def __ior__(self, new_state):
         self.update(new_state)
         return self
@@ -163,14 +245,28 @@ class StateSet(object):
 
 
 
+# joins at a loop head before widening, and descending passes after the widened fixpoint
+WIDENING_DELAY = 2
+NARROWING_PASSES = 2
+# iterations per instruction allowed to a degraded analysis, if more than its max_iterations
+DEGRADED_ITERATIONS = 20
+
+
 class AbstractInterpreter(object):
-    def __init__(self, bytecodes_tuple, use_interval=False, use_widening=True, use_string=False, string_abstraction_type='prefix'):
+    # string abstractions tracked by the 'product' mode, mapped to their field in IntegratedStringValue
+    PRODUCT_COMPONENTS = {"prefix": "prefix", "bricks": "bricks"}
+    STRING_OPCODES = {"invokevirtual", "invokedynamic", "invokestatic"}
+
+    def __init__(self, bytecodes_tuple, use_interval=False, use_widening=True, use_string=False, string_abstraction_type='prefix',
+                 use_liveness=True, widening_delay=WIDENING_DELAY, narrowing_passes=NARROWING_PASSES):
         modifiers, instructions_list = bytecodes_tuple
         self.bytecodes = instructions_list
         self.use_interval = use_interval
         self.use_widening = use_widening
         self.use_string = use_string
         self.string_abstraction_type = string_abstraction_type
+        self.use_liveness = use_liveness
+        self.narrowing_passes = narrowing_passes
         
         self.instructions = {}
         for bc in self.bytecodes:
@@ -178,17 +274,36 @@ class AbstractInterpreter(object):
         
         self.constants = self._extract_constants()
         self.loop_heads = self._detect_loop_heads()
+        # pc -> locals read before being written on some path from pc
+        self.live_locals = self._compute_liveness() if use_liveness else None
         
-        self.state_set = StateSet()
+        self.state_set = StateSet(widening_delay)
         self.final_states = set()
-        self.errors = []
-
+        self.errors = {}  # (pc, kind) -> ErrorRecord
+        self.component_errors = {}
+        if string_abstraction_type == 'product':
+            self.component_errors = {name: {} for name in self.PRODUCT_COMPONENTS}
+        # records reported by the last step, repeats included
+        self.step_errors = []
+
+        # one result per evaluation of a terminal handler, so the counts depend on the iteration order
         self.path_results = []
+        # the control flow seen by the analysis: pc -> successor pcs, and pc -> results of paths ending there
+        self.edges = {}
+        self.outcomes = {}
         
         self.iteration_count = 0
         self.join_count = 0
         self.widen_count = 0
         self.pc_set = set()
+        # True once analyze reached a fixpoint with every state on an instruction and no
+        # path dropped on a possible error, only then are the instructions outside pc_set unreachable
+        self.converged = False
+        # name of the budget whose overrun made the rest of the analysis coarser, None within budget
+        self.degraded = None
+        self.state_count = 0  # successor states propagated
+        self.value_size = 0  # total value_size of the current states
+        self.state_sizes = {}
     
     def _extract_constants(self):
         constants = {0}
@@ -230,6 +345,55 @@ class AbstractInterpreter(object):
         
         return loop_heads
     
+    def _compute_liveness(self):
+        """Backward liveness of the locals, as {pc: frozenset of live local indexes} at instruction entry"""
+        next_pcs = {}
+        for bc, next_bc in zip(self.bytecodes, self.bytecodes[1:]):
+            next_pcs[bc[0]] = next_bc[0]
+
+        successors = {}
+        uses = {}
+        defs = {}
+        for bc in self.bytecodes:
+            pc = bc[0]
+            opcode = bc[1]
+            idx = int(bc[2]) if len(bc) > 2 and opcode in ["iload", "aload", "istore", "astore", "iinc"] else 0
+
+            if opcode in ["ireturn", "return", "areturn", "athrow"]:
+                successors[pc] = []
+            elif opcode == "goto":
+                successors[pc] = [int(bc[2])]
+            elif opcode.startswith("if"):
+                successors[pc] = [int(bc[2])] + ([next_pcs[pc]] if pc in next_pcs else [])
+            else:
+                successors[pc] = [next_pcs[pc]] if pc in next_pcs else []
+
+            uses[pc] = {idx} if opcode in ["iload", "aload", "iinc"] else set()
+            defs[pc] = {idx} if opcode in ["istore", "astore"] else set()
+
+        live_in = {bc[0]: frozenset() for bc in self.bytecodes}
+        changed = True
+        while changed:
+            changed = False
+            for bc in reversed(self.bytecodes):
+                pc = bc[0]
+                live_out = set()
+                for successor in successors[pc]:
+                    live_out |= live_in.get(successor, frozenset())
+                new_live = frozenset(uses[pc] | (live_out - defs[pc]))
+                if new_live != live_in[pc]:
+                    live_in[pc] = new_live
+                    changed = True
+        return live_in
+
+    def _drop_dead_locals(self, state):
+        live = self.live_locals.get(state.pc)
+        if live is None or all(idx in live for idx in state.frame.locals):
+            return state
+        frame = AbstractFrame(locals={idx: val for idx, val in state.frame.locals.items() if idx in live},
+                              stack=state.frame.stack)
+        return AbstractState(pc=state.pc, frame=frame)
+
     def create_abstract_value(self, concrete_value):
         if self.use_interval:
             return IntervalInt.from_concrete(concrete_value)
@@ -242,7 +406,7 @@ class AbstractInterpreter(object):
     
         if self.string_abstraction_type == 'bricks':
             return BricksAbstractValue.from_string(concrete_string)
-        elif self.string_abstraction_type == 'integrated':
+        elif self.string_abstraction_type in ['integrated', 'product']:
             return IntegratedStringValue.from_string(concrete_string)
         else:
             return StringAbstraction.from_string(concrete_string)
@@ -260,12 +424,21 @@ class AbstractInterpreter(object):
 
         if self.string_abstraction_type == 'bricks':
             return BricksAbstractValue.top()
-        elif self.string_abstraction_type == 'integrated':
+        elif self.string_abstraction_type in ['integrated', 'product']:
             return IntegratedStringValue.top()
         else:
             return StringAbstraction.top()
     
-    def analyze(self, num_parameters: int, param_types: list[str] = None, max_iterations=1000):
+    def analyze(self, num_parameters: int, param_types: list[str] = None, max_iterations=1000,
+                max_seconds=None, max_states=None, max_value_size=None):
+        """Fixpoint of the method's states from its parameters.
+
+        Going over max_iterations, max_states (successor states propagated) or max_value_size
+        (total value_size of the states) degrades the analysis instead of stopping it: strings
+        become top and loop heads are widened without thresholds, which still ends in a sound
+        fixpoint, given at least DEGRADED_ITERATIONS per instruction. max_seconds is one
+        deadline for the whole analysis, degraded or not: once it passes, or the degraded
+        analysis runs out of iterations, the result is left partial, with converged False."""
         initial_locals = {}
         if param_types:
             for i, param_type in enumerate(param_types):
@@ -289,26 +462,62 @@ class AbstractInterpreter(object):
         
         initial_frame = AbstractFrame(locals=initial_locals, stack=[])   
         initial_state = AbstractState(pc=0, frame=initial_frame)
+        if self.use_liveness:
+            initial_state = self._drop_dead_locals(initial_state)
 
         self.state_set.add_initial(initial_state)
         self.iteration_count = 0
+        self.converged = True
+        self.degraded = None
+        if max_value_size is not None:
+            self._track_size(initial_state)
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        iterations_before, states_before = 0, 0
         
         for pc, state in self.state_set.per_instruction():
             self.iteration_count += 1
             
-            if self.iteration_count >= max_iterations:
-                print(f"  Warning: reached max iterations {max_iterations}")
-                break
+            if deadline is not None and time.monotonic() > deadline:
+                print("  Warning: time budget exceeded, result is partial")
+                self.degraded = self.degraded or "time"
+                self.converged = False
+                return self.state_set.per_inst
+            if self.iteration_count - iterations_before >= max_iterations:
+                reason = "iterations"
+            elif self.degraded is None and max_states is not None and self.state_count - states_before > max_states:
+                reason = "states"
+            elif self.degraded is None and max_value_size is not None and self.value_size > max_value_size:
+                reason = "value size"
+            else:
+                reason = None
+            if reason is not None:
+                if self.degraded is not None:
+                    print(f"  Warning: {reason} budget exceeded again after degrading, result is partial")
+                    self.converged = False
+                    return self.state_set.per_inst
+                # every state is re-stepped once coarsened, the popped one included
+                self._degrade(reason)
+                iterations_before, states_before = self.iteration_count, self.state_count
+                max_iterations = max(max_iterations, DEGRADED_ITERATIONS * len(self.instructions))
+                continue
             
             if pc not in self.instructions:
+                self.converged = False
                 continue
             else:
                 self.pc_set.add(pc)
             
             instruction = self.instructions[pc]
             successors = self.step(state, instruction)
+            if self.converged and self._drops_possible_path(instruction, successors, self.step_errors):
+                self.converged = False
             
             for next_state in successors:
+                if self.use_liveness:
+                    next_state = self._drop_dead_locals(next_state)
+                if self.degraded is not None:
+                    next_state = self._drop_strings(next_state)
+                self.state_count += 1
                 changed = self.state_set.update(
                     next_state,
                     use_widening=self.use_widening,
@@ -317,14 +526,171 @@ class AbstractInterpreter(object):
                 )
                 
                 if changed:
-                    if self.use_widening and next_state.pc in self.loop_heads:
+                    if max_value_size is not None:
+                        self._track_size(self.state_set.per_inst[next_state.pc])
+                    if self.state_set.widens(next_state.pc, self.use_widening, self.loop_heads, self.constants):
                         self.widen_count += 1
                     else:
                         self.join_count += 1
+
+        if self.use_widening and self.narrowing_passes > 0 and self.degraded is None:
+            self._narrow(initial_state, deadline)
         
         return self.state_set.per_inst
-    
+
+    def _degrade(self, reason):
+        """Switch the rest of the analysis to top strings and immediate, threshold-free widening at loop heads"""
+        print(f"  Warning: {reason} budget exceeded, finishing with a coarser analysis")
+        self.degraded = reason
+        self.use_widening = True
+        # only 0 is kept as a widening threshold, intervals jump to it or to infinity
+        self.constants = {0}
+        self.state_set.widening_delay = 0
+        for pc, state in list(self.state_set.per_inst.items()):
+            self.state_set.per_inst[pc] = self._drop_strings(state)
+            self.state_set.needswork.add(pc)
+            if pc in self.state_sizes:
+                self._track_size(self.state_set.per_inst[pc])
+
+    def _drop_strings(self, state):
+        if not self.use_string:
+            return state
+        def coarsen(value):
+            if isinstance(value, (StringAbstraction, BricksAbstractValue, IntegratedStringValue)):
+                return self.create_string_top()
+            return value
+        frame = AbstractFrame(locals={idx: coarsen(val) for idx, val in state.frame.locals.items()},
+                              stack=[coarsen(val) for val in state.frame.stack])
+        return AbstractState(pc=state.pc, frame=frame)
+
+    def _track_size(self, state):
+        size = sum(value_size(value) for value in list(state.frame.locals.values()) + state.frame.stack)
+        self.value_size += size - self.state_sizes.get(state.pc, 0)
+        self.state_sizes[state.pc] = size
+
+    def _narrow(self, initial_state, deadline=None):
+        """Descending passes over the widened fixpoint, then the errors are collected again from the final states.
+
+        Each pass visits the states in pc order and narrows a state by the join of what its
+        predecessors step to, using the predecessors already narrowed in the same pass, so
+        a narrowed loop head reaches the code after the loop within one pass.
+        """
+        path_results = list(self.path_results)
+        predecessors = {}
+        for pc, successors in self.edges.items():
+            for successor in successors:
+                predecessors.setdefault(successor, set()).add(pc)
+
+        for _ in range(self.narrowing_passes):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            stepped = {}  # pc -> successor states of its current state
+            changed = False
+            for pc in sorted(self.state_set.per_inst):
+                incoming = initial_state if pc == initial_state.pc else None
+                for predecessor in predecessors.get(pc, ()):
+                    if predecessor not in stepped:
+                        state = self.state_set.per_inst.get(predecessor)
+                        stepped[predecessor] = [] if state is None or predecessor not in self.instructions \
+                            else self.step(state, self.instructions[predecessor])
+                    for next_state in stepped[predecessor]:
+                        if next_state.pc != pc:
+                            continue
+                        if self.use_liveness:
+                            next_state = self._drop_dead_locals(next_state)
+                        incoming = next_state if incoming is None else incoming.join(next_state)
+                if incoming is None:
+                    continue
+
+                state = self.state_set.per_inst[pc]
+                narrowed = state.narrow(incoming)
+                if narrowed != state:
+                    self.state_set.per_inst[pc] = narrowed
+                    stepped.pop(pc, None)
+                    changed = True
+            if not changed:
+                break
+
+        # the states seen while iterating are included in the final ones, so re-stepping
+        # these finds every error, edge and outcome once, without those of the imprecise widened states
+        self.errors = {}
+        for name in self.component_errors:
+            self.component_errors[name] = {}
+        self.edges = {}
+        self.outcomes = {}
+        for pc, state in sorted(self.state_set.per_inst.items()):
+            if pc in self.instructions:
+                self.step(state, self.instructions[pc])
+        self.path_results = path_results
+    
+    def _drops_possible_path(self, instruction, successors, new_errors):
+        """True if a step that found only possible errors has fewer successors than the bytecode"""
+        if all(record.certainty == DEFINITE for record in new_errors):
+            return False
+        opcode = instruction[1]
+        if opcode in ["ireturn", "return", "areturn", "athrow"]:
+            expected = set()
+        elif opcode == "goto":
+            expected = {int(instruction[2])}
+        elif opcode.startswith("if"):
+            expected = {int(instruction[2]), self._get_next_pc(instruction[0])}
+        else:
+            expected = {self._get_next_pc(instruction[0])}
+        return not expected <= {successor.pc for successor in successors}
+
     def step(self, state, instruction):
+        self.step_errors = []
+        results_before = len(self.path_results)
+        successors = self._step(state, instruction)
+
+        if self.string_abstraction_type == 'product':
+            if instruction[1] in self.STRING_OPCODES:
+                self._step_components(state, instruction)
+            else:
+                # integer, null and control-flow errors are shared by every component
+                for name, errors in self.component_errors.items():
+                    for record in self.step_errors:
+                        add_error(errors, replace(record, abstraction=name))
+
+        self.edges.setdefault(state.pc, set()).update(successor.pc for successor in successors)
+        if len(self.path_results) > results_before:
+            self.outcomes.setdefault(state.pc, set()).update(self.path_results[results_before:])
+        return successors
+
+    def get_path_counts(self):
+        """Counter of the control-flow paths from the entry ending in each result, each loop passed once"""
+        if not self.edges and not self.outcomes:
+            return Counter()
+        return count_paths(0, self.edges, self.outcomes)
+
+    def _report_error(self, pc, kind, certainty, detail=""):
+        record = ErrorRecord(pc, kind, certainty, self.string_abstraction_type, detail)
+        self.step_errors.append(record)
+        add_error(self.errors, record)
+
+    def _step_components(self, state, instruction):
+        """Replay a string operation on each component of the product state, keeping only its errors"""
+        saved = (self.errors, self.step_errors, self.path_results, self.string_abstraction_type)
+        try:
+            for name, field in self.PRODUCT_COMPONENTS.items():
+                def project(value):
+                    if isinstance(value, IntegratedStringValue):
+                        return getattr(value, field)
+                    return value
+
+                frame = AbstractFrame(
+                    locals={idx: project(val) for idx, val in state.frame.locals.items()},
+                    stack=[project(val) for val in state.frame.stack]
+                )
+                self.errors = self.component_errors[name]
+                self.step_errors = []
+                self.path_results = []
+                self.string_abstraction_type = name
+                self._step(AbstractState(pc=state.pc, frame=frame), instruction)
+        finally:
+            self.errors, self.step_errors, self.path_results, self.string_abstraction_type = saved
+
+    def _step(self, state, instruction):
         pc = instruction[0]
         opcode = instruction[1]
         
@@ -539,7 +905,7 @@ class AbstractInterpreter(object):
             definitely_not_zero = not possibly_zero
         
         if definitely_zero:
-            self.errors.append(f"PC {state.pc}: Definite division by zero")
+            self._report_error(state.pc, ErrorKind.DIVIDE_BY_ZERO, DEFINITE)
             self.path_results.append("divide by zero")
             return []
         
@@ -550,7 +916,7 @@ class AbstractInterpreter(object):
             return [new_state]
         
         if possibly_zero:
-            self.errors.append(f"PC {state.pc}: Possible division by zero")
+            self._report_error(state.pc, ErrorKind.DIVIDE_BY_ZERO, POSSIBLE)
             if self.use_interval:
                 result = IntervalInt.top()
             else:
@@ -577,7 +943,7 @@ class AbstractInterpreter(object):
             possibly_zero = (Sign.ZERO in b.state_set)
         
         if possibly_zero:
-            self.errors.append(f"PC {state.pc}: Possible division by zero (remainder)")
+            self._report_error(state.pc, ErrorKind.DIVIDE_BY_ZERO, POSSIBLE, "(remainder)")
             if self.use_interval:
                 result = IntervalInt.top()
             else:
@@ -725,70 +1091,70 @@ class AbstractInterpreter(object):
                         can_be_zero = condition_val.contains(0)
                         can_be_nonzero = condition_val.low < 0 or condition_val.high > 0
                         if target_throws and can_be_zero:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         if fallthrough_throws and can_be_nonzero:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     elif opcode == "ifne":
                         if target_throws:
                             can_be_nonzero = condition_val.low < 0 or condition_val.high > 0
                             if can_be_nonzero:
-                                self.errors.append(f"PC {state.pc}: Possible assertion error")
+                                self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         
                         if fallthrough_throws:
                             is_assertions_disabled_check = (condition_val.low == float('-inf') and 
                                                             condition_val.high == float('+inf'))
                             
                             if not is_assertions_disabled_check and not definitely_nonzero:
-                                self.errors.append(f"PC {state.pc}: Possible assertion error")
+                                self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     
                     elif opcode == "iflt":
                         can_be_lt = condition_val.low < 0
                         can_be_ge = condition_val.high >= 0
                         if target_throws and can_be_lt:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         if fallthrough_throws and can_be_ge:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     elif opcode == "ifle":
                         can_be_le = condition_val.low <= 0
                         can_be_gt = condition_val.high > 0
                         if target_throws and can_be_le:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         if fallthrough_throws and can_be_gt:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     elif opcode == "ifgt":
                         can_be_gt = condition_val.high > 0
                         can_be_le = condition_val.low <= 0
                         if target_throws and can_be_gt:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         if fallthrough_throws and can_be_le:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     elif opcode == "ifge":
                         can_be_ge = condition_val.high >= 0
                         can_be_lt = condition_val.low < 0
                         if target_throws and can_be_ge:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         if fallthrough_throws and can_be_lt:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                 else:  # AbstractInt
                     if opcode == "ifeq":
                         can_be_zero = Sign.ZERO in condition_val.state_set
                         can_be_nonzero = (Sign.POSITIVE in condition_val.state_set or 
                                          Sign.NEGATIVE in condition_val.state_set)
                         if target_throws and can_be_zero:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         if fallthrough_throws and can_be_nonzero:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     elif opcode == "ifne":
                         can_be_nonzero = (Sign.POSITIVE in condition_val.state_set or 
                                          Sign.NEGATIVE in condition_val.state_set)
                         can_be_zero = Sign.ZERO in condition_val.state_set
                         if target_throws and can_be_nonzero:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         if fallthrough_throws and can_be_zero:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     else:
                         # For other conditions, conservatively report error
-                        self.errors.append(f"PC {state.pc}: Possible assertion error")
+                        self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
         
         # local variable
         local_idx = None
@@ -923,16 +1289,16 @@ class AbstractInterpreter(object):
                                     val2.low == 0 and val2.high == 0)
                         
                         if not definitely_equal:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                         elif not both_small_nonzero:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
 
                     
                     # Rare case: target throws if equal
                     if target_throws:
                         can_be_equal = not (val1.high < val2.low or val1.low > val2.high)
                         if can_be_equal:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                 
                 elif opcode == "if_icmpne":
                     # True branch: val1 != val2 → jumps to target
@@ -940,15 +1306,15 @@ class AbstractInterpreter(object):
                     if fallthrough_throws:
                         can_be_equal = not (val1.high < val2.low or val1.low > val2.high)
                         if can_be_equal and not definitely_equal:
-                            self.errors.append(f"PC {state.pc}: Possible assertion error")
+                            self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                     if target_throws and not definitely_equal:
-                        self.errors.append(f"PC {state.pc}: Possible assertion error")
+                        self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
                 
                 elif opcode in ["if_icmplt", "if_icmple", "if_icmpgt", "if_icmpge"]:
-                    self.errors.append(f"PC {state.pc}: Possible assertion error")
+                    self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
             
             elif isinstance(val1, AbstractInt) and isinstance(val2, AbstractInt):
-                self.errors.append(f"PC {state.pc}: Possible assertion error")
+                self._report_error(state.pc, ErrorKind.ASSERTION, POSSIBLE)
         
         if self.use_interval and isinstance(val1, IntervalInt) and isinstance(val2, IntervalInt):
             local_idx = None
@@ -1113,10 +1479,10 @@ class AbstractInterpreter(object):
                 break
         
         if is_assertion_error:
-            self.errors.append(f"PC {state.pc}: Assertion error")
+            self._report_error(state.pc, ErrorKind.ASSERTION, DEFINITE)
             self.path_results.append("assertion error")
         else:
-            self.errors.append(f"PC {state.pc}: Exception thrown")
+            self._report_error(state.pc, ErrorKind.EXCEPTION, DEFINITE)
             self.path_results.append("error")
         
         return []
@@ -1173,11 +1539,11 @@ class AbstractInterpreter(object):
             for operand in stack_values:
                 if isinstance(operand, (StringAbstraction, BricksAbstractValue, IntegratedStringValue)):
                     if operand.is_definitely_null():
-                        self.errors.append(f"PC {state.pc}: Definite null pointer exception in string concatenation")
+                        self._report_error(state.pc, ErrorKind.NULL_POINTER, DEFINITE, "in string concatenation")
                         self.path_results.append("null pointer exception")
                         return []
                     elif operand.is_possibly_null():
-                        self.errors.append(f"PC {state.pc}: Possible null pointer exception in string concatenation")
+                        self._report_error(state.pc, ErrorKind.NULL_POINTER, POSSIBLE, "in string concatenation")
        
 
             result = self.create_abstract_string("")
@@ -1302,7 +1668,7 @@ class AbstractInterpreter(object):
             return False
 
         if StringOperations.is_definitely_null(string_val):
-            self.errors.append(f"PC {state.pc}: Definite null pointer exception in {method_name}")
+            self._report_error(state.pc, ErrorKind.NULL_POINTER, DEFINITE, f"in {method_name}")
             self.path_results.append("null pointer exception")
             return True
         elif StringOperations.is_possibly_null(string_val):
@@ -1337,7 +1703,7 @@ class AbstractInterpreter(object):
             if max_len == 0:
                 return False
 
-            self.errors.append(f"PC {state.pc}: Possible null pointer exception in {method_name}")
+            self._report_error(state.pc, ErrorKind.NULL_POINTER, POSSIBLE, f"in {method_name}")
             return False
 
         return False
@@ -1423,17 +1789,17 @@ class AbstractInterpreter(object):
             min_len, max_len = StringOperations.length(string_val)
 
             if index_val.low < 0:
-                self.errors.append(f"PC {state.pc}: Possible index out of bounds (negative index)")
+                self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, POSSIBLE, "(negative index)")
                 self.path_results.append("index out of bounds")
                 return []
 
             if index_val.low >= max_len:
-                self.errors.append(f"PC {state.pc}: Possible index out of bounds (index >= length)")
+                self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, POSSIBLE, "(index >= length)")
                 self.path_results.append("index out of bounds")
                 return []
 
             if index_val.high >= max_len or (min_len == 0 and index_val.high >= 0):
-                self.errors.append(f"PC {state.pc}: Possible index out of bounds")
+                self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, POSSIBLE)
 
         if self.use_interval:
             new_state.frame.stack.append(IntervalInt(0, 65535))
@@ -1470,40 +1836,40 @@ class AbstractInterpreter(object):
             # 1.  start < 0
             if isinstance(start_val, IntervalInt):
                 if start_val.high < 0: # Definite
-                    self.errors.append(f"PC {state.pc}: Definite index out of bounds (negative start)")
+                    self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, DEFINITE, "(negative start)")
                     self.path_results.append("index out of bounds")
                     return []
                 if start_val.low < 0: # Possible
-                    self.errors.append(f"PC {state.pc}: Possible index out of bounds (negative start)")
+                    self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, POSSIBLE, "(negative start)")
                     self.path_results.append("index out of bounds")
 
             if isinstance(start_val, IntervalInt):
                 if start_val.low > max_len: # Definite
-                    self.errors.append(f"PC {state.pc}: Definite index out of bounds (start > length)")
+                    self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, DEFINITE, "(start > length)")
                     self.path_results.append("index out of bounds")
                     return []
                 if start_val.high > max_len: # Possible
-                    self.errors.append(f"PC {state.pc}: Possible index out of bounds (start > length)")
+                    self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, POSSIBLE, "(start > length)")
                     self.path_results.append("index out of bounds")
 
        
             if isinstance(end_val, IntervalInt):
                 if end_val.low > max_len: # Definite
-                    self.errors.append(f"PC {state.pc}: Definite index out of bounds (end > length)")
+                    self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, DEFINITE, "(end > length)")
                     self.path_results.append("index out of bounds")
                     return []
                 if end_val.high > max_len: # Possible
-                    self.errors.append(f"PC {state.pc}: Possible index out of bounds (end > length)")
+                    self._report_error(state.pc, ErrorKind.INDEX_OUT_OF_BOUNDS, POSSIBLE, "(end > length)")
                     self.path_results.append("index out of bounds")
             
 
             if isinstance(start_val, IntervalInt) and isinstance(end_val, IntervalInt):
                 if start_val.low > end_val.high: # Definite
-                     self.errors.append(f"PC {state.pc}: Definite index range exception (start > end)")
+                     self._report_error(state.pc, ErrorKind.INDEX_RANGE, DEFINITE, "(start > end)")
                      self.path_results.append("index range exception")
                      return []
                 if start_val.high > end_val.low: # Possible
-                     self.errors.append(f"PC {state.pc}: Possible index range exception (start > end)")
+                     self._report_error(state.pc, ErrorKind.INDEX_RANGE, POSSIBLE, "(start > end)")
                      self.path_results.append("index range exception")
 
             if isinstance(start_val, IntervalInt) and isinstance(end_val, IntervalInt):
@@ -1718,7 +2084,7 @@ class AbstractInterpreter(object):
             
             # If string could be empty or TOP (unknown content)
             if min_len == 0 or string_val.is_top():
-                self.errors.append(f"PC {state.pc}: Possible number format exception")
+                self._report_error(state.pc, ErrorKind.NUMBER_FORMAT, POSSIBLE)
                 self.path_results.append("number format exception")
                 return []
         
@@ -1974,12 +2340,9 @@ class AbstractInterpreter(object):
         if self.errors:
             error_types = set()
             
-            for err in self.errors:
-                err_lower = err.lower()
-                if "assertion" in err_lower:
-                    error_types.add("assertion error")
-                elif "division by zero" in err_lower or "divide by zero" in err_lower:
-                    error_types.add("divide by zero")
+            for kind in {kind for _, kind in self.errors}:
+                if kind in (ErrorKind.ASSERTION, ErrorKind.DIVIDE_BY_ZERO):
+                    error_types.add(kind.value)
                 else:
                     error_types.add("error")
             
@@ -2004,17 +2367,18 @@ class AbstractInterpreter(object):
         print(f"  Iterations: {self.iteration_count}, Joins: {self.join_count}, Widenings: {self.widen_count}")
         
         # Print errors or success
-        if self.path_results:
-            path_counter = Counter(self.path_results)
-            print(f"  Total paths: {len(self.path_results)}")
+        path_counter = self.get_path_counts()
+        total_paths = sum(path_counter.values())
+        if total_paths > 0:
+            print(f"  Total paths: {total_paths}")
             for result, count in sorted(path_counter.items()):
-                percentage = (count / len(self.path_results)) * 100
+                percentage = (count / total_paths) * 100
                 print(f"    - {result}: {count} ({percentage:.1f}%)") 
 
         if self.errors:
             print(f"  ⚠ Found {len(self.errors)} potential error(s):")
-            for err in self.errors:
-                print(f"    • {err}")
+            for record in sorted(self.errors.values(), key=lambda record: (record.pc, record.kind.value)):
+                print(f"    • {record}")
         else:
             print(f"  ✓ No errors detected")
 
@@ -2028,26 +2392,24 @@ class AbstractInterpreter(object):
             "*": 0
         }
 
-        for result in self.path_results:
+        path_counts = self.get_path_counts()
+        for result, count in path_counts.items():
             if result in error_counts:
-                error_counts[result] += 1
+                error_counts[result] += count
             elif "assertion" in result.lower():
-                error_counts["assertion error"] += 1
+                error_counts["assertion error"] += count
             elif "divide" in result.lower():
-                error_counts["divide by zero"] += 1
+                error_counts["divide by zero"] += count
             else:
-                error_counts["*"] += 1
+                error_counts["*"] += count
 
-        if len(self.path_results) == 0:
+        if len(path_counts) == 0:
             if len(self.errors) == 0:
                 error_counts["ok"] = 1
             else:
-                for err in self.errors:
-                    err_lower = err.lower()
-                    if "assertion" in err_lower:
-                        error_counts["assertion error"] += 1
-                    elif "division by zero" in err_lower or "divide by zero" in err_lower:
-                        error_counts["divide by zero"] += 1
+                for _, kind in self.errors:
+                    if kind in (ErrorKind.ASSERTION, ErrorKind.DIVIDE_BY_ZERO):
+                        error_counts[kind.value] += 1
 
         total = sum(error_counts.values())
 
@@ -2069,27 +2431,15 @@ class AbstractInterpreter(object):
         return probabilities
         
 
-    def get_string_analysis_summary(self):
-        if self.errors:
-            error_types = set()
-            
-            for err in self.errors:
-                err_lower = err.lower()
-                
-                if "assertion" in err_lower:
-                    error_types.add("assertion error")
-                elif "null" in err_lower or "pointer" in err_lower:
-                    error_types.add("null pointer exception")
-                elif "index out of bounds" in err_lower or "out of bounds" in err_lower:
-                    error_types.add("index out of bounds")
-                elif "index range" in err_lower:
-                    error_types.add("index range exception")
-                elif "number format" in err_lower or "parse" in err_lower:
-                    error_types.add("number format exception")
-                elif "division by zero" in err_lower or "divide by zero" in err_lower:
-                    error_types.add("divide by zero")
-                else:
-                    error_types.add("error")
+    def _errors_of(self, abstraction=None):
+        if abstraction is None or abstraction == self.string_abstraction_type:
+            return self.errors
+        return self.component_errors[abstraction]
+
+    def get_string_analysis_summary(self, abstraction=None):
+        errors = self._errors_of(abstraction)
+        if errors:
+            error_types = {kind.value for _, kind in errors}
             
             if len(error_types) == 0:
                 return "error"
@@ -2164,26 +2514,5 @@ class AbstractInterpreter(object):
         
         return final_strings
     
-    def get_error_set(self):
-        error_set = set()
-        
-        if self.errors:
-            for err in self.errors:
-                err_lower = err.lower()
-                
-                if "null" in err_lower or "pointer" in err_lower:
-                    error_set.add("null pointer exception")
-                elif "assertion" in err_lower:
-                    error_set.add("assertion error")
-                elif "index out of bounds" in err_lower or "out of bounds" in err_lower:
-                    error_set.add("index out of bounds")
-                elif "index range" in err_lower:
-                    error_set.add("index range exception")
-                elif "number format" in err_lower or "parse" in err_lower:
-                    error_set.add("number format exception")
-                elif "division by zero" in err_lower or "divide by zero" in err_lower:
-                    error_set.add("divide by zero")
-                else:
-                    error_set.add("error")
-        
-        return error_set
+    def get_error_set(self, abstraction=None):
+        return {kind.value for _, kind in self._errors_of(abstraction)}
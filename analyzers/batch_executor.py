@@ -0,0 +1,186 @@
+from analyzers import bytecode_compiler
+
+# numpy takes most of the fuzzer's import time, so it is only imported by supports()
+# for a method it can run. Optional, the fuzzer runs every input one by one without it
+np = None
+
+MAX_STEPS = bytecode_compiler.MAX_STEPS
+BATCH_SIZE = 4096
+
+RESULTS = ["ok", "divide by zero", "assertion error", "*"]
+OK, DIVIDE_BY_ZERO, ASSERTION_ERROR, OUT_OF_STEPS = range(len(RESULTS))
+RUNNING = -1
+
+BATCH_PARAM_TYPES = {"int", "bool"}
+BATCH_OPCODES = {
+    "iconst", "bipush", "sipush", "ldc", "iload", "istore", "iadd", "isub", "imul", "idiv", "irem", "iinc",
+    "goto", "ireturn", "return", "athrow", "getstatic", "new", "dup", "pop", "invokespecial",
+} | (bytecode_compiler.JUMP_OPCODES - {"ifnull", "ifnonnull", "if_acmpeq", "if_acmpne"})
+
+INT_COMPARE = {"eq": "equal", "ne": "not_equal", "lt": "less", "le": "less_equal", "gt": "greater", "ge": "greater_equal"}
+
+
+def load_numpy():
+    """The numpy module, imported on first use, None if it is not installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+def supports(method):
+    """True if the method only takes int/bool parameters and uses integer instructions"""
+    if any(p["type"][0] not in BATCH_PARAM_TYPES or p["type"][1] for p in method.parameters):
+        return False
+    for instruction in method.bytecodes[1]:
+        opcode = instruction[1]
+        if opcode not in BATCH_OPCODES:
+            return False
+        if opcode == "ldc" and not (isinstance(instruction[2], tuple) and instruction[2][0] == "int"):
+            return False
+        if opcode == "invokespecial" and "AssertionError" not in str(instruction[2:]):
+            return False
+    try:
+        bytecode_compiler.MethodCompiler(method.bytecodes).stack_depths()
+    except bytecode_compiler.Unsupported:
+        return False
+    return load_numpy() is not None
+
+
+def java_div(a, b):
+    """int32 division truncating toward zero, Integer.MIN_VALUE / -1 wraps as in Java (interpreter.java_div per lane)"""
+    a = a.astype(np.int64)
+    b = b.astype(np.int64)
+    q = np.abs(a) // np.abs(b)
+    q = np.where((a < 0) != (b < 0), -q, q)
+    return wrap(q)
+
+
+def wrap(values):
+    return ((values.astype(np.int64) + 2 ** 31) % 2 ** 32 - 2 ** 31).astype(np.int32)
+
+
+class BatchExecutor(object):
+    """Runs many inputs of one integer method in lockstep.
+
+    Lanes (one per input) share the operand stack and locals as int32 arrays.
+    Each step runs the instruction at the smallest pc of any running lane for
+    every lane at that pc, so lanes that split at a branch join up again where
+    the paths meet.
+    """
+
+    def __init__(self, bytecodes):
+        self.modifiers, self.instructions = bytecodes
+        compiler = bytecode_compiler.MethodCompiler(bytecodes)
+        self.depths = compiler.stack_depths()
+        self.max_depth = max(self.depths.values()) + 2
+        self.targets = {i: compiler.target(instruction) for i, instruction in enumerate(self.instructions)
+                        if instruction[1] in bytecode_compiler.JUMP_OPCODES}
+        self.max_locals = 1 + max([int(instruction[2]) if len(instruction) > 2 else 0 for instruction in self.instructions
+                                   if instruction[1] in ["iload", "istore", "iinc"]] + [0])
+
+    def run(self, inputs_list):
+        """Returns (result codes, coverage), coverage[lane, pc] is True if the lane ran instruction pc"""
+        lanes = len(inputs_list)
+        param_count = len(inputs_list[0]) if lanes > 0 else 0
+        local_count = max(self.max_locals, param_count)
+
+        local_values = np.zeros((local_count, lanes), dtype=np.int32)
+        if param_count > 0:
+            local_values[:param_count] = wrap(np.array(inputs_list, dtype=np.int64).T)
+        stack = np.zeros((self.max_depth, lanes), dtype=np.int32)
+        pcs = np.zeros(lanes, dtype=np.int64)
+        steps = np.zeros(lanes, dtype=np.int64)
+        results = np.full(lanes, RUNNING, dtype=np.int8)
+        coverage = np.zeros((lanes, len(self.instructions)), dtype=bool)
+        end = len(self.instructions)
+
+        while True:
+            running = results == RUNNING
+            # the interpreter gives up when it starts step MAX_STEPS + 1, even to find it ran off the end
+            out_of_steps = running & (steps >= MAX_STEPS)
+            results[out_of_steps] = OUT_OF_STEPS
+            finished = running & ~out_of_steps & (pcs >= end)
+            results[finished] = OK
+            running &= ~out_of_steps & ~finished
+            if not running.any():
+                break
+
+            pc = int(pcs[running].min())
+            lane = np.nonzero(running & (pcs == pc))[0]
+            coverage[lane, pc] = True
+            steps[lane] += 1
+            self.step(pc, lane, stack, local_values, pcs, results)
+
+        return [RESULTS[code] for code in results], coverage
+
+    def run_test_cases(self, inputs_list):
+        """(result, pc set) of each input, as interpreter.run_test_case gives them with Java int arithmetic"""
+        results, coverage = self.run(inputs_list)
+        return [(result, set(np.nonzero(lane_coverage)[0].tolist())) for result, lane_coverage in zip(results, coverage)]
+
+    def step(self, pc, lane, stack, local_values, pcs, results):
+        instruction = self.instructions[pc]
+        opcode = instruction[1]
+        args = instruction[2:]
+        depth = self.depths[pc]
+        top = depth - 1
+        next_pc = pc + 1
+
+        if opcode == "iconst":
+            stack[depth, lane] = -1 if args[0] == "m1" else int(args[0])
+        elif opcode in ["bipush", "sipush"]:
+            stack[depth, lane] = int(args[0])
+        elif opcode == "ldc":
+            stack[depth, lane] = wrap(np.array([int(args[0][1])]))[0]
+        elif opcode == "iload":
+            stack[depth, lane] = local_values[int(args[0]) if args else 0, lane]
+        elif opcode == "istore":
+            local_values[int(args[0]) if args else 0, lane] = stack[top, lane]
+        elif opcode in ["iadd", "isub", "imul"]:
+            a = stack[top - 1, lane].astype(np.int64)
+            b = stack[top, lane].astype(np.int64)
+            value = a + b if opcode == "iadd" else (a - b if opcode == "isub" else a * b)
+            stack[top - 1, lane] = wrap(value)
+        elif opcode in ["idiv", "irem"]:
+            a = stack[top - 1, lane]
+            b = np.where(stack[top, lane] == 0, 1, stack[top, lane])
+            results[lane[stack[top, lane] == 0]] = DIVIDE_BY_ZERO
+            quotient = java_div(a, b)
+            if opcode == "idiv":
+                stack[top - 1, lane] = quotient
+            else:
+                stack[top - 1, lane] = wrap(a.astype(np.int64) - quotient.astype(np.int64) * b)
+        elif opcode == "iinc":
+            idx = int(args[0])
+            local_values[idx, lane] = wrap(local_values[idx, lane].astype(np.int64) + int(args[1]))
+        elif opcode == "goto":
+            next_pc = self.targets[pc]
+        elif opcode.startswith("if_icmp"):
+            taken = getattr(np, INT_COMPARE[opcode[7:]])(stack[top - 1, lane], stack[top, lane])
+            next_pc = np.where(taken, self.targets[pc], pc + 1)
+        elif opcode.startswith("if"):
+            taken = getattr(np, INT_COMPARE[opcode[2:]])(stack[top, lane], 0)
+            next_pc = np.where(taken, self.targets[pc], pc + 1)
+        elif opcode in ["ireturn", "return"]:
+            results[lane] = OK
+        elif opcode == "athrow":
+            results[lane] = ASSERTION_ERROR
+        elif opcode == "invokespecial":
+            results[lane] = ASSERTION_ERROR
+        elif opcode == "getstatic":
+            # $assertionsDisabled = false
+            stack[depth, lane] = 0
+        elif opcode == "new":
+            stack[depth, lane] = -1
+        elif opcode == "dup":
+            if depth > 0:
+                stack[depth, lane] = stack[top, lane]
+        elif opcode == "pop":
+            pass
+
+        pcs[lane] = next_pc
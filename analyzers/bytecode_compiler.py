@@ -0,0 +1,408 @@
+from analyzers import interpreter
+
+# same instruction budget as interpreter.run_bytecodes
+MAX_STEPS = 1000
+# the fuzzer compiles a method once it will run at least this many inputs
+HOT_METHOD_THRESHOLD = 100
+
+# returned by compiled code when the budget may run out inside a block,
+# the input is then run again by the interpreter which stops at the exact step
+FALLBACK = object()
+
+INT_COMPARE = {"eq": "==", "ne": "!=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+JUMP_OPCODES = {"goto", "ifnull", "ifnonnull", "if_acmpeq", "if_acmpne"} \
+    | {"if{}".format(c) for c in INT_COMPARE} | {"if_icmp{}".format(c) for c in INT_COMPARE}
+RETURN_OPCODES = {"ireturn", "return", "areturn", "athrow"}
+
+# String methods in the order run_bytecodes tests for them, with the number of
+# arguments popped besides the receiver
+STRING_METHODS = [
+    ("length", 0), ("isempty", 0), ("charat", 1), ("substring", 2), ("contains", 1), ("equals", 1),
+    ("concat", 1), ("split", None), ("tolowercase", 0), ("touppercase", 0), ("replace", 2), ("trim", 0),
+    ("startswith", 1), ("endswith", 1), ("matches", 1),
+]
+
+
+class Unsupported(Exception):
+    pass
+
+
+def parse_int(string_obj):
+    """Integer.parseInt as in run_bytecodes, returns (error, value)"""
+    try:
+        if string_obj != string_obj.strip():
+            return "number format exception", None
+        return None, int(string_obj)
+    except ValueError:
+        return "number format exception", None
+
+
+def java_matches(regex, string_obj):
+    pattern = interpreter.compile_java_regex(regex)
+    return 0 if pattern is None else (1 if pattern.fullmatch(string_obj) else 0)
+
+
+def string_method(method_desc):
+    for name, arg_count in STRING_METHODS:
+        if name in method_desc.lower():
+            return name, arg_count
+    return None, None
+
+
+class MethodCompiler(object):
+    """Translates decoded bytecode into one Python function.
+
+    Every basic block becomes a branch of a dispatch loop, operand stack slots
+    become locals (s0, s1, ...) and Java locals become L0, L1, ... The generated
+    function returns the same result and pc set as interpreter.run_bytecodes.
+    """
+
+    def __init__(self, bytecodes):
+        self.modifiers, self.instructions = bytecodes
+        self.index_of = {instruction[0]: i for i, instruction in enumerate(self.instructions)}
+        self.lines = []
+
+    def target(self, instruction):
+        offset = int(instruction[2])
+        if offset not in self.index_of:
+            raise Unsupported("jump to unknown offset {}".format(offset))
+        return self.index_of[offset]
+
+    def find_blocks(self):
+        leaders = {0}
+        for i, instruction in enumerate(self.instructions):
+            if instruction[1] in JUMP_OPCODES:
+                leaders.add(self.target(instruction))
+                leaders.add(i + 1)
+            elif instruction[1] in RETURN_OPCODES:
+                leaders.add(i + 1)
+        leaders = sorted(leader for leader in leaders if leader < len(self.instructions))
+        return [(start, end) for start, end in zip(leaders, leaders[1:] + [len(self.instructions)])]
+
+    def stack_depths(self):
+        """Operand stack depth before each instruction, which verified bytecode keeps consistent"""
+        depths = {0: 0}
+        todo = [0]
+        while todo:
+            i = todo.pop()
+            depth = depths[i]
+            if i >= len(self.instructions):
+                continue
+            instruction = self.instructions[i]
+            pops, pushes = self.stack_effect(instruction, depth)
+            if pops > depth:
+                raise Unsupported("stack underflow at {}".format(instruction[0]))
+            successors = []
+            if instruction[1] not in RETURN_OPCODES and instruction[1] != "goto":
+                successors.append(i + 1)
+            if instruction[1] in JUMP_OPCODES:
+                successors.append(self.target(instruction))
+            for successor in successors:
+                new_depth = depth - pops + pushes
+                if successor in depths and depths[successor] != new_depth:
+                    raise Unsupported("inconsistent stack depth at {}".format(successor))
+                if successor not in depths:
+                    depths[successor] = new_depth
+                    todo.append(successor)
+        return depths
+
+    def stack_effect(self, instruction, depth):
+        opcode = instruction[1]
+        args = instruction[2:]
+        if opcode in ["iconst", "bipush", "sipush", "ldc", "iload", "aload", "getstatic", "new"]:
+            return 0, 1
+        if opcode == "aconst":
+            return 0, int(args[0] == "null")
+        if opcode in ["istore", "astore", "pop", "athrow", "ireturn", "areturn", "ifnull", "ifnonnull"] \
+                or opcode in ["if{}".format(c) for c in INT_COMPARE]:
+            return min(depth, 1) if opcode == "pop" else 1, 0
+        if opcode in ["iadd", "isub", "imul", "idiv", "irem"]:
+            return 2, 1
+        if opcode in ["if_acmpeq", "if_acmpne", "putfield"] or opcode.startswith("if_icmp"):
+            return 2, 0
+        if opcode in ["iinc", "goto", "return"]:
+            return 0, 0
+        if opcode == "dup":
+            return 0, int(depth > 0)
+        if opcode == "dup2":
+            return 0, 2 if depth >= 2 else 0
+        if opcode == "pop2":
+            return min(depth, 2), 0
+        if opcode == "getfield":
+            return 1, 1
+        if opcode == "invokespecial":
+            if "java/lang/StringBuilder." in str(args):
+                raise Unsupported("StringBuilder")
+            return 0, 0
+        if opcode == "invokevirtual":
+            method_desc = str(args[0])
+            name, arg_count = string_method(method_desc)
+            if "java/lang/StringBuilder." in method_desc or name is None or arg_count is None:
+                raise Unsupported(method_desc)
+            if name == "substring" and ":(II)" not in method_desc:
+                # run_bytecodes always pops two indexes here
+                raise Unsupported(method_desc)
+            return arg_count + 1, 1
+        if opcode == "invokestatic":
+            if "parseint" not in str(args[0]).lower():
+                raise Unsupported(str(args[0]))
+            return 1, 1
+        if opcode == "invokedynamic":
+            if not isinstance(args[0], dict):
+                return 0, 0
+            param_count = len(args[0].get("parameters", []))
+            if param_count > depth:
+                raise Unsupported("invokedynamic with a short stack")
+            return param_count, 1
+        raise Unsupported("opcode {}".format(opcode))
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def compile(self):
+        blocks = self.find_blocks()
+        depths = self.stack_depths()
+        block_of = {start: b for b, (start, end) in enumerate(blocks)}
+
+        self.emit(0, "def compiled_method(inputs, pc_set):")
+        self.emit(1, "n = len(inputs)")
+        for idx, default in sorted(self.local_defaults().items()):
+            self.emit(1, "L{0} = inputs[{0}] if n > {0} else {1}".format(idx, default))
+        self.emit(1, "steps = 0")
+        self.emit(1, "block = 0")
+        self.emit(1, "while True:")
+        for b, (start, end) in enumerate(blocks):
+            if start not in depths:
+                continue  # unreachable
+            self.emit(2, "{} block == {}:".format("if" if b == 0 else "elif", b))
+            self.emit(3, "if steps + {} > {}:".format(end - start, MAX_STEPS))
+            self.emit(4, "return FALLBACK")
+            self.emit(3, "steps += {}".format(end - start))
+            for i in range(start, end):
+                self.compile_instruction(i, start, depths[i], block_of)
+            last = self.instructions[end - 1]
+            if last[1] in JUMP_OPCODES and last[1] != "goto":
+                # coverage was recorded before the branch
+                self.jump(3, end, block_of)
+            elif last[1] not in RETURN_OPCODES and last[1] != "goto":
+                self.emit(3, "pc_set.update(range({}, {}))".format(start, end))
+                self.jump(3, end, block_of)
+        return "\n".join(self.lines) + "\n"
+
+    def local_defaults(self):
+        defaults = {}
+        for instruction in self.instructions:
+            opcode = instruction[1]
+            if opcode in ["iload", "istore", "iinc"]:
+                defaults[int(instruction[2]) if len(instruction) > 2 else 0] = "0"
+            elif opcode in ["aload", "astore"]:
+                defaults.setdefault(int(instruction[2]) if len(instruction) > 2 else 0, "None")
+        return defaults
+
+    def jump(self, indent, index, block_of):
+        if index >= len(self.instructions):
+            # run_bytecodes spends one more step to find it ran off the end
+            self.emit(indent, "if steps >= {}:".format(MAX_STEPS))
+            self.emit(indent + 1, "return FALLBACK")
+            self.emit(indent, "return 'ok'")
+        else:
+            self.emit(indent, "block = {}".format(block_of[index]))
+            self.emit(indent, "continue")
+
+    def exit_with(self, indent, start, i, result):
+        self.emit(indent, "pc_set.update(range({}, {}))".format(start, i + 1))
+        self.emit(indent, "return {!r}".format(result))
+
+    def compile_instruction(self, i, start, depth, block_of):
+        instruction = self.instructions[i]
+        opcode = instruction[1]
+        args = instruction[2:]
+        top = "s{}".format(depth - 1)
+        below = "s{}".format(depth - 2)
+        push = "s{}".format(depth)
+        emit = lambda line: self.emit(3, line)
+
+        if opcode == "iconst":
+            emit("{} = {}".format(push, -1 if args[0] == "m1" else int(args[0])))
+        elif opcode in ["bipush", "sipush"]:
+            emit("{} = {}".format(push, int(args[0])))
+        elif opcode == "ldc":
+            value = args[0]
+            if isinstance(value, tuple) and len(value) >= 2:
+                value = int(value[1]) if value[0] == "int" else (str(value[1]) if value[0] == "str" else value[1])
+            if not isinstance(value, (int, str, float)) and value is not None:
+                raise Unsupported("ldc {!r}".format(value))
+            emit("{} = {!r}".format(push, value))
+        elif opcode == "aconst":
+            if args[0] == "null":
+                emit("{} = None".format(push))
+        elif opcode in ["iload", "aload"]:
+            emit("{} = L{}".format(push, int(args[0]) if args else 0))
+        elif opcode in ["istore", "astore"]:
+            emit("L{} = {}".format(int(args[0]) if args else 0, top))
+        elif opcode in ["iadd", "isub", "imul"]:
+            emit("{0} = java_int({0} {2} {1})".format(below, top, {"iadd": "+", "isub": "-", "imul": "*"}[opcode]))
+        elif opcode in ["idiv", "irem"]:
+            emit("if {} == 0:".format(top))
+            self.exit_with(4, start, i, "divide by zero")
+            emit("{0} = {2}({0}, {1})".format(below, top, "java_div" if opcode == "idiv" else "java_rem"))
+        elif opcode == "iinc":
+            emit("L{0} = java_int(L{0} + {1})".format(int(args[0]), int(args[1])))
+        elif opcode in JUMP_OPCODES:
+            if opcode == "goto":
+                condition = None
+            elif opcode.startswith("if_icmp"):
+                condition = "char_value({}) {} char_value({})".format(below, INT_COMPARE[opcode[7:]], top)
+            elif opcode.startswith("if_acmp"):
+                condition = "{} {} {}".format(below, INT_COMPARE[opcode[7:]], top)
+            elif opcode == "ifnull":
+                condition = "{} is None".format(top)
+            elif opcode == "ifnonnull":
+                condition = "{} is not None".format(top)
+            else:
+                condition = "{} {} 0".format(top, INT_COMPARE[opcode[2:]])
+            emit("pc_set.update(range({}, {}))".format(start, i + 1))
+            if condition is None:
+                self.jump(3, self.target(instruction), block_of)
+            else:
+                emit("if {}:".format(condition))
+                self.jump(4, self.target(instruction), block_of)
+                # the fall through successor starts the next block
+        elif opcode in ["ireturn", "return", "areturn"]:
+            self.exit_with(3, start, i, "ok")
+        elif opcode == "athrow":
+            self.exit_with(3, start, i, "assertion error")
+        elif opcode == "invokespecial":
+            if "AssertionError" in str(args):
+                self.exit_with(3, start, i, "assertion error")
+        elif opcode == "new":
+            emit("{} = -1".format(push))
+        elif opcode == "dup":
+            if depth > 0:
+                emit("{} = {}".format(push, top))
+        elif opcode == "dup2":
+            if depth >= 2:
+                emit("{}, {} = {}, {}".format(push, "s{}".format(depth + 1), below, top))
+        elif opcode == "getstatic":
+            emit("{} = 0".format(push))
+        elif opcode == "getfield":
+            emit("{} = 0".format(top))
+        elif opcode in ["pop", "pop2", "putfield"]:
+            pass
+        elif opcode == "invokestatic":
+            emit("if {} is None:".format(top))
+            self.exit_with(4, start, i, "null pointer exception")
+            emit("error, {} = parse_int({})".format(top, top))
+            emit("if error is not None:")
+            self.emit(4, "pc_set.update(range({}, {}))".format(start, i + 1))
+            self.emit(4, "return error")
+        elif opcode == "invokedynamic":
+            self.compile_concat(i, start, depth, args[0])
+        elif opcode == "invokevirtual":
+            self.compile_string_method(i, start, depth, str(args[0]))
+        else:
+            raise Unsupported("opcode {}".format(opcode))
+
+    def compile_concat(self, i, start, depth, dynamic_info):
+        if not isinstance(dynamic_info, dict):
+            return
+        param_count = len(dynamic_info.get("parameters", []))
+        slots = ["s{}".format(depth - param_count + k) for k in range(param_count)]
+        if slots:
+            self.emit(3, "if {}:".format(" or ".join("{} is None".format(slot) for slot in slots)))
+            self.exit_with(4, start, i, "null pointer exception")
+
+        parts = []
+        stack_idx = 0
+        for value in dynamic_info.get("values", []):
+            if value is None:
+                if stack_idx < len(slots):
+                    parts.append("str({})".format(slots[stack_idx]))
+                    stack_idx += 1
+            else:
+                parts.append(repr(str(value)))
+        self.emit(3, "s{} = {}".format(depth - param_count, " + ".join(parts) if parts else "''"))
+
+    def compile_string_method(self, i, start, depth, method_desc):
+        name, arg_count = string_method(method_desc)
+        receiver = "s{}".format(depth - arg_count - 1)
+        arg = ["s{}".format(depth - arg_count + k) for k in range(arg_count)]
+        emit = lambda line: self.emit(3, line)
+
+        def fail_if(condition, result):
+            emit("if {}:".format(condition))
+            self.exit_with(4, start, i, result)
+
+        if name == "equals":
+            fail_if("{} is None".format(receiver), "null pointer exception")
+            emit("{0} = 1 if {0} == {1} else 0".format(receiver, arg[0]))
+            return
+
+        # argument nulls are checked together with the receiver, as in run_bytecodes
+        if name in ["contains", "concat", "replace", "startswith", "endswith", "matches"]:
+            fail_if(" or ".join("{} is None".format(v) for v in [receiver] + arg), "null pointer exception")
+        else:
+            fail_if("{} is None".format(receiver), "null pointer exception")
+        fail_if("not isinstance({}, str)".format(receiver), "type error")
+
+        if name == "length":
+            emit("{0} = len({0})".format(receiver))
+        elif name == "isempty":
+            emit("{0} = 1 if len({0}) == 0 else 0".format(receiver))
+        elif name == "charat":
+            fail_if("{1} < 0 or {1} >= len({0})".format(receiver, arg[0]), "index out of bounds")
+            emit("{0} = {0}[{1}]".format(receiver, arg[0]))
+        elif name == "substring":
+            fail_if("{1} < 0 or {2} > len({0})".format(receiver, arg[0], arg[1]), "index out of bounds")
+            fail_if("{} > {}".format(arg[0], arg[1]), "index range exception")
+            emit("{0} = {0}[{1}:{2}]".format(receiver, arg[0], arg[1]))
+        elif name == "contains":
+            emit("{0} = 1 if {1} in {0} else 0".format(receiver, arg[0]))
+        elif name == "concat":
+            emit("{0} = {0} + str({1})".format(receiver, arg[0]))
+        elif name == "tolowercase":
+            emit("{0} = {0}.lower()".format(receiver))
+        elif name == "touppercase":
+            emit("{0} = {0}.upper()".format(receiver))
+        elif name == "replace":
+            emit("{0} = {0}.replace({1}, {2})".format(receiver, arg[0], arg[1]))
+        elif name == "trim":
+            emit("{0} = {0}.strip()".format(receiver))
+        elif name == "startswith":
+            emit("{0} = 1 if {0}.startswith({1}) else 0".format(receiver, arg[0]))
+        elif name == "endswith":
+            emit("{0} = 1 if {0}.endswith({1}) else 0".format(receiver, arg[0]))
+        elif name == "matches":
+            emit("{0} = java_matches({1}, {0})".format(receiver, arg[0]))
+        else:
+            raise Unsupported(method_desc)
+
+
+class CompiledMethod(object):
+
+    def __init__(self, bytecodes, source, function):
+        self.bytecodes = bytecodes
+        self.source = source
+        self.function = function
+
+    def run_test_case(self, case_parameters, use_rope=False):
+        """Same result as interpreter.run_test_case"""
+        pc_set = set()
+        result = self.function(case_parameters, pc_set)
+        if result is FALLBACK:
+            return interpreter.run_test_case(self.bytecodes, case_parameters, None, use_rope)
+        return result, pc_set
+
+
+def compile_method(bytecodes):
+    """CompiledMethod for the decoded bytecode, None if it uses something only the interpreter supports"""
+    try:
+        source = MethodCompiler(bytecodes).compile()
+    except Unsupported:
+        return None
+
+    namespace = {"FALLBACK": FALLBACK, "parse_int": parse_int, "java_matches": java_matches,
+                 "char_value": interpreter.char_value, "java_int": interpreter.java_int,
+                 "java_div": interpreter.java_div, "java_rem": interpreter.java_rem}
+    exec(compile(source, "<compiled {}>".format(id(bytecodes)), "exec"), namespace)
+    return CompiledMethod(bytecodes, source, namespace["compiled_method"])
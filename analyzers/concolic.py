@@ -0,0 +1,415 @@
+import operator
+
+from analyzers import bytecode_compiler, interpreter
+
+# inputs run by concolic exploration before the fuzzer enumerates the literal combinations
+MAX_CONCOLIC_RUNS = 256
+# times flipping one branch direction is attempted, from different paths
+MAX_FLIP_ATTEMPTS = 3
+# violated constraints repaired one at a time while solving a path
+MAX_REPAIRS = 8
+
+COMPARE = {"eq": operator.eq, "ne": operator.ne, "lt": operator.lt, "le": operator.le, "gt": operator.gt, "ge": operator.ge}
+
+UNKNOWN = ("unknown",)
+
+
+class Unsolvable(Exception):
+    """An expression that can't be evaluated on the given inputs"""
+    pass
+
+
+def evaluate(expression, inputs):
+    """Concrete value of a symbolic expression, as run_bytecodes computes it"""
+    kind = expression[0]
+    if kind == "param":
+        return inputs[expression[1]]
+    if kind == "const":
+        return expression[1]
+
+    values = [evaluate(argument, inputs) for argument in expression[1:]]
+    if kind in ["len", "isEmpty", "charAt", "startsWith"] and not isinstance(values[0], str):
+        raise Unsolvable(kind)
+    match kind:
+        case "len":
+            return len(values[0])
+        case "isEmpty":
+            return 1 if len(values[0]) == 0 else 0
+        case "charAt":
+            string_obj, index = values
+            if not isinstance(index, int) or index < 0 or index >= len(string_obj):
+                raise Unsolvable(kind)
+            return string_obj[index]
+        case "equals":
+            if values[0] is None:
+                raise Unsolvable(kind)
+            return 1 if values[0] == values[1] else 0
+        case "startsWith":
+            if not isinstance(values[1], str):
+                raise Unsolvable(kind)
+            return 1 if values[0].startswith(values[1]) else 0
+        case "parseInt":
+            if not isinstance(values[0], str):
+                raise Unsolvable(kind)
+            error, value = bytecode_compiler.parse_int(values[0])
+            if error is not None:
+                raise Unsolvable(kind)
+            return value
+        case "add" | "sub" | "mul" | "div" | "rem":
+            a, b = values
+            if not isinstance(a, int) or not isinstance(b, int):
+                raise Unsolvable(kind)
+            if kind == "add":
+                return interpreter.java_int(a + b)
+            if kind == "sub":
+                return interpreter.java_int(a - b)
+            if kind == "mul":
+                return interpreter.java_int(a * b)
+            if b == 0:
+                raise Unsolvable(kind)
+            return interpreter.java_div(a, b) if kind == "div" else interpreter.java_rem(a, b)
+        case _:
+            raise Unsolvable(kind)
+
+
+def operands(constraint, inputs):
+    op, left, right, chars = constraint
+    a, b = evaluate(left, inputs), evaluate(right, inputs)
+    if chars:
+        a, b = interpreter.char_value(a), interpreter.char_value(b)
+    return a, b
+
+
+def holds(constraint, inputs):
+    """True if the branch condition is met by inputs, raises Unsolvable if it can't be decided"""
+    a, b = operands(constraint, inputs)
+    try:
+        return COMPARE[constraint[0]](a, b)
+    except TypeError:
+        raise Unsolvable(constraint[0])
+
+
+def distance(constraint, inputs):
+    """left - right of an integer comparison"""
+    a, b = operands(constraint, inputs)
+    if not isinstance(a, int) or not isinstance(b, int):
+        raise Unsolvable(constraint[0])
+    return a - b
+
+
+def subterms(expression):
+    yield expression
+    if expression[0] not in ["param", "const"]:
+        for argument in expression[1:]:
+            yield from subterms(argument)
+
+
+def constraint_params(constraint):
+    return sorted({term[1] for side in constraint[1:3] for term in subterms(side) if term[0] == "param"})
+
+
+def path_constraints(bytecodes, inputs, trace):
+    """Replays a run of inputs symbolically along the (pc, taken) trace of its conditional branches.
+
+    Returns (branch, taken, constraint) per branch, the constraint (op, left, right, chars)
+    holds when the branch is taken. branch is (pc, None) for a jump and (pc, check) for
+    the implicit checks of an instruction that raises an error when they fail (null
+    receiver, string index, divisor). Replay stops at what it can't follow."""
+    instructions = bytecodes[1]
+    compiler = bytecode_compiler.MethodCompiler(bytecodes)
+    locals_dict = {i: ("param", i) for i in range(len(inputs))}
+    stack = []
+    branches = iter(trace)
+    constraints = []
+
+    def pop():
+        return stack.pop() if stack else UNKNOWN
+
+    def check(pc, name, constraint):
+        """Records an implicit check, False if the run raised an error there"""
+        try:
+            held = holds(constraint, inputs)
+        except Unsolvable:
+            return True
+        constraints.append(((pc, name), held, constraint))
+        return held
+
+    pc = 0
+    for _ in range(bytecode_compiler.MAX_STEPS):
+        if pc >= len(instructions):
+            break
+        instruction = instructions[pc]
+        opcode = instruction[1]
+        args = instruction[2:]
+        next_pc = pc + 1
+
+        if opcode == "iconst":
+            stack.append(("const", -1 if args[0] == "m1" else int(args[0])))
+        elif opcode in ["bipush", "sipush"]:
+            stack.append(("const", int(args[0])))
+        elif opcode == "ldc":
+            if isinstance(args[0], tuple) and len(args[0]) >= 2:
+                const_type, const_value = args[0][0], args[0][1]
+                if const_type == "int":
+                    const_value = int(const_value)
+                elif const_type == "str":
+                    const_value = str(const_value)
+                stack.append(("const", const_value))
+            else:
+                stack.append(("const", args[0]))
+        elif opcode == "aconst":
+            stack.append(("const", None))
+        elif opcode in ["iload", "aload"]:
+            idx = int(args[0]) if args else 0
+            stack.append(locals_dict.get(idx, ("const", 0 if opcode == "iload" else None)))
+        elif opcode in ["istore", "astore"]:
+            locals_dict[int(args[0]) if args else 0] = pop()
+        elif opcode in ["iadd", "isub", "imul", "idiv", "irem"]:
+            b, a = pop(), pop()
+            if opcode in ["idiv", "irem"] and not check(pc, "divisor", ("ne", b, ("const", 0), False)):
+                break
+            stack.append((opcode[1:], a, b))
+        elif opcode == "iinc":
+            idx = int(args[0])
+            locals_dict[idx] = ("add", locals_dict.get(idx, ("const", 0)), ("const", int(args[1])))
+        elif opcode == "invokevirtual":
+            method_desc = str(args[0])
+            if "java/lang/StringBuilder." in method_desc:
+                for _ in range(len(interpreter.descriptor_parameters(args[0][1])) + 1):
+                    pop()
+                if ".setLength:" not in method_desc:
+                    stack.append(UNKNOWN)
+            else:
+                name, arg_count = bytecode_compiler.string_method(method_desc)
+                if name is None:
+                    # an unknown method: its arguments and receiver are consumed, its result is not followed
+                    descriptor = args[0][1] if isinstance(args[0], tuple) else method_desc
+                    for _ in range(len(interpreter.descriptor_parameters(descriptor)) + 1):
+                        pop()
+                    if not descriptor.endswith(")V"):
+                        stack.append(UNKNOWN)
+                else:
+                    call_args = [pop() for _ in range(1 if arg_count is None else arg_count)][::-1]
+                    receiver = pop()
+                    if not check(pc, "not null", ("ne", receiver, ("const", None), False)):
+                        break
+                    match name:
+                        case "length":
+                            stack.append(("len", receiver))
+                        case "isempty":
+                            stack.append(("isEmpty", receiver))
+                        case "charat":
+                            if not (check(pc, "index >= 0", ("ge", call_args[0], ("const", 0), False)) and
+                                    check(pc, "index < length", ("lt", call_args[0], ("len", receiver), False))):
+                                break
+                            stack.append(("charAt", receiver, call_args[0]))
+                        case "equals":
+                            stack.append(("equals", receiver, call_args[0]))
+                        case "startswith":
+                            stack.append(("startsWith", receiver, call_args[0]))
+                        case _:
+                            stack.append(UNKNOWN)
+        elif opcode == "invokestatic":
+            method_desc = str(args[0]).lower()
+            if "parseint" in method_desc:
+                stack.append(("parseInt", pop()))
+            elif "concatenate" in method_desc:
+                pop(), pop()
+                stack.append(UNKNOWN)
+            else:
+                break
+        elif opcode == "invokedynamic":
+            if isinstance(args[0], dict):
+                for _ in args[0].get("parameters", []):
+                    pop()
+                stack.append(UNKNOWN)
+        elif opcode in bytecode_compiler.JUMP_OPCODES:
+            if opcode == "goto":
+                next_pc = compiler.target(instruction)
+            else:
+                branch = next(branches, None)
+                if branch is None or branch[0] != pc:
+                    break
+                if opcode.startswith("if_icmp") or opcode.startswith("if_acmp"):
+                    right, left = pop(), pop()
+                    constraint = (opcode[7:], left, right, opcode.startswith("if_icmp"))
+                elif opcode in ["ifnull", "ifnonnull"]:
+                    constraint = ("eq" if opcode == "ifnull" else "ne", pop(), ("const", None), False)
+                else:
+                    constraint = (opcode[2:], pop(), ("const", 0), False)
+                constraints.append(((pc, None), branch[1], constraint))
+                if branch[1]:
+                    next_pc = compiler.target(instruction)
+        elif opcode == "invokespecial":
+            method_desc = str(args)
+            if "AssertionError" in method_desc:
+                break
+            if "java/lang/StringBuilder." in method_desc:
+                for _ in range(len(interpreter.descriptor_parameters(args[0][1])) + 1):
+                    pop()
+        elif opcode in ["new", "getfield"]:
+            if opcode == "getfield":
+                pop()
+            stack.append(UNKNOWN if opcode == "new" else ("const", 0))
+        elif opcode == "dup":
+            if stack:
+                stack.append(stack[-1])
+        elif opcode == "dup2":
+            if len(stack) >= 2:
+                stack.extend(stack[-2:])
+        elif opcode == "getstatic":
+            # $assertionsDisabled = false
+            stack.append(("const", 0))
+        elif opcode in ["putfield", "pop2"]:
+            pop(), pop()
+        elif opcode == "pop":
+            pop()
+        elif opcode in bytecode_compiler.RETURN_OPCODES:
+            break
+        pc = next_pc
+    return constraints
+
+
+def linear_roots(f):
+    """Integers around the root of f, taken as linear from f(0) and f(1)"""
+    try:
+        f0, f1 = f(0), f(1)
+    except Unsolvable:
+        return []
+    if f0 == f1:
+        return []
+    root = round(-f0 / (f1 - f0))
+    return [root - 1, root, root + 1]
+
+
+def resize(string_obj, length):
+    return string_obj[:length] + "a" * max(length - len(string_obj), 0)
+
+
+def candidate_values(constraint, inputs, i, type_name):
+    """New values for parameter i that may change whether the constraint holds"""
+    value = inputs[i]
+
+    def distance_with(new_value):
+        return distance(constraint, inputs[:i] + (new_value,) + inputs[i + 1:])
+
+    if type_name == "bool":
+        return [not value]
+    if type_name == "int":
+        return linear_roots(distance_with) + [value - 1, value + 1, 0]
+    if type_name == "chr":
+        return [chr(c) for c in linear_roots(lambda c: distance_with(chr(c))) if 0 <= c < 0x110000]
+
+    string_obj = value or ""
+    values = [None, ""] if any(side == ("const", None) for side in constraint[1:3]) else []
+    for term in (term for side in constraint[1:3] for term in subterms(side)):
+        if ("param", i) not in term[1:]:
+            continue
+        try:
+            others = [evaluate(argument, inputs) for argument in term[1:] if argument != ("param", i)]
+        except Unsolvable:
+            continue
+        other = others[0] if others else None
+        match term[0]:
+            case "len":
+                values += [resize(string_obj, n) for n in linear_roots(lambda n: distance_with(resize(string_obj, max(n, 0))))
+                           if n >= 0]
+            case "isEmpty":
+                values += ["", string_obj or "a"]
+            case "charAt" if isinstance(other, int) and other >= 0:
+                j = other
+                base = resize(string_obj, max(len(string_obj), j + 1))
+                values.append(base)
+                values += [base[:j] + chr(c) + base[j + 1:]
+                           for c in linear_roots(lambda c: distance_with(base[:j] + chr(max(c, 0)) + base[j + 1:]))
+                           if 0 <= c < 0x110000]
+            case "equals" if isinstance(other, str):
+                values += [other, other + "a"]
+            case "startsWith" if isinstance(other, str):
+                values += [other + string_obj, ""]
+                if other and string_obj.startswith(other):
+                    values.append(chr(ord(string_obj[0]) ^ 1) + string_obj[1:])
+            case "parseInt":
+                values += [str(n) for n in linear_roots(lambda n: distance_with(str(n)))] + ["a"]
+    return values
+
+
+def satisfied_prefix(constraints, wanted, inputs):
+    """Number of leading constraints that hold as wanted, the ones that can't be decided are assumed to"""
+    for k, (constraint, want) in enumerate(zip(constraints, wanted)):
+        try:
+            if holds(constraint, inputs) != want:
+                return k
+        except Unsolvable:
+            if k == len(constraints) - 1:
+                return k
+    return len(constraints)
+
+
+def solve(constraints, wanted, inputs, parameters):
+    """Inputs near the given ones for which constraint k holds as wanted[k], None if none was found.
+
+    Repairs the first violated constraint by changing one parameter at a time: integers and
+    chars by solving the comparison as linear, strings by fitting their length, a char, or an
+    equals/startsWith operand, keeping the earlier constraints satisfied."""
+    current = tuple(inputs)
+    for _ in range(MAX_REPAIRS):
+        k = satisfied_prefix(constraints, wanted, current)
+        if k == len(constraints):
+            return current
+
+        best, best_k = None, k
+        for i in constraint_params(constraints[k]):
+            type_name, is_array = parameters[i]["type"]
+            if is_array or i >= len(current):
+                continue
+            for value in candidate_values(constraints[k], current, i, type_name):
+                if value == current[i] or (type_name == "chr" and (value is None or len(value) != 1)):
+                    continue
+                candidate = current[:i] + (value,) + current[i + 1:]
+                candidate_k = satisfied_prefix(constraints, wanted, candidate)
+                if candidate_k > best_k:
+                    best, best_k = candidate, candidate_k
+        if best is None:
+            return None
+        current = best
+    return current if satisfied_prefix(constraints, wanted, current) == len(constraints) else None
+
+
+def explore(method, seeds, max_runs=MAX_CONCOLIC_RUNS, use_rope=True):
+    """Concolic exploration: runs the seeds, then inputs solved to take the direction
+    not taken yet of a branch or implicit check on a path already run.
+
+    Yields (inputs, (result, pc set)) for every run, at most max_runs."""
+    worklist = list(seeds)
+    seen = set()
+    taken_branches = set()
+    attempts = {}
+    runs = 0
+
+    while worklist and runs < max_runs:
+        inputs = tuple(worklist.pop(0))
+        if inputs in seen:
+            continue
+        seen.add(inputs)
+
+        trace = []
+        outcome = interpreter.run_test_case(method.bytecodes, inputs, method.parameters, use_rope, trace)
+        runs += 1
+        yield inputs, outcome
+
+        try:
+            constraints = path_constraints(method.bytecodes, inputs, trace)
+        except bytecode_compiler.Unsupported:
+            continue
+        taken_branches.update((branch, taken) for branch, taken, constraint in constraints)
+
+        for k, (branch, taken, constraint) in enumerate(constraints):
+            flipped = (branch, not taken)
+            if flipped in taken_branches or attempts.get(flipped, 0) >= MAX_FLIP_ATTEMPTS:
+                continue
+            attempts[flipped] = attempts.get(flipped, 0) + 1
+            wanted = [entry[1] for entry in constraints[:k]] + [not taken]
+            solution = solve([entry[2] for entry in constraints[:k + 1]], wanted, inputs, method.parameters)
+            if solution is not None and solution not in seen:
+                worklist.append(solution)
@@ -0,0 +1,86 @@
+import os
+import pickle
+
+from analyzers import result_store
+
+EXECUTION_CACHE_PATH = ".jsa_cache/executions.pkl"
+
+
+def hashable_inputs(values):
+    """Inputs as a cache key, array parameters become tuples"""
+    return tuple(hashable_inputs(value) if isinstance(value, (list, tuple)) else value for value in values)
+
+
+class ExecutionCache(object):
+    """Concrete (result, pc set) of each input a method was run with.
+
+    Keyed by the method's bytecode fingerprint and the input tuple, so the case
+    tests, the fuzzer and static_analyzer never run the same input twice.
+    """
+
+    def __init__(self, path=EXECUTION_CACHE_PATH):
+        self.path = path
+        self.methods = {}  # fingerprint -> {inputs: (result, frozenset of pcs)}
+        self.fingerprints = {}  # id(bytecodes) -> (bytecodes, fingerprint)
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    self.methods = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+                self.methods = {}
+
+    def __len__(self):
+        return sum(len(executions) for executions in self.methods.values())
+
+    def executions(self, bytecodes):
+        known = self.fingerprints.get(id(bytecodes))
+        if known is None or known[0] is not bytecodes:
+            known = (bytecodes, result_store.method_fingerprint(bytecodes))
+            self.fingerprints[id(bytecodes)] = known
+        return self.methods.setdefault(known[1], {})
+
+    def get(self, bytecodes, inputs):
+        """(result, pc set) of a previous run, None if the input was not run yet"""
+        outcome = self.executions(bytecodes).get(hashable_inputs(inputs))
+        if outcome is None:
+            return None
+        self.hits += 1
+        return outcome[0], set(outcome[1])
+
+    def put(self, bytecodes, inputs, result, pc_set):
+        self.executions(bytecodes)[hashable_inputs(inputs)] = (result, frozenset(pc_set))
+        self.misses += 1
+        self.dirty = True
+
+    def run(self, bytecodes, inputs, execute):
+        """(result, pc set) of the input, calling execute(inputs) only if it was not run yet"""
+        outcome = self.get(bytecodes, inputs)
+        if outcome is None:
+            outcome = execute(inputs)
+            self.put(bytecodes, inputs, *outcome)
+        return outcome
+
+    def run_test_case(self, bytecodes, case_parameters, method_parameters, use_rope=False):
+        """Cached interpreter.run_test_case"""
+        from analyzers import interpreter
+
+        return self.run(bytecodes, case_parameters,
+                        lambda inputs: interpreter.run_test_case(bytecodes, inputs, method_parameters, use_rope))
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = "{}.tmp".format(self.path)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.methods, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,125 @@
+import json
+import os
+
+CORPUS_DIR = ".jsa_cache/corpus"
+
+PARAMETER_TYPES = {
+    "int": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "bool": lambda value: isinstance(value, bool),
+    "chr": lambda value: isinstance(value, str),
+    "str": lambda value: value is None or isinstance(value, str),
+}
+
+
+def to_inputs(values):
+    """JSON lists back to the tuples the fuzzer generates"""
+    return tuple(to_inputs(value) if isinstance(value, list) else value for value in values)
+
+
+def input_size(inputs):
+    return len(json.dumps(inputs))
+
+
+def matches_parameters(inputs, parameters):
+    """True if a stored input still fits the method's parameters"""
+    if len(inputs) != len(parameters):
+        return False
+    for value, parameter in zip(inputs, parameters):
+        type_name, is_array = parameter["type"]
+        check = PARAMETER_TYPES.get(type_name, lambda value: False)
+        if is_array:
+            if not isinstance(value, tuple) or not all(check(v) for v in value):
+                return False
+        elif not check(value):
+            return False
+    return True
+
+
+class FuzzCorpus(object):
+    """Inputs that increased coverage or raised an error, per method of one case file.
+
+    Saved as JSON so the corpus can be read and edited by hand. The inputs are
+    run first by the next fuzzing run of the method.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.methods = {}  # method name -> [{"inputs": [...], "result": str, "pcs": [...]}]
+        self.dirty = False
+
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.methods = json.load(f)
+            except (OSError, ValueError):
+                self.methods = {}
+
+    @staticmethod
+    def for_case(case_name, directory=CORPUS_DIR):
+        return FuzzCorpus(None if directory is None else os.path.join(directory, "{}.json".format(case_name)))
+
+    def seeds(self, method):
+        """Stored inputs of the method that still match its parameters"""
+        seeds = []
+        for entry in self.methods.get(method.name, []):
+            inputs = to_inputs(entry["inputs"])
+            if matches_parameters(inputs, method.parameters):
+                seeds.append(inputs)
+        return seeds
+
+    def add(self, method, inputs, result, pc_set):
+        entries = self.methods.setdefault(method.name, [])
+        stored = json.loads(json.dumps(inputs))
+        for entry in entries:
+            if entry["inputs"] == stored:
+                entry["result"] = result
+                entry["pcs"] = sorted(pc_set)
+                self.dirty = True
+                return
+        entries.append({"inputs": stored, "result": result, "pcs": sorted(pc_set)})
+        self.dirty = True
+
+    def minimize(self, method):
+        """Keep the smallest input of each error result, then greedily the fewest inputs covering every stored pc"""
+        entries = self.methods.get(method.name, [])
+        entries = sorted(entries, key=lambda entry: input_size(entry["inputs"]))
+
+        kept = []
+        errors = set()
+        for entry in entries:
+            if entry["result"] != "ok" and entry["result"] not in errors:
+                errors.add(entry["result"])
+                kept.append(entry)
+
+        covered = set()
+        for entry in kept:
+            covered |= set(entry["pcs"])
+        all_pcs = set()
+        for entry in entries:
+            all_pcs |= set(entry["pcs"])
+
+        candidates = [entry for entry in entries if entry not in kept]
+        while covered != all_pcs:
+            best = max(candidates, key=lambda entry: len(set(entry["pcs"]) - covered))
+            kept.append(best)
+            candidates.remove(best)
+            covered |= set(best["pcs"])
+
+        if len(kept) != len(self.methods.get(method.name, [])):
+            self.dirty = True
+        self.methods[method.name] = kept
+        return kept
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = "{}.tmp".format(self.path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.methods, f, indent=1)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
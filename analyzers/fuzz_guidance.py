@@ -0,0 +1,98 @@
+import itertools
+
+from analyzers import abstractInterpreter as abs_interp
+from analyzers import bytecode_compiler
+from analyzers.intervalInt import IntervalInt
+from analyzers.string_adapter import StringOperations
+
+# inputs built from the abstract bounds, run before the enumerated literal combinations
+MAX_GUIDED_INPUTS = 256
+# strings are generated for length bounds up to this
+MAX_GUIDED_LENGTH = 64
+
+ANALYZER_TYPES = {"str": "String", "int": "int", "bool": "boolean"}
+
+
+def bound_values(value):
+    """Integers at and next to the finite bounds of an interval"""
+    values = []
+    if isinstance(value, IntervalInt) and not value.is_bottom():
+        for bound in [value.low, value.high]:
+            if bound not in [float("inf"), float("-inf")]:
+                values += [int(bound) - 1, int(bound), int(bound) + 1]
+    return values
+
+
+def string_lengths(value):
+    if isinstance(value, IntervalInt):
+        lengths = bound_values(value)
+    else:
+        min_len, max_len = StringOperations.length(value)
+        lengths = [min_len, min_len + 1, max_len]
+    return [length for length in lengths if 0 <= length <= MAX_GUIDED_LENGTH]
+
+
+def add_new(values, new_values):
+    for value in new_values:
+        if value not in values:
+            values.append(value)
+
+
+class FuzzGuidance(object):
+    """What an interval/string abstract interpretation of a method tells the fuzzer.
+
+    error_pcs are the instruction indexes where an error is possible and unreachable
+    the ones proven unreachable, empty unless the analysis converged. inputs() are
+    built from the bounds of the abstract values at the error pcs, then at the branches.
+    """
+
+    def __init__(self, method, init_values, max_iterations=1000):
+        self.method = method
+        self.init_values = init_values
+        instructions = method.bytecodes[1]
+        index_of = {instruction[0]: i for i, instruction in enumerate(instructions)}
+
+        analyzer = abs_interp.AbstractInterpreter(method.bytecodes, use_interval=True, use_widening=True,
+                                                  use_string=True, string_abstraction_type='integrated')
+        analyzer.analyze(len(method.parameters), [ANALYZER_TYPES.get(p["type"][0], "int") for p in method.parameters],
+                         max_iterations)
+
+        self.error_pcs = sorted({index_of[pc] for pc, _ in analyzer.errors if pc in index_of})
+        self.unreachable = set()
+        if analyzer.converged:
+            self.unreachable = {i for i, instruction in enumerate(instructions) if instruction[0] not in analyzer.pc_set}
+
+        branch_pcs = [i for i, instruction in enumerate(instructions)
+                      if instruction[1] in bytecode_compiler.JUMP_OPCODES and instruction[1] != "goto"]
+        self.values = [[] for _ in method.parameters]
+        for i in self.error_pcs + [i for i in branch_pcs if i not in self.error_pcs]:
+            state = analyzer.state_set.get_state(instructions[i][0])
+            if state is not None:
+                self.add_bounds(state, i in self.error_pcs)
+
+    def add_bounds(self, state, is_error):
+        operands = [value for value in state.frame.stack if isinstance(value, IntervalInt)]
+        for p, parameter in enumerate(self.method.parameters):
+            type_name, is_array = parameter["type"]
+            if is_array:
+                continue
+            value = state.frame.locals.get(p)
+            if type_name == "int":
+                # the operands a branch compares with, or an error depends on, are worth trying too
+                add_new(self.values[p], bound_values(value) + [v for operand in operands for v in bound_values(operand)])
+            elif type_name == "str" and value is not None and not isinstance(value, IntervalInt):
+                lengths = string_lengths(value)
+                if is_error:
+                    # e.g. the index of a charAt that may be out of bounds
+                    lengths += [length for operand in operands for length in string_lengths(operand)]
+                add_new(self.values[p], ["a" * length for length in lengths])
+
+    def inputs(self, max_inputs=MAX_GUIDED_INPUTS):
+        """Each guided value with the other parameters at their initial value, then their combinations"""
+        inputs = []
+        for p, values in enumerate(self.values):
+            for value in values:
+                inputs.append(self.init_values[:p] + (value,) + self.init_values[p + 1:])
+        choices = [[init] + values for init, values in zip(self.init_values, self.values)]
+        inputs += itertools.islice(itertools.product(*choices), max_inputs)
+        return inputs[:max_inputs]
@@ -0,0 +1,112 @@
+import hashlib
+import math
+from array import array
+
+HISTORY_KINDS = ["exact", "hashed", "bloom", "none"]
+# a bloom filter is sized for at most this many inputs, a fuller filter exceeds its false positive rate
+BLOOM_MAX_CAPACITY = 10 ** 7
+
+
+def input_digest(inputs, size=8):
+    return hashlib.blake2b(repr(inputs).encode("utf-8"), digest_size=size).digest()
+
+
+class ExactHistory(object):
+    """Every input tuple, as the fuzzer originally kept them"""
+
+    def __init__(self):
+        self.items = set()
+
+    def add(self, inputs):
+        """True if inputs was not added before"""
+        if inputs in self.items:
+            return False
+        self.items.add(inputs)
+        return True
+
+
+class HashedHistory(object):
+    """64-bit hashes of the inputs in an open-addressing array, 8 bytes per input.
+
+    Two different inputs are taken for the same with probability about n^2 / 2^65."""
+
+    def __init__(self, capacity=1024):
+        size = 1
+        while size < capacity * 2:
+            size *= 2
+        self.table = array("Q", bytes(8 * size))
+        self.count = 0
+
+    def add(self, inputs):
+        # 0 marks an empty slot
+        value = int.from_bytes(input_digest(inputs), "little") or 1
+        if not self._insert(value):
+            return False
+        self.count += 1
+        if self.count * 2 > len(self.table):
+            self._grow()
+        return True
+
+    def _insert(self, value):
+        mask = len(self.table) - 1
+        slot = value & mask
+        while True:
+            stored = self.table[slot]
+            if stored == value:
+                return False
+            if stored == 0:
+                self.table[slot] = value
+                return True
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        old_table = self.table
+        self.table = array("Q", bytes(16 * len(old_table)))
+        for value in old_table:
+            if value != 0:
+                self._insert(value)
+
+
+class BloomHistory(object):
+    """Bloom filter over the inputs. Some new inputs are skipped as already run,
+    with the given false positive rate while at most capacity inputs were added."""
+
+    def __init__(self, capacity, false_positive_rate=0.001):
+        capacity = max(1, min(capacity, BLOOM_MAX_CAPACITY))
+        self.bit_count = max(8, int(math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+
+    def add(self, inputs):
+        digest = input_digest(inputs, 16)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        is_new = False
+        for i in range(self.hash_count):
+            bit = (h1 + i * h2) % self.bit_count
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                is_new = True
+        return is_new
+
+
+class NoHistory(object):
+    """No deduplication, for enumerators that never repeat an input"""
+
+    def add(self, inputs):
+        return True
+
+
+def make_history(kind, capacity, false_positive_rate=0.001):
+    match kind:
+        case "exact":
+            return ExactHistory()
+        case "hashed":
+            return HashedHistory(min(capacity, 1 << 16))
+        case "bloom":
+            return BloomHistory(capacity, false_positive_rate)
+        case "none":
+            return NoHistory()
+        case others:
+            raise NotImplementedError("Don't know how to keep history: {}".format(others))
@@ -1,19 +1,72 @@
-from analyzers import syntaxer
 from analyzers import interpreter
+from analyzers import bytecode_compiler
+from analyzers import batch_executor
+from analyzers import fuzz_history
+from analyzers import concolic as concolic_module
 
-import itertools
+import sys
+import time
+
+class ProductSequence(object):
+    """Lazy itertools.product(values, repeat=n) for n = 1..max_length, in that order.
+
+    Items are decoded from their index (mixed radix), so nothing is stored
+    besides the values. Lengths above sys.maxsize are capped."""
+
+    def __init__(self, values, max_length=None, join=False):
+        self.values = values
+        self.max_length = len(values) if max_length is None else min(max_length, len(values))
+        self.join = join
+
+        base = len(values)
+        if base <= 1:
+            self.size = self.max_length * base
+        else:
+            self.size = 0
+            block = 1
+            for _ in range(self.max_length):
+                block *= base
+                self.size += block
+                if self.size >= sys.maxsize:
+                    self.size = sys.maxsize
+                    break
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if index < 0 or index >= self.size:
+            raise IndexError(index)
+
+        base = len(self.values)
+        length = 1
+        block = base
+        while index >= block:
+            index -= block
+            length += 1
+            block *= base
+
+        item = []
+        for _ in range(length):
+            item.append(self.values[index % base])
+            index //= base
+        item.reverse()
+        return "".join(item) if self.join else tuple(item)
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
 
 class ParamLoader(object):
 
-    def __init__(self,params, values):
+    def __init__(self,params, values, max_length = None, max_combinations = None):
+        """max_length bounds the number of literals joined into a string or an array,
+        max_combinations the number of inputs; None keeps every combination."""
         def generate_list(value_list):
-            full_list = []
-            for i in range(len(value_list)):
-                full_list += itertools.product(value_list,repeat=i+1)
-            return full_list
+            return ProductSequence(value_list, max_length)
 
         def generate_str(str_list):
-            return ["".join(group) for group in generate_list(str_list)]
+            return ProductSequence(str_list, max_length, join=True)
 
         def generate_int(int_list):
             full_list = set(int_list)
@@ -36,12 +89,11 @@ class ParamLoader(object):
 
             self.values[p["name"]] = value_list
 
-        self.param_indexes = []
         init_values = []
         self.now_index = 0
+        self.max_combinations = max_combinations
         self.total = None
         for i,param_info in enumerate(self.params):
-            self.param_indexes.append(0)
             match param_info["type"][0]:
                 case "int":
                     init_values.append(0)
@@ -61,65 +113,156 @@ class ParamLoader(object):
 
         self.total = int(len(self.params)>0)
         for param_info in self.params:
-            self.total *= len(self.values[param_info["name"]])
+            self.total = min(self.total * len(self.values[param_info["name"]]), sys.maxsize)
+        if self.max_combinations is not None:
+            self.total = min(self.total, self.max_combinations)
         return self.total
 
-    def has_next(self):
-        return self.now_index < len(self)
-
-    def next(self):
-
-        def next_state(now_state,index=0):
-            next_value = now_state[index] + 1
-            if next_value == len(self.values[self.params[index]["name"]]) and index + 1 < len(now_state):
-                now_state[index] = 0
-                next_state(now_state, index + 1)
-            else:
-                now_state[index] = next_value
-                self.now_index += 1
+    def __getitem__(self, index):
+        """Input number index: mixed radix over the parameters' values, the first parameter changing fastest"""
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
 
         param_values = []
-
-        for i,param_info in enumerate(self.params):
-            value = self.values[param_info["name"]][self.param_indexes[i]]
-            param_values.append(value)
-
-        next_state(self.param_indexes)
-
+        for param_info in self.params:
+            value_list = self.values[param_info["name"]]
+            param_values.append(value_list[index % len(value_list)])
+            index //= len(value_list)
         return tuple(param_values)
 
-def coverage_guided_fuzzing(method,tab = "\t"):
+    def has_next(self):
+        return self.now_index < len(self)
+
+    def next(self):
+        param_values = self[self.now_index]
+        self.now_index += 1
+        return param_values
+
+def coverage_guided_fuzzing(method,tab = "\t",execution_cache = None,
+                            max_executions = None,max_seconds = None,stop_on_full_coverage = False,plateau = None,
+                            corpus = None,findings = None,max_length = None,max_combinations = None,
+                            history = "hashed",history_fp_rate = 0.001,concolic = False,guided = False):
+    """Run generated inputs until they are exhausted or a budget is reached:
+    max_executions inputs, max_seconds of wall-clock time, full coverage (stop_on_full_coverage),
+    or plateau consecutive inputs without new coverage. None/False disables a budget.
+    max_length and max_combinations bound the generated input space, see ParamLoader.
+    history picks how already run inputs are skipped, see fuzz_history.HISTORY_KINDS.
+    With a corpus, its inputs for the method run first, and inputs that add coverage or
+    raise a new error are added to it. findings, if given, maps each error result to the first
+    input that raised it. With concolic, the first inputs are solved to flip branches not
+    taken yet (see concolic.explore) before the literal combinations are enumerated.
+    With guided, an abstract interpretation of the method runs first: inputs at the bounds of
+    its intervals at possible errors and branches come next after the corpus, and instructions
+    it proves unreachable are not counted when checking for full coverage."""
     param_values, array_values = method.parameter_filter(method.ast_values | method.get_bytecode_values())
 
-    param_loader = ParamLoader(method.parameters, param_values)
+    param_loader = ParamLoader(method.parameters, param_values, max_length, max_combinations)
+
+    # hot methods run in numpy batches (int/bool only) or as generated Python, otherwise in the interpreter
+    batch = None
+    compiled = None
+    if len(param_loader) >= bytecode_compiler.HOT_METHOD_THRESHOLD:
+        if batch_executor.supports(method):
+            batch = batch_executor.BatchExecutor(method.bytecodes)
+        else:
+            compiled = bytecode_compiler.compile_method(method.bytecodes)
+
+    seeds = [] if corpus is None else corpus.seeds(method)
+    reachable = set(range(len(method.bytecodes[1])))
+    if guided:
+        from analyzers import fuzz_guidance
+
+        guidance = fuzz_guidance.FuzzGuidance(method, param_loader.init_values)
+        guided_inputs = guidance.inputs()
+        # run right after the corpus, like seeds
+        seeds = seeds + guided_inputs
+        reachable -= guidance.unreachable
+        print("{}[Guidance]: {} possible error instructions | {} unreachable instructions | {} guided inputs".format(
+            tab, len(guidance.error_pcs), len(guidance.unreachable), len(guided_inputs)))
+    histories = fuzz_history.make_history(history, len(param_loader) + 1 + len(seeds), history_fp_rate)
+
+    def new_inputs():
+        for case_parameters in seeds:
+            if histories.add(case_parameters):
+                yield case_parameters
+
+        need_init = True
+        while (param_loader.has_next() or need_init):
+            if need_init:
+                need_init = False
+                case_parameters = param_loader.init_values
+            else:
+                case_parameters = param_loader.next()
+
+            if histories.add(case_parameters):
+                yield case_parameters
+
+    def run_inputs(inputs):
+        if len(inputs) == 0:
+            return []
+        if batch is not None:
+            return batch.run_test_cases(inputs)
+        if compiled is not None:
+            return [compiled.run_test_case(case_parameters, use_rope=True) for case_parameters in inputs]
+        return [interpreter.run_test_case(
+            method.bytecodes,
+            case_parameters,
+            method.parameters,
+            use_rope=True
+        ) for case_parameters in inputs]
+
+    def run_chunk(chunk):
+        if execution_cache is None:
+            yield from zip(chunk, run_inputs(chunk))
+            return
+
+        # inputs already run by the case tests or an earlier fuzzing run are not run again
+        outcomes = [execution_cache.get(method.bytecodes, case_parameters) for case_parameters in chunk]
+        fresh = iter(run_inputs([case_parameters for case_parameters, outcome in zip(chunk, outcomes) if outcome is None]))
+        for case_parameters, outcome in zip(chunk, outcomes):
+            if outcome is None:
+                outcome = next(fresh)
+                execution_cache.put(method.bytecodes, case_parameters, *outcome)
+            yield case_parameters, outcome
+
+    concolic_runs = 0
+
+    def executions():
+        nonlocal concolic_runs
+        if concolic:
+            for case_parameters, outcome in concolic_module.explore(method, seeds + [param_loader.init_values]):
+                concolic_runs += 1
+                histories.add(case_parameters)
+                # concolic runs need the branch trace, so they bypass the cache lookup
+                if execution_cache is not None:
+                    execution_cache.put(method.bytecodes, case_parameters, *outcome)
+                yield case_parameters, outcome
+
+        chunk_size = batch_executor.BATCH_SIZE if batch is not None else 1
+        chunk = []
+        for case_parameters in new_inputs():
+            chunk.append(case_parameters)
+            if len(chunk) == chunk_size:
+                yield from run_chunk(chunk)
+                chunk = []
+        yield from run_chunk(chunk)
 
-    need_init = True
     total_pc_set = set()
     total_coverage = 0
 
     interest = []
-    histories = set()
 
     results = {"ok":0}
 
-    while (param_loader.has_next() or need_init):
-        if need_init:
-            need_init = False
-            case_parameters = param_loader.init_values
-        else:
-            case_parameters = param_loader.next()
-
-        if case_parameters in histories:
-            continue
-        else:
-            histories.add(case_parameters)
-
-        case_result, pc_set = interpreter.run_test_case(
-            method.bytecodes,
-            case_parameters,
-            method.parameters
-        )
+    seen_errors = set()
+    start_time = time.monotonic()
+    tried = 0
+    since_new_coverage = 0
+    stop_reason = None
 
+    for case_parameters, (case_result, pc_set) in executions():
+        tried += 1
+        since_new_coverage += 1
         if case_result not in results:
             results[case_result] = 0
         results[case_result] += 1
@@ -128,8 +271,17 @@ def coverage_guided_fuzzing(method,tab = "\t"):
         total_pc_set |= pc_set
         new_total_coverage = len(total_pc_set) / len(method.bytecodes[1])
 
+        if corpus is not None and (new_total_coverage > total_coverage or
+                                   (case_result != "ok" and case_result not in seen_errors)):
+            corpus.add(method, case_parameters, case_result, pc_set)
+        if case_result != "ok" and case_result not in seen_errors:
+            seen_errors.add(case_result)
+            if findings is not None:
+                findings[case_result] = case_parameters
+
         if new_total_coverage > total_coverage:
             total_coverage = new_total_coverage
+            since_new_coverage = 0
 
             for i in range(len(case_parameters)):
                 if i >= len(interest):
@@ -143,9 +295,31 @@ def coverage_guided_fuzzing(method,tab = "\t"):
                 ", ".join(str(param) if type(param).__name__ != "str" else "'{}'".format(param) for param in case_parameters),
                 case_result))
 
+        if stop_on_full_coverage and reachable <= total_pc_set:
+            stop_reason = "full coverage" if len(reachable) == len(method.bytecodes[1]) else "full coverage of reachable instructions"
+        elif plateau is not None and since_new_coverage >= plateau:
+            stop_reason = "no new coverage in {} inputs".format(plateau)
+        elif max_executions is not None and tried >= max_executions:
+            stop_reason = "execution limit"
+        elif max_seconds is not None and time.monotonic() - start_time >= max_seconds:
+            stop_reason = "time limit"
+        if stop_reason is not None:
+            break
+
+    if corpus is not None:
+        corpus.minimize(method)
+
+    if stop_reason is not None:
+        # the seeds, concolic runs and init values come first, duplicates are skipped so this is an upper bound
+        space = len(param_loader) + 1 + len(seeds) + concolic_runs
+        print("{}[Stopped]: {} after {} inputs | at most {} of {} inputs not run ({:.1f}%)".format(
+            tab, stop_reason, tried, max(space - tried, 0), space, max(space - tried, 0) / space * 100))
+
     return interest, total_pc_set, results
 
 if __name__ == '__main__':
+    from analyzers import syntaxer
+
     methods = syntaxer.get_simplify_ast("Strings")
 
     for method in methods:
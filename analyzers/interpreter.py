@@ -1,9 +1,325 @@
-from dataclasses import dataclass
-from pathlib import Path
-import sys
+import functools
+import re
+from collections import OrderedDict
 
-def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
+
+class StringBuilderModel(object):
+    """java.lang.StringBuilder: appends go to a list of chunks that is joined only when needed.
+
+    Supported: the (), (String), (CharSequence) and (int) constructors, append, toString,
+    length, charAt, reverse, insert and setLength. Other methods give the "*" result."""
+
+    def __init__(self, value=""):
+        self.chunks = [value] if value else []
+        self.size = len(value)
+
+    def flatten(self):
+        if len(self.chunks) > 1:
+            self.chunks = ["".join(self.chunks)]
+        return self.chunks[0] if self.chunks else ""
+
+    def append(self, text):
+        if text:
+            self.chunks.append(text)
+            self.size += len(text)
+        return self
+
+    def length(self):
+        return self.size
+
+    def char_at(self, index):
+        return self.flatten()[index]
+
+    def reverse(self):
+        value = self.flatten()[::-1]
+        self.chunks = [value] if value else []
+        return self
+
+    def insert(self, offset, text):
+        value = self.flatten()
+        return self._reset(value[:offset] + text + value[offset:])
+
+    def set_length(self, new_length):
+        value = self.flatten()
+        if new_length <= len(value):
+            return self._reset(value[:new_length])
+        return self.append("\0" * (new_length - len(value)))
+
+    def _reset(self, value):
+        self.chunks = [value] if value else []
+        self.size = len(value)
+        return self
+
+    def __str__(self):
+        return self.flatten()
+
+    def __repr__(self):
+        return "StringBuilderModel({!r})".format(self.flatten())
+
+
+class RopeString(object):
+    """Concatenation of strings that is only joined when its characters are needed"""
+
+    __slots__ = ("parts", "size", "flat")
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.size = sum(len(part) for part in parts)
+        self.flat = None
+
+    def flatten(self):
+        if self.flat is not None:
+            return self.flat
+
+        # iterative walk, loops build ropes far deeper than the recursion limit
+        pieces = []
+        todo = [self]
+        while todo:
+            part = todo.pop()
+            if isinstance(part, str):
+                pieces.append(part)
+            elif part.flat is not None:
+                pieces.append(part.flat)
+            else:
+                todo.extend(reversed(part.parts))
+        self.flat = "".join(pieces)
+        self.parts = (self.flat,)
+        return self.flat
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return self.flatten()
+
+    def __repr__(self):
+        return "RopeString({!r})".format(self.flatten())
+
+
+def concat_strings(parts, use_rope):
+    if not use_rope:
+        return "".join(str(part) for part in parts)
+    parts = tuple(part if isinstance(part, RopeString) else str(part) for part in parts)
+    parts = tuple(part for part in parts if len(part) > 0)
+    if len(parts) == 0:
+        return ""
+    if len(parts) == 1 and isinstance(parts[0], str):
+        return parts[0]
+    return RopeString(parts)
+
+
+def flatten_ropes(stack):
+    for i, value in enumerate(stack):
+        if isinstance(value, RopeString):
+            stack[i] = value.flatten()
+
+
+def char_value(value):
+    """charAt pushes a one character string, if_icmp compares it as its char code"""
+    if isinstance(value, str) and len(value) == 1:
+        return ord(value)
+    return value
+
+
+def java_int(value):
+    """An int result wrapped to the int32 range, as Java arithmetic overflows"""
+    if isinstance(value, int) and not -2 ** 31 <= value < 2 ** 31:
+        return (value + 2 ** 31) % 2 ** 32 - 2 ** 31
+    return value
+
+
+def java_div(a, b):
+    """idiv: truncates toward zero, Integer.MIN_VALUE / -1 wraps"""
+    quotient = abs(a) // abs(b)
+    return java_int(-quotient if (a < 0) != (b < 0) else quotient)
+
+
+def java_rem(a, b):
+    """irem: the remainder has the sign of the dividend"""
+    return java_int(a - java_div(a, b) * b)
+
+
+# POSIX character classes of java.util.regex.Pattern, as the contents of a Python character class
+JAVA_REGEX_CLASSES = {
+    "Lower": "a-z",
+    "Upper": "A-Z",
+    "ASCII": "\\x00-\\x7F",
+    "Alpha": "a-zA-Z",
+    "Digit": "0-9",
+    "Alnum": "a-zA-Z0-9",
+    "Punct": re.escape("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~"),
+    "Graph": "\\x21-\\x7E",
+    "Print": "\\x20-\\x7E",
+    "Blank": " \\t",
+    "Cntrl": "\\x00-\\x1F\\x7F",
+    "XDigit": "0-9a-fA-F",
+    "Space": " \\t\\n\\x0B\\f\\r",
+}
+
+
+def translate_java_regex(regex):
+    """Rewrite the Java-only regex syntax (\\p{...} classes, \\Q...\\E quoting, \\z) for the re module"""
+    out = []
+    in_class = False
+    i = 0
+    while i < len(regex):
+        c = regex[i]
+        if c == "\\" and i + 1 < len(regex):
+            n = regex[i + 1]
+            if n in "pP" and regex.startswith("{", i + 2) and "}" in regex[i + 3:]:
+                end = regex.index("}", i + 3)
+                name = regex[i + 3:end]
+                name = name[2:] if name.startswith("Is") else name
+                if name not in JAVA_REGEX_CLASSES:
+                    raise re.error("unknown class: {}".format(name))
+                if in_class and n == "p":
+                    out.append(JAVA_REGEX_CLASSES[name])
+                elif in_class:
+                    raise re.error("negated class inside a class: {}".format(name))
+                else:
+                    out.append("[{}{}]".format("^" if n == "P" else "", JAVA_REGEX_CLASSES[name]))
+                i = end + 1
+                continue
+            if n == "Q":
+                end = regex.find("\\E", i + 2)
+                end = len(regex) if end < 0 else end
+                out.append(re.escape(regex[i + 2:end]))
+                i = end + 2
+                continue
+            out.append("\\Z" if n == "z" else c + n)
+            i += 2
+            continue
+        if c == "[" and not in_class:
+            in_class = True
+            out.append(c)
+            # a leading ] or ^] is a literal
+            if regex.startswith("^", i + 1):
+                out.append("^")
+                i += 1
+            if regex.startswith("]", i + 1):
+                out.append("\\]")
+                i += 1
+        elif c == "]" and in_class:
+            in_class = False
+            out.append(c)
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_java_regex(regex):
+    """Compiled pattern for the regex argument of String.matches, None if Python cannot compile it"""
+    try:
+        return re.compile(translate_java_regex(bytes(regex, "utf-8").decode("unicode_escape")))
+    except (re.error, UnicodeError, ValueError):
+        return None
+
+
+# least recently prepared methods are dropped past this many, like the compiled regexes
+MAX_PREPARED_METHODS = 256
+_prepared_methods = OrderedDict()  # id(instructions) -> (instructions, regexes)
+
+def prepare_method(instructions):
+    """Per-method work done once instead of on every execution: regexes of String.matches loaded by ldc.
+
+    Maps the pc of the call to (regex, compiled pattern). Another path may reach the call with
+    a different regex on the stack, so the pattern is only valid for an equal popped regex."""
+    prepared = _prepared_methods.get(id(instructions))
+    if prepared is not None and prepared[0] is instructions:
+        _prepared_methods.move_to_end(id(instructions))
+        return prepared[1]
+
+    regexes = {}
+    for pc in range(1, len(instructions)):
+        instruction = instructions[pc]
+        previous = instructions[pc - 1]
+        if instruction[1] == "invokevirtual" and "String.matches:" in str(instruction[2]) \
+                and previous[1] == "ldc" and isinstance(previous[2], tuple) and previous[2][0] == "str":
+            regex = str(previous[2][1])
+            regexes[pc] = (regex, compile_java_regex(regex))
+
+    _prepared_methods[id(instructions)] = (instructions, regexes)
+    _prepared_methods.move_to_end(id(instructions))
+    if len(_prepared_methods) > MAX_PREPARED_METHODS:
+        _prepared_methods.popitem(last=False)
+    return regexes
+
+
+def descriptor_parameters(method_desc):
+    """Parameter type codes of a method descriptor, e.g. 'I', 'C', 'Ljava/lang/String;', '[I'"""
+    params = method_desc.split("(", 1)[1].split(")", 1)[0]
+    return re.findall(r"\[*(?:L[^;]*;|[ZBCSIJFD])", params)
+
+
+def java_string_of(value, type_code):
+    """String.valueOf for a value popped from the stack with the given descriptor type"""
+    if type_code == "Z":
+        return "true" if value else "false"
+    if type_code == "C" and isinstance(value, int):
+        return chr(value)
+    if value is None:
+        return "null"
+    if value is True or value is False:
+        return "true" if value else "false"
+    return str(value)
+
+
+def invoke_string_builder(method_desc, stack):
+    """Run a StringBuilder method on the operand stack, returns an error result or None.
+
+    A method StringBuilderModel does not support gives "*", as the interpreter does for
+    whatever it can't run, instead of raising."""
+    name = method_desc.split(".", 1)[1].split(":", 1)[0].strip('"')
+    param_types = descriptor_parameters(method_desc)
+    call_args = [stack.pop() for _ in param_types][::-1]
+    builder = stack.pop()
+    if builder is None:
+        return "null pointer exception"
+    if not isinstance(builder, StringBuilderModel):
+        return "type error"
+
+    if name == "<init>":
+        # new/dup leave a second reference on the stack, which receives the initial value
+        if param_types == ["Ljava/lang/String;"] or param_types == ["Ljava/lang/CharSequence;"]:
+            if call_args[0] is None:
+                return "null pointer exception"
+            builder.append(str(call_args[0]))
+        elif param_types == ["I"] and call_args[0] < 0:
+            return "negative array size"
+        return None
+
+    if name == "append":
+        stack.append(builder.append(java_string_of(call_args[0], param_types[0])))
+    elif name == "toString":
+        stack.append(builder.flatten())
+    elif name == "length":
+        stack.append(builder.length())
+    elif name == "charAt":
+        index = call_args[0]
+        if index < 0 or index >= builder.length():
+            return "index out of bounds"
+        stack.append(builder.char_at(index))
+    elif name == "reverse":
+        stack.append(builder.reverse())
+    elif name == "insert":
+        offset = call_args[0]
+        if offset < 0 or offset > builder.length():
+            return "index out of bounds"
+        stack.append(builder.insert(offset, java_string_of(call_args[1], param_types[1])))
+    elif name == "setLength":
+        if call_args[0] < 0:
+            return "index out of bounds"
+        builder.set_length(call_args[0])
+    else:
+        return "*"
+    return None
+
+
+def run_bytecodes(bytecodes_tuple, input_values, pc_set=set(), use_rope=False, trace=None):
     modifiers, instructions = bytecodes_tuple
+    constant_regexes = prepare_method(instructions)
     
 
     locals_dict = {}
@@ -90,45 +406,62 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             
         elif opcode == "iadd":
             v2, v1 = stack.pop(), stack.pop()
-            stack.append(v1 + v2)
+            stack.append(java_int(v1 + v2))
             pc += 1
             
         elif opcode == "isub":
             v2, v1 = stack.pop(), stack.pop()
-            stack.append(v1 - v2)
+            stack.append(java_int(v1 - v2))
             pc += 1
             
         elif opcode == "imul":
             v2, v1 = stack.pop(), stack.pop()
-            stack.append(v1 * v2)
+            stack.append(java_int(v1 * v2))
             pc += 1
             
         elif opcode == "idiv":
             v2, v1 = stack.pop(), stack.pop()
             if v2 == 0:
                 return "divide by zero"
-            stack.append(v1 // v2)
+            stack.append(java_div(v1, v2))
+            pc += 1
+
+        elif opcode == "irem":
+            v2, v1 = stack.pop(), stack.pop()
+            if v2 == 0:
+                return "divide by zero"
+            stack.append(java_rem(v1, v2))
             pc += 1
 
         elif opcode == "iinc":
             # Increment local variable
             idx = int(args[0])
             const = int(args[1])
-            locals_dict[idx] = locals_dict.get(idx, 0) + const
+            locals_dict[idx] = java_int(locals_dict.get(idx, 0) + const)
             pc += 1
 
         elif opcode == "invokevirtual":
             # Handle virtual method calls (String methods, etc.)
             method_info = args[0]
             method_desc = str(method_info)
-            
+
+            # ropes keep their parts through length and concat, other methods need the characters
+            if use_rope and "String.length:" not in method_desc and "String.concat:" not in method_desc:
+                flatten_ropes(stack)
+
+            # StringBuilder methods, before the String checks below also match their names
+            if "java/lang/StringBuilder." in method_desc:
+                error = invoke_string_builder(method_info[1], stack)
+                if error is not None:
+                    return error
+
             # String.length()
-            if "length" in method_desc.lower():
+            elif "length" in method_desc.lower():
                 string_obj = stack.pop()
                 if string_obj is None:
                     return "null pointer exception"
                 # Type check - must be string
-                if not isinstance(string_obj, str):
+                if not isinstance(string_obj, (str, RopeString)):
                     return "type error"
                 stack.append(len(string_obj))
    
@@ -206,9 +539,9 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
                 string_obj = stack.pop()
                 if string_obj is None or other is None:
                     return "null pointer exception"
-                if not isinstance(string_obj, str):
+                if not isinstance(string_obj, (str, RopeString)):
                     return "type error"
-                stack.append(string_obj + str(other))
+                stack.append(concat_strings((string_obj, other), use_rope))
             
             # String.split(String)
             elif "split" in method_desc.lower():
@@ -285,17 +618,20 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             
             # String.matches(String) - for regex
             elif "matches" in method_desc.lower():
-                regex = bytes(stack.pop(), "utf-8").decode("unicode_escape")
+                regex = stack.pop()
                 string_obj = stack.pop()
                 if string_obj is None or regex is None:
                     return "null pointer exception"
                 if not isinstance(string_obj, str):
                     return "type error"
-                import re
-                try:
-                    stack.append(1 if re.fullmatch(regex, string_obj) else 0)
-                except:
+                if pc in constant_regexes and constant_regexes[pc][0] == regex:
+                    pattern = constant_regexes[pc][1]
+                else:
+                    pattern = compile_java_regex(regex)
+                if pattern is None:
                     stack.append(0)
+                else:
+                    stack.append(1 if pattern.fullmatch(string_obj) else 0)
             
             else:
                 #just pop the object and any args
@@ -308,6 +644,8 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             # Handle static method calls
             method_info = args[0]
             method_desc = str(method_info)
+            if use_rope:
+                flatten_ropes(stack)
             
             # Integer.parseInt(String)
             if "parseint" in method_desc.lower():
@@ -368,21 +706,21 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
                     if val is None:
                         if stack_idx < len(stack_values):
                             v = stack_values[stack_idx]
-                            result_parts.append("null" if v is None else str(v))
+                            result_parts.append("null" if v is None else v)
                             stack_idx += 1
                     else:
                         # This is a constant
                         result_parts.append(str(val))
                 
                 # Concatenate all parts
-                result = "".join(result_parts)
+                result = concat_strings(result_parts, use_rope)
                 stack.append(result)
             
             pc += 1
             
         elif opcode in ["if_icmpeq", "if_icmpne", "if_icmplt", "if_icmple", "if_icmpgt", "if_icmpge"]:
             target = int(args[0])
-            v2, v1 = stack.pop(), stack.pop()
+            v2, v1 = char_value(stack.pop()), char_value(stack.pop())
             
             should_jump = False
             if opcode == "if_icmpeq":
@@ -398,6 +736,8 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             elif opcode == "if_icmpge":
                 should_jump = (v1 >= v2)
             
+            if trace is not None:
+                trace.append((pc, should_jump))
             if should_jump:
                 for i, instr in enumerate(instructions):
                     if instr[0] == target:
@@ -409,6 +749,8 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
         elif opcode in ["if_acmpeq", "if_acmpne"]:
             # Reference comparison
             target = int(args[0])
+            if use_rope:
+                flatten_ropes(stack)
             v2, v1 = stack.pop(), stack.pop()
             
             should_jump = False
@@ -417,6 +759,8 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             elif opcode == "if_acmpne":
                 should_jump = (v1 != v2)
             
+            if trace is not None:
+                trace.append((pc, should_jump))
             if should_jump:
                 for i, instr in enumerate(instructions):
                     if instr[0] == target:
@@ -443,6 +787,8 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             elif opcode == "ifge":
                 should_jump = (v >= 0)
             
+            if trace is not None:
+                trace.append((pc, should_jump))
             if should_jump:
                 for i, instr in enumerate(instructions):
                     if instr[0] == target:
@@ -461,6 +807,8 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             elif opcode == "ifnonnull":
                 should_jump = (v is not None)
             
+            if trace is not None:
+                trace.append((pc, should_jump))
             if should_jump:
                 for i, instr in enumerate(instructions):
                     if instr[0] == target:
@@ -480,6 +828,10 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
             # check if AssertionError
             if "AssertionError" in str(args):
                 return "assertion error"
+            if "java/lang/StringBuilder." in str(args):
+                error = invoke_string_builder(args[0][1], stack)
+                if error is not None:
+                    return error
             pc += 1
             
         elif opcode == "new":
@@ -551,9 +903,9 @@ def run_bytecodes(bytecodes_tuple, input_values, pc_set=set()):
     return "*"
 
 
-def run_test_case(bytecodes, case_parameters, method_parameters):
+def run_test_case(bytecodes, case_parameters, method_parameters, use_rope=False, trace=None):
     input_values = case_parameters
     pc_set = set()
-    result = run_bytecodes(bytecodes, input_values,pc_set)
+    result = run_bytecodes(bytecodes, input_values,pc_set, use_rope, trace)
     return result, pc_set
 
@@ -100,6 +100,15 @@ class IntervalInt(object):
         
         return IntervalInt(new_low, new_high, exclude_zero=False)
     
+    def narrow(self, other):
+        """Descending step after widening: only the infinite bounds are replaced by the other's"""
+        if self.is_bottom() or other.is_bottom():
+            return other
+
+        new_low = other.low if self.low == float('-inf') else self.low
+        new_high = other.high if self.high == float('inf') else self.high
+        return IntervalInt(new_low, new_high, exclude_zero=self.exclude_zero and other.exclude_zero)
+    
     def __add__(self, other):
         if self.is_bottom() or other.is_bottom():
             return IntervalInt.bottom()
@@ -138,7 +147,11 @@ class IntervalInt(object):
             self.high / other.low,
             self.high / other.high
         ]
-        return IntervalInt(int(min(quotients)), int(max(quotients)))
+        # an infinite dividend and divisor give nan, infinite bounds stay infinite
+        if any(q != q for q in quotients):
+            return IntervalInt.top()
+        low, high = min(quotients), max(quotients)
+        return IntervalInt(low if low == float('-inf') else int(low), high if high == float('inf') else int(high))
     
     def __neg__(self):
         if self.is_bottom():
@@ -0,0 +1,130 @@
+import math
+import random
+import string
+import statistics
+
+from analyzers import bytecode_compiler
+from analyzers import interpreter
+
+# inputs are drawn and run in batches of this size between two stopping checks
+SAMPLE_BATCH = 100
+DEFAULT_OPTIONS = {
+    "confidence": 0.95,
+    "margin": 0.02,  # stop once every interval is at most this wide on each side
+    "max_samples": 20000,
+    "int_range": 100,  # ints are uniform in [-int_range, int_range]
+    "max_length": 8,  # strings and arrays have a uniform length in [0, max_length]
+    "null_rate": 0.05,  # probability of a null string
+    "alphabet": string.ascii_letters + string.digits + " ",
+    "seed": 0,
+}
+
+
+def wilson_interval(count, samples, z):
+    """Wilson score interval of a proportion, valid also for counts near 0 or samples"""
+    if samples == 0:
+        return 0.0, 1.0
+    p = count / samples
+    denominator = 1 + z * z / samples
+    center = (p + z * z / (2 * samples)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / samples + z * z / (4 * samples * samples)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+class InputSampler(object):
+    """Draws inputs of a method, each parameter from the distribution of its type"""
+
+    def __init__(self, parameters, options, rng):
+        self.parameters = parameters
+        self.options = options
+        self.rng = rng
+
+    def sample_value(self, type_name):
+        options = self.options
+        match type_name:
+            case "int":
+                return self.rng.randint(-options["int_range"], options["int_range"])
+            case "bool":
+                return self.rng.random() < 0.5
+            case "chr":
+                return self.rng.choice(options["alphabet"])
+            case "str":
+                if self.rng.random() < options["null_rate"]:
+                    return None
+                length = self.rng.randint(0, options["max_length"])
+                return "".join(self.rng.choice(options["alphabet"]) for _ in range(length))
+            case others:
+                raise NotImplementedError("Don't know how to sample: {}".format(others))
+
+    def sample(self):
+        inputs = []
+        for parameter in self.parameters:
+            type_name, is_array = parameter["type"]
+            if is_array:
+                length = self.rng.randint(0, self.options["max_length"])
+                inputs.append(tuple(self.sample_value(type_name) for _ in range(length)))
+            else:
+                inputs.append(self.sample_value(type_name))
+        return tuple(inputs)
+
+
+class OutcomeEstimate(object):
+    """Outcome counts of sampled runs with their Wilson confidence intervals"""
+
+    def __init__(self, counts, samples, confidence, stop_reason):
+        self.counts = counts
+        self.samples = samples
+        self.confidence = confidence
+        self.stop_reason = stop_reason
+
+    def probability(self, outcome):
+        return self.counts.get(outcome, 0) / self.samples if self.samples else 0.0
+
+    def z(self):
+        return statistics.NormalDist().inv_cdf((1 + self.confidence) / 2)
+
+    def interval(self, outcome):
+        """(low, high) bounds of the outcome's probability at the estimate's confidence"""
+        return wilson_interval(self.counts.get(outcome, 0), self.samples, self.z())
+
+    def unseen_bound(self):
+        """Upper bound of the probability of any single outcome that was never seen"""
+        return wilson_interval(0, self.samples, self.z())[1]
+
+
+def estimate_outcomes(method, options=None):
+    """Estimate the probability of each result of the method on random inputs.
+
+    Inputs are drawn per parameter type as configured in options (see DEFAULT_OPTIONS)
+    and run concretely, in batches until the Wilson interval of every outcome seen is
+    within margin of its estimate, or max_samples were run."""
+    options = dict(DEFAULT_OPTIONS, **{key: value for key, value in (options or {}).items() if value is not None})
+    rng = random.Random(options["seed"])
+    sampler = InputSampler(method.parameters, options, rng)
+    z = statistics.NormalDist().inv_cdf((1 + options["confidence"]) / 2)
+
+    compiled = bytecode_compiler.compile_method(method.bytecodes)
+    if compiled is not None:
+        run_test_case = compiled.run_test_case
+    else:
+        run_test_case = lambda inputs: interpreter.run_test_case(method.bytecodes, inputs, method.parameters)
+
+    counts = {}
+    samples = 0
+    stop_reason = "sample limit"
+    while samples < options["max_samples"]:
+        for _ in range(min(SAMPLE_BATCH, options["max_samples"] - samples)):
+            result, _ = run_test_case(sampler.sample())
+            counts[result] = counts.get(result, 0) + 1
+            samples += 1
+
+        widths = []
+        for count in counts.values():
+            low, high = wilson_interval(count, samples, z)
+            p = count / samples
+            widths.append(max(p - low, high - p))
+        if max(widths) <= options["margin"]:
+            stop_reason = "margin reached"
+            break
+
+    return OutcomeEstimate(counts, samples, options["confidence"], stop_reason)
@@ -0,0 +1,73 @@
+from collections import Counter
+
+
+def strongly_connected_components(nodes, edges):
+    """Tarjan's strongly connected components of the graph, in reverse topological order"""
+    index_of = {}
+    low_link = {}
+    on_stack = set()
+    stack = []
+    components = []
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        # iterative depth-first search, each frame is a node and its remaining successors
+        index_of[root] = low_link[root] = len(index_of)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges.get(root, ())))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index_of:
+                    index_of[successor] = low_link[successor] = len(index_of)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(edges.get(successor, ()))))
+                    break
+                if successor in on_stack:
+                    low_link[node] = min(low_link[node], index_of[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[node])
+                if low_link[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def count_paths(entry, edges, outcomes):
+    """Number of paths from entry ending in each outcome, as a Counter.
+
+    edges maps a node to its successors and outcomes a node to the results of the paths
+    ending there. Every strongly connected component is passed once, so each loop is
+    counted as a single way through, and the counts are summed over the DAG of the
+    components in topological order, in time linear in the size of the graph.
+    """
+    nodes = {entry} | set(edges) | set(outcomes)
+    components = strongly_connected_components(sorted(nodes), edges)
+    component_of = {node: i for i, component in enumerate(components) for node in component}
+
+    paths = [0] * len(components)
+    paths[component_of[entry]] = 1
+    counts = Counter()
+    # Tarjan finds a component after every component it reaches
+    for i in reversed(range(len(components))):
+        if paths[i] == 0:
+            continue
+        for node in components[i]:
+            for outcome in outcomes.get(node, ()):
+                counts[outcome] += paths[i]
+            for successor in edges.get(node, ()):
+                if component_of[successor] != i:
+                    paths[component_of[successor]] += paths[i]
+    return counts
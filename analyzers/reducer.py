@@ -0,0 +1,128 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from analyzers import execution_cache
+
+
+def ddmin(items, test):
+    """Zeller's delta debugging: a small sublist of items for which test still holds"""
+    items = list(items)
+    if test([]):
+        return []
+
+    n = 2
+    while len(items) >= 2:
+        chunk = -(-len(items) // n)
+        subsets = [items[i:i + chunk] for i in range(0, len(items), chunk)]
+
+        reduced = False
+        for subset in subsets:
+            if test(subset):
+                items, n, reduced = subset, 2, True
+                break
+        if not reduced:
+            for i in range(len(subsets)):
+                complement = [item for j, subset in enumerate(subsets) if j != i for item in subset]
+                if test(complement):
+                    items, n, reduced = complement, max(n - 1, 2), True
+                    break
+        if not reduced:
+            if n >= len(items):
+                break
+            n = min(n * 2, len(items))
+    return items
+
+
+def shrink_int(value, test):
+    """The integer closest to 0 (preferring positive) found for which test holds"""
+    if value == 0 or test(0):
+        return 0
+    if value < 0 and test(-value):
+        value = -value
+
+    # smallest magnitude between the failing 0 and the passing value
+    low, high = 0, abs(value)
+    sign = 1 if value > 0 else -1
+    while high - low > 1:
+        middle = (low + high) // 2
+        if test(sign * middle):
+            high = middle
+        else:
+            low = middle
+    return sign * high
+
+
+class Reducer(object):
+    """Shrinks an input of a method while it keeps producing the same result"""
+
+    def __init__(self, bytecodes, parameters, executions=None):
+        self.bytecodes = bytecodes
+        self.parameters = parameters
+        self.executions = execution_cache.ExecutionCache(None) if executions is None else executions
+
+    def result_of(self, inputs):
+        return self.executions.run_test_case(self.bytecodes, inputs, self.parameters)[0]
+
+    def reduce(self, inputs, result=None):
+        inputs = tuple(inputs)
+        if result is None:
+            result = self.result_of(inputs)
+
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(inputs)):
+                def replace(value, i=i):
+                    return inputs[:i] + (value,) + inputs[i + 1:]
+
+                def test(value):
+                    return self.result_of(replace(value)) == result
+
+                smaller = self.reduce_value(inputs[i], test)
+                if smaller != inputs[i]:
+                    inputs = replace(smaller)
+                    changed = True
+        return inputs
+
+    def reduce_value(self, value, test):
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, int):
+            return shrink_int(value, test)
+        if isinstance(value, str):
+            return "".join(ddmin(value, lambda chars: test("".join(chars))))
+        if isinstance(value, tuple):
+            value = tuple(ddmin(value, lambda elements: test(tuple(elements))))
+            for i in range(len(value)):
+                element = self.reduce_value(value[i], lambda element, i=i: test(value[:i] + (element,) + value[i + 1:]))
+                value = value[:i] + (element,) + value[i + 1:]
+            return value
+        return value
+
+
+def reduce_worker(bytecodes, parameters, inputs, result):
+    reducer = Reducer(bytecodes, parameters)
+    reduced = reducer.reduce(inputs, result)
+    return reduced, reducer.executions.executions(bytecodes)
+
+
+def reduce_findings(method, findings, executions=None, max_workers=None):
+    """Reduced input for each {result: input} the fuzzer found, reduced in parallel processes.
+
+    The runs done by the workers are added to the execution cache."""
+    if len(findings) == 0:
+        return {}
+    if len(findings) == 1 or (max_workers or os.cpu_count() or 1) == 1:
+        reducer = Reducer(method.bytecodes, method.parameters, executions)
+        return {result: reducer.reduce(inputs, result) for result, inputs in findings.items()}
+
+    reduced = {}
+    with ProcessPoolExecutor(max_workers=min(len(findings), max_workers or os.cpu_count())) as pool:
+        futures = {result: pool.submit(reduce_worker, method.bytecodes, method.parameters, inputs, result)
+                   for result, inputs in findings.items()}
+        for result, future in futures.items():
+            reduced[result], worker_executions = future.result()
+            if executions is not None:
+                executions.executions(method.bytecodes).update(worker_executions)
+                executions.dirty = True
+    return reduced
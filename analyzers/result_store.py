@@ -0,0 +1,84 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+RESULT_STORE_PATH = ".jsa_cache/results.pkl"
+
+_ANALYZER_DIR = Path(__file__).resolve().parent
+_code_version = None
+
+def code_version():
+    """Hash of the analyzer sources, so stored results expire when the analyzers change."""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for source in sorted(_ANALYZER_DIR.glob("*.py")):
+            digest.update(source.name.encode())
+            digest.update(source.read_bytes())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def method_fingerprint(bytecodes, config=None):
+    """Stable key for one method: its decoded bytecode tuple plus the analyzer configuration."""
+    digest = hashlib.sha256()
+    digest.update(code_version().encode())
+    digest.update(repr(bytecodes).encode())
+    if config is not None:
+        digest.update(repr(sorted(config.items(), key=lambda item: item[0])).encode())
+    return digest.hexdigest()
+
+class ResultStore(object):
+
+    def __init__(self, path=RESULT_STORE_PATH):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    self.entries = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+                # unreadable or from an incompatible version, start again
+                self.entries = {}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.dirty = True
+
+    def fetch(self, key, compute):
+        """Return (value, reused): the stored value for key, or compute and store it."""
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key], True
+
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value, False
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = "{}.tmp".format(self.path)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -1,12 +1,13 @@
-import tree_sitter
-import tree_sitter_java
 import sys
 from pathlib import Path
 import re
 import subprocess
 import os
 import itertools
-from javatools import unpack_class
+from contextlib import contextmanager
+
+# tree_sitter, tree_sitter_java and javatools are imported where they are used,
+# so importing this module (e.g. for JAVA_TYPE_MAP) stays cheap
 
 # could not find file, so making the root path absolute (derived from __file__)
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -15,6 +16,9 @@ JAVA_MAIN_PATH = "benchmark_suite/src/main/java"
 JAVA_CLASS_PATH = "benchmark_suite/target/classes"
 JAVA_CASE_PATH = "jpamb/cases"
 
+# seed integers derived from string lengths (sums of several literals) above this are dropped
+MAX_LENGTH_SUM = 4096
+
 SUB_OPCODE_LIST = ["aload","astore","dconst","dload","dstore","dup","dup2","fconst","fload","fstore","iconst","iload","istore","lconst","lload","lstore"]
 
 JAVA_TYPE_MAP = {
@@ -29,6 +33,19 @@ JAVA_TYPE_MAP = {
     "java/lang/String": ("str",False),
 }
 
+def length_sums(lengths, cap=MAX_LENGTH_SUM):
+    """Sums of two or more of the lengths (each used at most once) up to cap, by subset-sum DP.
+
+    Same values as summing every permutation of 2..n lengths, in O(n * cap) instead of O(n!)."""
+    # reachable[s] = how many lengths were used to reach sum s, capped at 2
+    reachable = {0: 0}
+    for length in lengths:
+        for total, count in list(reachable.items()):
+            new_total = total + length
+            if new_total <= cap and reachable.get(new_total, -1) < min(count + 1, 2):
+                reachable[new_total] = min(count + 1, 2)
+    return {total for total, count in reachable.items() if count == 2}
+
 def case_str_2_value(str_value,value_type):
     if str_value == "null":
         return None
@@ -106,12 +123,11 @@ class JavaMethod(object):
             str_len_list = [len(s) for s in type_values["str"]]
 
             #for loop
-            str_for_result = set(i*l for i,l in list(itertools.product(type_values["int"],str_len_list)))
+            str_for_result = set(i*l for i,l in itertools.product(type_values["int"],set(str_len_list)))
             type_values["int"] = type_values["int"] | set(str_len_list) | str_for_result
 
             #str + str
-            for n in range(1,len(str_len_list)):
-                type_values["int"] = type_values["int"] | set(sum(len_list) for len_list in list(itertools.permutations(str_len_list, n+1)))
+            type_values["int"] = type_values["int"] | length_sums(str_len_list)
 
         parameter_values = {}
         array_parameter_values = None
@@ -193,105 +209,148 @@ def str_param_parser(str_param,sub_list = None):
         return str_param_list
 
 
-def analyze_ast(tree):
-    method_list = []
-
-    def check(node,method = None):
-        if method is None: #find method
-            if node.type == "method_declaration":
-                method = JavaMethod()
-
-                for child in node.children:
-                    text = child.text.decode('utf8')
-
-                    match child.type:
-                        case "identifier":
-                            method.name = text
-                        case "formal_parameters":
-                            parameters = re.findall(r'(?<=\().*?(?=\))', text)[0].split(',')
-                            for p in parameters:
-                                p = p.strip()
-                                if p == "":
-                                    break
-                                p_t, p_n = p.split(" ")
-                                method.parameters.append({
-                                    "name": p_n,
-                                    "type": JAVA_TYPE_MAP[p_t],
-                                })
-                        case "modifiers":
-                            case_info_list = re.findall(r'(?<=@Case).+?(?=\n)', text)
-                            for case_info in case_info_list:
-                                case = {}
-                                case_info = re.findall(r'(?<=").+?(?=(?<!\\)")', case_info)[0]
-
-                                case["inputs"] = str_param_parser(re.findall(r'(?<=\().*?(?=\))', case_info)[0])
-                                case["result"] = re.findall(r'(?<=\s->\s).+', case_info)[0]
-                                method.cases.append(case)
-                        case "block":
-                            check(child,method)
-                        case "array_type":
-                            for cc in child.children:
-                                if cc.type == "dimensions":
-                                    method.return_array = True
-                                elif cc.type not in ["integral_type", "boolean_type", "type_identifier"]:
-                                    raise NotImplementedError("Don't know how to handle: {}".format(cc.type))
-                                else:
-                                    method.return_type = str(cc.text.decode('utf8'))
-                        case others:
-                            if others not in ["void_type", "integral_type", "boolean_type", "type_identifier"]:
-                                raise NotImplementedError("Don't know how to handle: {}".format(others))
-                            method.return_type = text
-
-                #Convert cases input data type from str to real value
-                for case in method.cases:
-                    for v_i in range(len(case["inputs"])):
-                        v_type = method.parameters[v_i]["type"]
-
-                        if v_type[1]:
-                            for l_i,str_v in enumerate(case["inputs"][v_i]):
-                                case["inputs"][v_i][l_i] = case_str_2_value(str_v,v_type[0])
-                        else:
-                            case["inputs"][v_i] = case_str_2_value(case["inputs"][v_i],v_type[0])
-
-                method_list.append(method)
-
-            for child in node.children:
-                check(child)
-        else: #check in method
-            if node.type == "assert_statement":
-                method.has_assert = True
-
-            match node.type:
-                case "decimal_integer_literal": #posstive number
-                    method.ast_values.add(int(node.text.decode('utf8')))
-                case "unary_expression": #may found negative number
-                    negative_number_types = {"-","decimal_integer_literal"}
-                    child_types = set()
-                    for child in node.children:
-                        child_types.add(child.type)
-                    if negative_number_types == child_types: #found negative number
-                        method.ast_values.add(int(node.text.decode('utf8')))
+METHOD_QUERY = "(method_declaration) @method"
+
+VALUE_QUERY = """
+(decimal_integer_literal) @int
+(unary_expression operator: "-" operand: (decimal_integer_literal)) @negative
+"/" @divide
+(true) @true
+(false) @false
+(string_literal) @string
+(character_literal) @char
+(string_fragment) @fragment
+(assert_statement) @assert
+"""
+
+_java_language = None
+_queries = {}
+_parser_pool = []
+
+def get_java_language():
+    global _java_language
+    if _java_language is None:
+        import tree_sitter
+        import tree_sitter_java
+        _java_language = tree_sitter.Language(tree_sitter_java.language())
+    return _java_language
+
+def get_query(source):
+    if source not in _queries:
+        import tree_sitter
+        _queries[source] = tree_sitter.Query(get_java_language(), source)
+    return _queries[source]
+
+@contextmanager
+def pooled_parser():
+    # parsers are not thread-safe, so each caller borrows its own and returns it afterwards
+    try:
+        parser = _parser_pool.pop()
+    except IndexError:
+        import tree_sitter
+        parser = tree_sitter.Parser(get_java_language())
+    try:
+        yield parser
+    finally:
+        _parser_pool.append(parser)
+
+def parse_source(source):
+    with pooled_parser() as parser:
+        return parser.parse(source)
+
+def query_captures(source, node):
+    import tree_sitter
+    return tree_sitter.QueryCursor(get_query(source)).captures(node)
+
+def is_negative_number(node):
+    return node.type == "unary_expression" and {child.type for child in node.children} == {"-", "decimal_integer_literal"}
+
+def analyze_method(node):
+    method = JavaMethod()
+
+    for child in node.children:
+        text = child.text.decode('utf8')
+
+        match child.type:
+            case "identifier":
+                method.name = text
+            case "formal_parameters":
+                parameters = re.findall(r'(?<=\().*?(?=\))', text)[0].split(',')
+                for p in parameters:
+                    p = p.strip()
+                    if p == "":
+                        break
+                    p_t, p_n = p.split(" ")
+                    method.parameters.append({
+                        "name": p_n,
+                        "type": JAVA_TYPE_MAP[p_t],
+                    })
+            case "modifiers":
+                case_info_list = re.findall(r'(?<=@Case).+?(?=\n)', text)
+                for case_info in case_info_list:
+                    case = {}
+                    case_info = re.findall(r'(?<=").+?(?=(?<!\\)")', case_info)[0]
+
+                    case["inputs"] = str_param_parser(re.findall(r'(?<=\().*?(?=\))', case_info)[0])
+                    case["result"] = re.findall(r'(?<=\s->\s).+', case_info)[0]
+                    method.cases.append(case)
+            case "block":
+                collect_values(child, method)
+            case "array_type":
+                for cc in child.children:
+                    if cc.type == "dimensions":
+                        method.return_array = True
+                    elif cc.type not in ["integral_type", "boolean_type", "type_identifier"]:
+                        raise NotImplementedError("Don't know how to handle: {}".format(cc.type))
                     else:
-                        for child in node.children:
-                            check(child, method)
-                case "/":
+                        method.return_type = str(cc.text.decode('utf8'))
+            case others:
+                if others not in ["void_type", "integral_type", "boolean_type", "type_identifier"]:
+                    raise NotImplementedError("Don't know how to handle: {}".format(others))
+                method.return_type = text
+
+    #Convert cases input data type from str to real value
+    for case in method.cases:
+        for v_i in range(len(case["inputs"])):
+            v_type = method.parameters[v_i]["type"]
+
+            if v_type[1]:
+                for l_i,str_v in enumerate(case["inputs"][v_i]):
+                    case["inputs"][v_i][l_i] = case_str_2_value(str_v,v_type[0])
+            else:
+                case["inputs"][v_i] = case_str_2_value(case["inputs"][v_i],v_type[0])
+
+    return method
+
+def collect_values(body, method):
+    for capture, nodes in query_captures(VALUE_QUERY, body).items():
+        for node in nodes:
+            text = node.text.decode('utf8')
+
+            match capture:
+                case "int": #posstive number, unless it is the operand of a negative number
+                    if not is_negative_number(node.parent):
+                        method.ast_values.add(int(text))
+                case "negative":
+                    if is_negative_number(node):
+                        method.ast_values.add(int(text))
+                case "divide":
                     method.ast_values.add(0)
                 case "true":
                     method.ast_values.add(True)
                 case "false":
                     method.ast_values.add(False)
-                case "string_literal":
-                    method.ast_values.add(node.text.decode('utf8')[1:-1])
-                case "character_literal":
-                    method.ast_values.add(node.text.decode('utf8')[1:-1])
-                case "string_fragment":
-                    method.ast_values.add(node.text.decode('utf8')[1:-1])
-                case others:
-                    for child in node.children:
-                        check(child,method)
-
-    check(tree.root_node)
-    return method_list
+                case "string" | "char":
+                    method.ast_values.add(text[1:-1])
+                case "fragment":
+                    if node.parent.type != "string_literal":
+                        method.ast_values.add(text[1:-1])
+                case "assert":
+                    method.has_assert = True
+
+def analyze_ast(tree):
+    methods = query_captures(METHOD_QUERY, tree.root_node).get("method", [])
+    return [analyze_method(node) for node in sorted(methods, key=lambda node: node.start_byte)]
 
 def compile(name):
     subprocess.run([
@@ -304,6 +363,8 @@ def compile(name):
     ], check=True)
 
 def get_constant_pool(name):
+    from javatools import unpack_class
+
     with open("{}/jpamb/cases/{}.class".format("/".join([JAVA_ROOT_PATH, JAVA_CLASS_PATH]),name), 'rb') as f:
         classinfo = unpack_class(f)
     return classinfo.cpool.consts
@@ -450,11 +511,8 @@ def decode_bytecode(code_line,constant_pool,bootstrap_args):
 def get_simplify_ast(name):
     src_path = "/".join([JAVA_ROOT_PATH, JAVA_MAIN_PATH, JAVA_CASE_PATH, "{}.java".format(name)])
 
-    JAVA_LANGUAGE = tree_sitter.Language(tree_sitter_java.language())
-    parser = tree_sitter.Parser(JAVA_LANGUAGE)
-
     with open(src_path, "rb") as f:
-        tree = parser.parse(f.read())
+        tree = parse_source(f.read())
 
     methods = analyze_ast(tree)
 
@@ -1,23 +1,215 @@
 import argparse
 import math
 
+# the interpreter, fuzzer and abstract domains are imported by the phases that use them,
+# so e.g. the "test" command never loads the abstract domains
 from analyzers import syntaxer
-from analyzers import interpreter
-from analyzers import fuzzer
-from analyzers import abstractInterpreter as abs_interp
-from collections import Counter
+from analyzers import result_store
+from analyzers import execution_cache
+from analyzers import fuzz_corpus
+from analyzers import fuzz_history
 
 syntaxer.JAVA_ROOT_PATH = "."
 
+STRING_ABSTRACTIONS = ["integrated", "prefix", "bricks"]
+COMMAND_PHASES = {
+    "all": {"test", "fuzz", "analyze"},
+    "test": {"test"},
+    "fuzz": {"fuzz"},
+    "analyze": {"analyze"},
+}
+
+
+def get_param_types(method):
+    param_types = []
+    for param in method.parameters:
+        param_name = str(param.name if hasattr(param, 'name') else param).lower()
+        param_type_str = str(param.type if hasattr(param, 'type') else '').lower()
+
+        if 'string' in param_type_str or 's' == param_name or 'str' in param_name:
+            param_types.append('String')
+        elif 'int' in param_type_str or any(c in param_name for c in ['i', 'n', 'x', 'y']):
+            param_types.append('int')
+        else:
+            param_types.append('int')
+    return param_types
 
-if __name__ == '__main__':
+
+def run_cases(method, executions=None):
+    from analyzers import interpreter
+
+    run_test_case = interpreter.run_test_case if executions is None else executions.run_test_case
+    outcomes = []
+    for case in method.cases:
+        outcomes.append(run_test_case(
+            method.bytecodes,
+            case["inputs"],
+            method.parameters
+        ))
+    return outcomes
+
+
+def run_fuzz(method, executions=None, options=None, corpus=None):
+    from analyzers import fuzzer
+
+    findings = {}
+    interest, total_pc_set, results = fuzzer.coverage_guided_fuzzing(method,"\t\t",executions,corpus=corpus,findings=findings,**(options or {}))
+    return interest, total_pc_set, results, findings
+
+
+def run_monte_carlo(method, options=None):
+    from analyzers import monte_carlo
+
+    return monte_carlo.estimate_outcomes(method, options)
+
+
+def run_reduce(method, findings, executions=None):
+    from analyzers import reducer
+
+    return reducer.reduce_findings(method, findings, executions)
+
+
+def format_inputs(inputs):
+    return ", ".join(str(param) if type(param).__name__ != "str" else "'{}'".format(param) for param in inputs)
+
+
+def run_static(method, is_strings, product=False, budget=None):
+    from analyzers import abstractInterpreter as abs_interp
+
+    bytecodes = method.bytecodes
+    num_params = len(method.parameters)
+    param_types = get_param_types(method)
+    budget = budget or {}
+    static = {}
+    # analysis -> budget it went over, for the analyses that degraded
+    degraded = {}
+
+    if not is_strings:
+        # Sign Domain and Interval Domain
+        for domain, use_interval in [("sign", False), ("interval", True)]:
+            analyzer = abs_interp.AbstractInterpreter(
+                bytecodes,
+                use_interval=use_interval,
+                use_widening=use_interval,
+                use_string=False,
+            )
+            analyzer.analyze(num_params, **budget)
+            static[domain] = (analyzer.get_result_string(), analyzer.get_path_counts())
+            if analyzer.degraded is not None:
+                degraded[domain] = analyzer.degraded
+    elif product:
+        # one fixpoint over the product state, error sets derived per component
+        analyzer = abs_interp.AbstractInterpreter(
+            bytecodes,
+            use_interval=True,
+            use_widening=True,
+            use_string=True,
+            string_abstraction_type='product'
+        )
+        analyzer.analyze(num_params, param_types=param_types, **budget)
+        coverage = len(analyzer.pc_set) / len(bytecodes[1])
+        for abstraction_type in STRING_ABSTRACTIONS:
+            component = None if abstraction_type == "integrated" else abstraction_type
+            static[abstraction_type] = (analyzer.get_string_analysis_summary(component), analyzer.get_error_set(component), coverage)
+            if analyzer.degraded is not None:
+                degraded[abstraction_type] = analyzer.degraded
+    else:
+        for abstraction_type in STRING_ABSTRACTIONS:
+            analyzer = abs_interp.AbstractInterpreter(
+                bytecodes,
+                use_interval=True,
+                use_widening=True,
+                use_string=True,
+                string_abstraction_type=abstraction_type
+            )
+            analyzer.analyze(num_params, param_types=param_types, **budget)
+            coverage = len(analyzer.pc_set) / len(bytecodes[1])
+            static[abstraction_type] = (analyzer.get_string_analysis_summary(), analyzer.get_error_set(), coverage)
+            if analyzer.degraded is not None:
+                degraded[abstraction_type] = analyzer.degraded
+    static["degraded"] = degraded
+    return static
+
+
+def fuzz_config(method, options=None, corpus=None):
+    return {
+        "phase": "fuzz",
+        "parameters": repr(method.parameters),
+        "seeds": repr(sorted(map(repr, method.ast_values))),
+        "corpus": repr([] if corpus is None else corpus.seeds(method)),
+        "options": repr(sorted((key, value) for key, value in (options or {}).items() if value is not None and value is not False)),
+    }
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Static Analyzer")
+    parser.add_argument("command", nargs="?", choices=list(COMMAND_PHASES), default="all", help="Phase to run: case tests, fuzzing, static analysis, or all of them.")
     parser.add_argument("-case", type=str, default="Strings", help="Name of test case.")
     parser.add_argument("-abs", type=str, default="str", help="Type of abstraction (str|int)")
-
-    args = parser.parse_args()
+    parser.add_argument("-product", action="store_true", help="Run the string abstractions as one product analysis.")
+    parser.add_argument("-store", type=str, default=result_store.RESULT_STORE_PATH, help="File of stored per-method results.")
+    parser.add_argument("-fuzz-max-executions", type=int, default=None, help="Stop fuzzing a method after this many inputs.")
+    parser.add_argument("-fuzz-max-seconds", type=float, default=None, help="Stop fuzzing a method after this many seconds.")
+    parser.add_argument("-fuzz-full-coverage", action="store_true", help="Stop fuzzing a method once every instruction is covered.")
+    parser.add_argument("-fuzz-max-length", type=int, default=None, help="Join at most this many literals into a generated string or array.")
+    parser.add_argument("-fuzz-max-combinations", type=int, default=None, help="Generate at most this many inputs per method.")
+    parser.add_argument("-fuzz-history", type=str, default="hashed", choices=fuzz_history.HISTORY_KINDS, help="How the fuzzer remembers run inputs: exact tuples, 64-bit hashes, a bloom filter, or not at all.")
+    parser.add_argument("-fuzz-history-fp-rate", type=float, default=0.001, help="False positive rate of the bloom filter history.")
+    parser.add_argument("-fuzz-plateau", type=int, default=None, help="Stop fuzzing a method after this many inputs without new coverage.")
+    parser.add_argument("-fuzz-concolic", action="store_true", help="Start fuzzing with inputs solved to flip the branches not taken yet.")
+    parser.add_argument("-fuzz-guided", action="store_true", help="Fuzz the bounds found by abstract interpretation first and skip instructions it proves unreachable.")
+    parser.add_argument("-monte-carlo", action="store_true", help="Estimate each result's probability on random inputs, with confidence intervals.")
+    parser.add_argument("-mc-max-samples", type=int, default=None, help="Run at most this many random inputs per method.")
+    parser.add_argument("-mc-margin", type=float, default=None, help="Stop sampling once every interval is within this margin of its estimate.")
+    parser.add_argument("-mc-confidence", type=float, default=None, help="Confidence level of the intervals.")
+    parser.add_argument("-mc-int-range", type=int, default=None, help="Draw ints uniformly from [-range, range].")
+    parser.add_argument("-mc-max-length", type=int, default=None, help="Draw string and array lengths uniformly from [0, length].")
+    parser.add_argument("-mc-seed", type=int, default=None, help="Seed of the random inputs.")
+    parser.add_argument("-static-max-seconds", type=float, default=None, help="Degrade the abstract interpretation of a method after this many seconds.")
+    parser.add_argument("-static-max-states", type=int, default=None, help="Degrade the abstract interpretation of a method after propagating this many states.")
+    parser.add_argument("-static-max-value-size", type=int, default=None, help="Degrade the abstract interpretation of a method once its abstract values grow this large.")
+    parser.add_argument("-reduce", action="store_true", help="Shrink the inputs that raised errors during fuzzing into small reproducers.")
+    parser.add_argument("-corpus", type=str, default=fuzz_corpus.CORPUS_DIR, help="Directory of fuzzing corpora, one JSON file per case.")
+    parser.add_argument("-executions", type=str, default=execution_cache.EXECUTION_CACHE_PATH, help="File of stored concrete executions per method and input.")
+    parser.add_argument("-no-store", action="store_true", help="Re-analyze every method without reading or writing stored results.")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
     case_name = args.case
+    phases = COMMAND_PHASES[args.command]
+    fuzz_options = {
+        "max_executions": args.fuzz_max_executions,
+        "max_seconds": args.fuzz_max_seconds,
+        "stop_on_full_coverage": args.fuzz_full_coverage,
+        "plateau": args.fuzz_plateau,
+        "max_length": args.fuzz_max_length,
+        "max_combinations": args.fuzz_max_combinations,
+        "history": args.fuzz_history,
+        "history_fp_rate": args.fuzz_history_fp_rate,
+        "concolic": args.fuzz_concolic,
+        "guided": args.fuzz_guided,
+    }
+    monte_carlo_options = {
+        "max_samples": args.mc_max_samples,
+        "margin": args.mc_margin,
+        "confidence": args.mc_confidence,
+        "int_range": args.mc_int_range,
+        "max_length": args.mc_max_length,
+        "seed": args.mc_seed,
+    }
+    static_budget = {
+        "max_seconds": args.static_max_seconds,
+        "max_states": args.static_max_states,
+        "max_value_size": args.static_max_value_size,
+    }
+    store = None if args.no_store else result_store.ResultStore(args.store)
+    # shared by the case tests and the fuzzer, kept in memory only with -no-store
+    executions = execution_cache.ExecutionCache(None if args.no_store else args.executions)
+    corpus = None if args.no_store else fuzz_corpus.FuzzCorpus.for_case(case_name, args.corpus)
 
     print("Analyzing methods in {}.java".format(case_name))
 
@@ -44,6 +236,11 @@ if __name__ == '__main__':
     is_strings = args.abs == "str"
     method_results = {}
 
+    def reuse(config, compute):
+        if store is None:
+            return compute(), False
+        return store.fetch(result_store.method_fingerprint(method.bytecodes, config), compute)
+
     for method in methods:
         method_name = method.name
         bytecodes = method.bytecodes
@@ -58,180 +255,144 @@ if __name__ == '__main__':
             }
 
         # Dynamic Analysis
-        print("\t[Case Test]:")
+        if "test" in phases:
+            print("\t[Case Test]:")
 
-        total_pc_set = set()
-        for case in method.cases:
-            case_parameters = case["inputs"]
-            true_result = case["result"]
+            case_outcomes, _ = reuse({"phase": "cases", "cases": repr(method.cases)}, lambda: run_cases(method, executions))
 
-            case_result, pc_set = interpreter.run_test_case(
-                method.bytecodes,
-                case_parameters,
-                method.parameters
-            )
+            total_pc_set = set()
+            for case, (case_result, pc_set) in zip(method.cases, case_outcomes):
+                case_parameters = case["inputs"]
+                true_result = case["result"]
 
-            coverage = len(pc_set) / len(method.bytecodes[1])
-            total_pc_set |= pc_set
+                coverage = len(pc_set) / len(method.bytecodes[1])
+                total_pc_set |= pc_set
 
-            total_case_num += 1
-            result = "FAIL".join(["\033[91m","\033[0m"])
-            if case_result == true_result:
-                result = "PASS".join(["\033[92m","\033[0m"])
-                passed_case_num += 1
+                total_case_num += 1
+                result = "FAIL".join(["\033[91m","\033[0m"])
+                if case_result == true_result:
+                    result = "PASS".join(["\033[92m","\033[0m"])
+                    passed_case_num += 1
 
-            if is_strings:
-                if case_result != "ok":
-                    error_id = f"{method_name}_{str(case_parameters)}_{case_result}"
-                    method_results[method_name]['conc_errors'].add(error_id)
+                if is_strings:
+                    if case_result != "ok":
+                        error_id = f"{method_name}_{str(case_parameters)}_{case_result}"
+                        method_results[method_name]['conc_errors'].add(error_id)
 
-            print("\t\t[{}|{:5.1f}%] ({}) -> {} | {}".format(result,coverage*100,", ".join(str(param) if type(param).__name__ != "str" else "'{}'".format(param) for param in case_parameters),true_result,case_result))
+                print("\t\t[{}|{:5.1f}%] ({}) -> {} | {}".format(result,coverage*100,", ".join(str(param) if type(param).__name__ != "str" else "'{}'".format(param) for param in case_parameters),true_result,case_result))
 
-        if len(method.cases) == 0:
-            print("\t\t{}".format("This function has no cases to test.".join(["\033[93m","\033[0m"])))
-        else:
-            total_coverage = len(total_pc_set) / len(method.bytecodes[1])
-            case_covers.append(total_coverage)
-            print("\t\t[Total coverage]: {:.1f}%".format(total_coverage*100))
+            if len(method.cases) == 0:
+                print("\t\t{}".format("This function has no cases to test.".join(["\033[93m","\033[0m"])))
+            else:
+                total_coverage = len(total_pc_set) / len(method.bytecodes[1])
+                case_covers.append(total_coverage)
+                print("\t\t[Total coverage]: {:.1f}%".format(total_coverage*100))
 
         # Coverage-guided Fuzz Test
-        print("\t[Fuzz Test]:")
-        interest, total_pc_set, results = fuzzer.coverage_guided_fuzzing(method,"\t\t")
-
-        total_coverage = len(total_pc_set) / len(method.bytecodes[1])
-        fuzz_covers.append(total_coverage)
-        print("\t\t[Total coverage]: {:.1f}%".format(total_coverage * 100))
-
-        print("\t\t[Interest]:")
-        report = []
-        if len(method.parameters) == 0:
-            report.append("\t\t\tThis method has no parameter.")
-
-        for i,parameter in enumerate(method.parameters):
-            type_str = parameter["type"][0]
-            if parameter["type"][1]:
-                type_str += "[]"
-            report.append("\t\t\t({} {}): {}".format(type_str, parameter["name"], list(interest[i])))
-        print("\n".join(report))
-
-        print("\t\t[Result]:")
-        for result_type in results:
-            if sum(results.values())>0:
-                print("\t\t\t[{}]: {:.1f}% | {}".format(result_type,results[result_type]/sum(results.values())*100,results[result_type]))
-                if result_type not in dynamic_results:
-                    dynamic_results[result_type] = 0
-                dynamic_results[result_type]+=results[result_type]/sum(results.values())*100
+        if "fuzz" in phases:
+            print("\t[Fuzz Test]:")
+            (interest, total_pc_set, results, findings), reused = reuse(fuzz_config(method, fuzz_options, corpus), lambda: run_fuzz(method, executions, fuzz_options, corpus))
+            if reused:
+                print("\t\t(reusing stored result, method unchanged)")
+
+            total_coverage = len(total_pc_set) / len(method.bytecodes[1])
+            fuzz_covers.append(total_coverage)
+            print("\t\t[Total coverage]: {:.1f}%".format(total_coverage * 100))
+
+            print("\t\t[Interest]:")
+            report = []
+            if len(method.parameters) == 0:
+                report.append("\t\t\tThis method has no parameter.")
+
+            for i,parameter in enumerate(method.parameters):
+                type_str = parameter["type"][0]
+                if parameter["type"][1]:
+                    type_str += "[]"
+                report.append("\t\t\t({} {}): {}".format(type_str, parameter["name"], list(interest[i])))
+            print("\n".join(report))
+
+            print("\t\t[Result]:")
+            for result_type in results:
+                if sum(results.values())>0:
+                    print("\t\t\t[{}]: {:.1f}% | {}".format(result_type,results[result_type]/sum(results.values())*100,results[result_type]))
+                    if result_type not in dynamic_results:
+                        dynamic_results[result_type] = 0
+                    dynamic_results[result_type]+=results[result_type]/sum(results.values())*100
+
+            if args.reduce and len(findings) > 0:
+                print("\t\t[Reproducers]:")
+                reproducers, _ = reuse({"phase": "reduce", "findings": repr(sorted(findings.items()))},
+                                       lambda: run_reduce(method, findings, executions))
+                for result_type, inputs in reproducers.items():
+                    print("\t\t\t[{}]: ({}) <- ({})".format(result_type, format_inputs(inputs), format_inputs(findings[result_type])))
+
+        # Monte Carlo estimate of the result probabilities
+        if args.monte_carlo and "fuzz" in phases:
+            print("\t[Monte Carlo]:")
+            estimate, reused = reuse({"phase": "monte carlo", "options": repr(sorted(monte_carlo_options.items()))},
+                                     lambda: run_monte_carlo(method, monte_carlo_options))
+            if reused:
+                print("\t\t(reusing stored result, method unchanged)")
+            print("\t\t[Samples]: {} ({}) | {:.0f}% confidence".format(estimate.samples, estimate.stop_reason, estimate.confidence * 100))
+            for result_type, count in sorted(estimate.counts.items(), key=lambda item: -item[1]):
+                low, high = estimate.interval(result_type)
+                print("\t\t\t[{}]: {:.1f}% [{:.1f}%, {:.1f}%] | {}".format(
+                    result_type, estimate.probability(result_type) * 100, low * 100, high * 100, count))
+            print("\t\t\t[unseen results]: at most {:.2f}% each".format(estimate.unseen_bound() * 100))
 
         # Static Analysis
-        print("\t[Static Analysis]")
-        num_params = len(method.parameters)
-
-        param_types = []
-        for param in method.parameters:
-            param_name = str(param.name if hasattr(param, 'name') else param).lower()
-            param_type_str = str(param.type if hasattr(param, 'type') else '').lower()
-
-            if 'string' in param_type_str or 's' == param_name or 'str' in param_name:
-                param_types.append('String')
-            elif 'int' in param_type_str or any(c in param_name for c in ['i', 'n', 'x', 'y']):
-                param_types.append('int')
+        if "analyze" in phases:
+            print("\t[Static Analysis]")
+            static, reused = reuse({"phase": "static", "abs": args.abs, "product": args.product, "budget": repr(sorted(static_budget.items()))},
+                                   lambda: run_static(method, is_strings, args.product, static_budget))
+            if reused:
+                print("\t\t(reusing stored result, method unchanged)")
+            for abstraction_type, reason in static["degraded"].items():
+                print(f"  Degraded {abstraction_type} analysis: {reason} budget exceeded")
+
+            if not is_strings:
+                for domain, label, total_paths in [("sign", "Sign Domain:    ", total_sign_paths),
+                                                   ("interval", "Interval Domain:", total_interval_paths)]:
+                    domain_result, path_counter = static[domain]
+                    print(f"  {label} {domain_result}")
+                    total = sum(path_counter.values())
+
+                    if total > 0:
+                        print(f"    Total paths: {total}")
+                        for result, count in sorted(path_counter.items()):
+                            percentage = (count / total) * 100
+                            print(f"      - {result}: {count} ({percentage:.1f}%)")
+                            if result in total_paths:
+                                total_paths[result] += count
             else:
-                param_types.append('int')
-
-        if not is_strings:
-            # Sign Domain
-            sign_analyzer = abs_interp.AbstractInterpreter(
-                bytecodes,
-                use_interval=False,
-                use_widening=False,
-                use_string=False,
-            )
-            sign_analyzer.analyze(num_params)
-            sign_result = sign_analyzer.get_result_string()
-            print(f"  Sign Domain:     {sign_result}")
-            sign_path_counter = Counter(sign_analyzer.path_results)
-            total_sign = len(sign_analyzer.path_results)
-
-            if total_sign > 0:
-                print(f"    Total paths: {total_sign}")
-                for result, count in sorted(sign_path_counter.items()):
-                    percentage = (count / total_sign) * 100
-                    print(f"      - {result}: {count} ({percentage:.1f}%)")
-                    if result in total_sign_paths:
-                        total_sign_paths[result] += count
-
-            # Interval Domain
-            interval_analyzer = abs_interp.AbstractInterpreter(
-                bytecodes,
-                use_interval=True,
-                use_widening=True,
-                use_string=False,
-            )
-            interval_analyzer.analyze(num_params)
-            interval_result = interval_analyzer.get_result_string()
-            print(f"  Interval Domain: {interval_result}")
-            interval_path_counter = Counter(interval_analyzer.path_results)
-            total_interval = len(interval_analyzer.path_results)
-
-            if total_interval > 0:
-                print(f"    Total paths: {total_interval}")
-                for result, count in sorted(interval_path_counter.items()):
-                    percentage = (count / total_interval) * 100
-                    print(f"      - {result}: {count} ({percentage:.1f}%)")
-                    if result in total_interval_paths:
-                        total_interval_paths[result] += count
-        else:
-            integrated_analyzer = abs_interp.AbstractInterpreter(
-                bytecodes,
-                use_interval=True,
-                use_widening=True,
-                use_string=True,
-                string_abstraction_type='integrated'
-            )
-
-            integrated_analyzer.analyze(num_params, param_types=param_types)
-            integrated_result = integrated_analyzer.get_string_analysis_summary()
-            integrated_errors = integrated_analyzer.get_error_set()
-            integrated_coverage = len(integrated_analyzer.pc_set) / len(method.bytecodes[1])
-            integrate_covers.append(integrated_coverage)
-            print("\t\t[Integrated Abstraction | {:.1f}%]: {}".format(integrated_coverage*100,integrated_result))
-            integrated_results = integrated_result.split(" and ")
-            for result in integrated_results:
-                if result not in static_results:
-                    static_results[result] = 0
-                static_results[result] += 1/len(integrated_results)
-
-            prefix_analyzer = abs_interp.AbstractInterpreter(
-                bytecodes,
-                use_interval=True,
-                use_widening=True,
-                use_string=True,
-                string_abstraction_type='prefix'
-            )
-            prefix_analyzer.analyze(num_params, param_types=param_types)
-            prefix_result = prefix_analyzer.get_string_analysis_summary()
-            prefix_errors = prefix_analyzer.get_error_set()
-            prefix_coverage = len(prefix_analyzer.pc_set) / len(method.bytecodes[1])
-            pre_suf_covers.append(prefix_coverage)
-            print("\t\t\t[Prefix/Suffix Abstraction | {:.1f}%]: {}".format(prefix_coverage*100,prefix_result))
-
-            bricks_analyzer = abs_interp.AbstractInterpreter(
-                bytecodes,
-                use_interval=True,
-                use_widening=True,
-                use_string=True,
-                string_abstraction_type='bricks'
-            )
-            bricks_analyzer.analyze(num_params, param_types=param_types)
-            bricks_result = bricks_analyzer.get_string_analysis_summary()
-            bricks_errors = bricks_analyzer.get_error_set()
-            bricks_coverage = len(bricks_analyzer.pc_set) / len(method.bytecodes[1])
-            bricks_covers.append(bricks_coverage)
-            print("\t\t\t[Bricks (Regex) Abstraction | {:.1f}%]: {}".format(bricks_coverage*100,bricks_result))
-
-            method_results[method_name]['prefix_errors'] = prefix_errors
-            method_results[method_name]['bricks_errors'] = bricks_errors
-            method_results[method_name]['integrated_errors'] = integrated_errors
+                integrated_result, integrated_errors, integrated_coverage = static["integrated"]
+                integrate_covers.append(integrated_coverage)
+                print("\t\t[Integrated Abstraction | {:.1f}%]: {}".format(integrated_coverage*100,integrated_result))
+                integrated_results = integrated_result.split(" and ")
+                for result in integrated_results:
+                    if result not in static_results:
+                        static_results[result] = 0
+                    static_results[result] += 1/len(integrated_results)
+
+                prefix_result, prefix_errors, prefix_coverage = static["prefix"]
+                pre_suf_covers.append(prefix_coverage)
+                print("\t\t\t[Prefix/Suffix Abstraction | {:.1f}%]: {}".format(prefix_coverage*100,prefix_result))
+
+                bricks_result, bricks_errors, bricks_coverage = static["bricks"]
+                bricks_covers.append(bricks_coverage)
+                print("\t\t\t[Bricks (Regex) Abstraction | {:.1f}%]: {}".format(bricks_coverage*100,bricks_result))
+
+                method_results[method_name]['prefix_errors'] = prefix_errors
+                method_results[method_name]['bricks_errors'] = bricks_errors
+                method_results[method_name]['integrated_errors'] = integrated_errors
+
+    executions.save()
+    if corpus is not None:
+        corpus.save()
+    if store is not None:
+        store.save()
+        print("\n[Stored results]: reused {} | computed {}".format(store.hits, store.misses))
+        print("[Stored executions]: reused {} | executed {}".format(executions.hits, executions.misses))
 
     case_pass_rate = 0
     case_avg_cover = 0
@@ -253,35 +414,40 @@ if __name__ == '__main__':
     if len(bricks_covers)>0:
         bricks_avg_cover = sum(bricks_covers) / len(bricks_covers)
 
-    analysis_print = [
-        "[Case Pass Rate]: {:.2f}% ({}/{})".format(case_pass_rate,passed_case_num,total_case_num),
-        "[Dynamic Analysis Result]",]
-
-    for result_type in dynamic_results:
-        if sum(dynamic_results.values()) > 0:
-            analysis_print.append("\t[{}]: {:.1f}%".format(result_type, dynamic_results[result_type] / sum(dynamic_results.values()) * 100))
-
-    analysis_print.append("[Static Analysis Result]")
-
-    for result_type in static_results:
-        if sum(static_results.values())>0:
-            analysis_print.append("\t[{}]: {:.1f}%".format(result_type, static_results[result_type] / sum(static_results.values()) * 100))
-
-    analysis_print += [
-        "[Average Coverage]",
-        "\t[Case Test]: {:.2f}%".format(case_avg_cover*100),
-        "\t[Fuzz Test]: {:.2f}%".format(fuzz_avg_cover*100),
-        "\t[Integrated Abstraction]: {:.2f}%".format(integrate_avg_cover*100),
-        "\t\t[Prefix/Suffix Abstraction]: {:.2f}%".format(pre_suf_avg_cover*100),
-        "\t\t[Bricks (Regex) Abstraction]: {:.2f}%".format(bricks_avg_cover*100),
-        ]
+    analysis_print = []
+    if "test" in phases:
+        analysis_print.append("[Case Pass Rate]: {:.2f}% ({}/{})".format(case_pass_rate,passed_case_num,total_case_num))
+
+    if "fuzz" in phases:
+        analysis_print.append("[Dynamic Analysis Result]")
+        for result_type in dynamic_results:
+            if sum(dynamic_results.values()) > 0:
+                analysis_print.append("\t[{}]: {:.1f}%".format(result_type, dynamic_results[result_type] / sum(dynamic_results.values()) * 100))
+
+    if "analyze" in phases:
+        analysis_print.append("[Static Analysis Result]")
+        for result_type in static_results:
+            if sum(static_results.values())>0:
+                analysis_print.append("\t[{}]: {:.1f}%".format(result_type, static_results[result_type] / sum(static_results.values()) * 100))
+
+    analysis_print.append("[Average Coverage]")
+    if "test" in phases:
+        analysis_print.append("\t[Case Test]: {:.2f}%".format(case_avg_cover*100))
+    if "fuzz" in phases:
+        analysis_print.append("\t[Fuzz Test]: {:.2f}%".format(fuzz_avg_cover*100))
+    if "analyze" in phases:
+        analysis_print += [
+            "\t[Integrated Abstraction]: {:.2f}%".format(integrate_avg_cover*100),
+            "\t\t[Prefix/Suffix Abstraction]: {:.2f}%".format(pre_suf_avg_cover*100),
+            "\t\t[Bricks (Regex) Abstraction]: {:.2f}%".format(bricks_avg_cover*100),
+            ]
     print("=" * max(len(info.expandtabs())+2 for info in analysis_print))
     print("Analysis Conclusion")
     print("=" * max(len(info.expandtabs())+2 for info in analysis_print))
     print("\n".join(analysis_print))
     print("-" * max(len(info.expandtabs())+2 for info in analysis_print))
 
-    if total_case_num > 0:
+    if "analyze" in phases:
         if not is_strings:
             print(f"\n{'=' * 80}")
             print(f"\n[Sign Domain - Overall Probabilities]")
@@ -303,7 +469,8 @@ if __name__ == '__main__':
                     print(f"  {outcome};{percentage:.1f}%")
             else:
                 print("  No paths analyzed")
-        else:
+        elif total_case_num > 0:
+            # compared with the errors of the case tests, which are not run by 'analyze' alone
             print(f"\n{'=' * 80}")
             print(f"[String Analysis Accuracy Statistics]")
             print('=' * 80)
@@ -375,4 +542,8 @@ if __name__ == '__main__':
                     print(f" FN Types: {fn_types}")
                 print("--------------------------------------------------")
                 print(f" [FP Rate]: {fp_rate:.2f}%")
-                print(f" [FN Rate]: {fn_rate:.2f}%")
\ No newline at end of file
+                print(f" [FN Rate]: {fn_rate:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,8 @@ from typing import Dict, Set, List, Any
 
 
 from analyzers import syntaxer
-from analyzers import interpreter
+from analyzers import execution_cache
 from analyzers import abstractInterpreter as abs_interp
-from collections import Counter
 
 syntaxer.JAVA_ROOT_PATH = "."
 
@@ -18,6 +17,7 @@ if __name__ == '__main__':
     args = parser.parse_args()
 
     case_name = args.case
+    executions = execution_cache.ExecutionCache()
 
     # Syntactic Analysis
     methods = syntaxer.get_simplify_ast(case_name)
@@ -59,7 +59,7 @@ if __name__ == '__main__':
             case_parameters = case["inputs"]
             true_result = case["result"]
 
-            case_result, pc_set = interpreter.run_test_case(
+            case_result, pc_set = executions.run_test_case(
                 method.bytecodes,
                 case_parameters,
                 method.parameters
@@ -112,8 +112,8 @@ if __name__ == '__main__':
             sign_analyzer.analyze(num_params)
             sign_result = sign_analyzer.get_result_string()
             print(f"  Sign Domain:     {sign_result}")
-            sign_path_counter = Counter(sign_analyzer.path_results)
-            total_sign = len(sign_analyzer.path_results)
+            sign_path_counter = sign_analyzer.get_path_counts()
+            total_sign = sum(sign_path_counter.values())
 
             if total_sign > 0:
                 print(f"    Total paths: {total_sign}")
@@ -133,8 +133,8 @@ if __name__ == '__main__':
             interval_analyzer.analyze(num_params)
             interval_result = interval_analyzer.get_result_string()
             print(f"  Interval Domain: {interval_result}")
-            interval_path_counter = Counter(interval_analyzer.path_results)
-            total_interval = len(interval_analyzer.path_results)
+            interval_path_counter = interval_analyzer.get_path_counts()
+            total_interval = sum(interval_path_counter.values())
 
             if total_interval > 0:
                 print(f"    Total paths: {total_interval}")
@@ -190,7 +190,9 @@ if __name__ == '__main__':
             method_results[method_name]['prefix_errors'] = prefix_errors
             method_results[method_name]['bricks_errors'] = bricks_errors
             method_results[method_name]['integrated_errors'] = integrated_errors
-    
+
+    executions.save()
+
     analysis_print = "[Case Pass Rate]: {:.2f}% ({}/{})".format(passed_case_num/total_case_num*10**2,passed_case_num,total_case_num)
     print("-"*len(analysis_print))
     print(analysis_print)
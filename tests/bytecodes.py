@@ -0,0 +1,73 @@
+"""Decoded bytecode of small methods shared by the tests"""
+from analyzers import syntaxer
+
+ASSERTION = [(10, "new", ("class", "java/lang/AssertionError")), (13, "dup"),
+             (14, "invokespecial", ("method", 'java/lang/AssertionError."<init>":()V')), (17, "athrow"), (18, "return")]
+
+# if (a / 2 == -3) throw new AssertionError();
+HALF_IS_MINUS_THREE = [(0, "iload", "0"), (1, "iconst", "2"), (2, "idiv"), (3, "bipush", "-3"),
+                       (5, "if_icmpne", "18")] + ASSERTION
+# return a % b;
+REMAINDER = [(0, "iload", "0"), (1, "iload", "1"), (2, "irem"), (3, "ireturn")]
+# if (a * 65536 * 65536 != 0) throw new AssertionError();
+OVERFLOW = [(0, "iload", "0"), (1, "ldc", ("int", "65536")), (3, "imul"), (4, "ldc", ("int", "65536")), (6, "imul"),
+            (7, "ifeq", "18")] + ASSERTION[:-1] + [(18, "return")]
+# a++; if (a < 0) throw new AssertionError();
+INCREMENT = [(0, "iinc", "0", "1"), (3, "iload", "0"), (4, "ifge", "18")] + ASSERTION
+# if (a - b + 1 > a) throw new AssertionError();
+SUBTRACT = [(0, "iload", "0"), (1, "iload", "1"), (2, "isub"), (3, "iconst", "1"), (4, "iadd"), (5, "iload", "0"),
+            (6, "if_icmple", "18")] + ASSERTION
+
+INTS = [-2 ** 31, -7, -3, -1, 0, 1, 2, 3, 7, 2 ** 31 - 1]
+
+
+def make_method(parameter_types, instructions):
+    method = syntaxer.JavaMethod()
+    method.name = "method"
+    method.parameters = [{"name": "p{}".format(i), "type": (t, False)} for i, t in enumerate(parameter_types)]
+    method.bytecodes = (["public", "static"], instructions)
+    return method
+
+# if (!s.matches(c != 0 ? "a+" : "b+")) throw new AssertionError();
+MATCHES_EITHER = [(0, "aload", "0"), (1, "iload", "1"), (2, "ifeq", "10"), (5, "ldc", ("str", "a+")), (7, "goto", "12"),
+                  (10, "ldc", ("str", "b+")), (12, "invokevirtual", ("method", "java/lang/String.matches:(Ljava/lang/String;)Z")),
+                  (15, "ifne", "26"), (18, "new", ("class", "java/lang/AssertionError")), (21, "dup"),
+                  (22, "invokespecial", ("method", 'java/lang/AssertionError."<init>":()V')), (25, "athrow"), (26, "return")]
+
+# String s = ""; for (int i = 0; i < times; i++) s += "a"; return s.length();
+STRING_LOOP = [(0, "ldc", ("str", "")), (2, "astore", "1"), (3, "iconst", "0"), (4, "istore", "2"), (5, "iload", "2"),
+               (6, "iload", "0"), (7, "if_icmpge", "23"), (10, "aload", "1"),
+               (11, "invokedynamic", {"name": "makeConcatWithConstants", "parameters": ["str"], "values": ["a", None],
+                                      "return": ["str"]}),
+               (16, "astore", "1"), (17, "iinc", "2", "1"), (20, "goto", "5"), (23, "aload", "1"),
+               (24, "invokevirtual", ("method", "java/lang/String.length:()I")), (27, "ireturn")]
+
+
+def string_builder_call(name, descriptor):
+    """new StringBuilder(s).<name>() on the String parameter 0"""
+    return [(0, "new", ("class", "java/lang/StringBuilder")), (3, "dup"), (4, "aload", "0"),
+            (5, "invokespecial", ("method", 'java/lang/StringBuilder."<init>":(Ljava/lang/String;)V')),
+            (8, "invokevirtual", ("method", "java/lang/StringBuilder.{}:{}".format(name, descriptor))), (11, "ireturn")]
+
+# int x = 0; for (int i = 0; i < n; i = i + 1) x = 3 + 4; return x;
+RESET_LOOP = [(0, "iconst", "0"), (1, "istore", "2"), (2, "iconst", "0"), (3, "istore", "1"), (4, "iload", "1"),
+              (5, "iload", "0"), (6, "if_icmpge", "19"), (9, "iconst", "3"), (10, "iconst", "4"), (11, "iadd"),
+              (12, "istore", "2"), (13, "iload", "1"), (14, "iconst", "1"), (15, "iadd"), (16, "istore", "1"),
+              (17, "goto", "4"), (19, "iload", "2"), (20, "ireturn")]
+
+
+def string_call(pc, descriptor):
+    return (pc, "invokevirtual", ("method", "java/lang/String.{}".format(descriptor)))
+
+
+# if (s.length() == 3) throw new AssertionError();
+LENGTH_GUARD = [(0, "aload", "0"), string_call(1, "length:()I"), (4, "iconst", "3"), (5, "if_icmpne", "18")] + ASSERTION
+# if (s.charAt(1) == 'x') throw new AssertionError();
+CHAR_AT_GUARD = [(0, "aload", "0"), (1, "iconst", "1"), string_call(2, "charAt:(I)C"), (5, "bipush", "120"),
+                 (7, "if_icmpne", "18")] + ASSERTION
+# if (s.equals("abc")) throw new AssertionError();
+EQUALS_GUARD = [(0, "aload", "0"), (1, "ldc", ("str", "abc")), string_call(3, "equals:(Ljava/lang/Object;)Z"),
+                (6, "ifeq", "18")] + ASSERTION
+# if (s.startsWith("ab")) throw new AssertionError();
+STARTS_WITH_GUARD = [(0, "aload", "0"), (1, "ldc", ("str", "ab")), string_call(3, "startsWith:(Ljava/lang/String;)Z"),
+                     (6, "ifeq", "18")] + ASSERTION
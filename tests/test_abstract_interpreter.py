@@ -0,0 +1,195 @@
+import itertools
+
+import pytest
+
+from analyzers import abstractInterpreter as abs_interp
+from analyzers import fuzz_guidance
+from analyzers.intervalInt import IntervalInt
+from tests.bytecodes import (CHAR_AT_GUARD, EQUALS_GUARD, LENGTH_GUARD, MATCHES_EITHER, REMAINDER, RESET_LOOP,
+                             STARTS_WITH_GUARD, STRING_LOOP, make_method)
+
+
+def analyze_string_loop(**budget):
+    analyzer = abs_interp.AbstractInterpreter((["public", "static"], STRING_LOOP), use_interval=True, use_widening=True,
+                                              use_string=True, string_abstraction_type="integrated")
+    analyzer.analyze(1, ["int"], **budget)
+    return analyzer
+
+
+def test_within_budget_is_not_degraded():
+    analyzer = analyze_string_loop(max_seconds=60, max_states=10000, max_value_size=10000)
+    assert analyzer.degraded is None
+    assert analyzer.get_error_set() == set()
+
+
+def test_state_budget_degrades_soundly():
+    precise = analyze_string_loop()
+    analyzer = analyze_string_loop(max_states=3)
+    assert analyzer.degraded == "states"
+    assert precise.get_error_set() <= analyzer.get_error_set()
+    assert precise.pc_set <= analyzer.pc_set
+
+
+def test_value_size_budget_degrades():
+    assert analyze_string_loop(max_value_size=10).degraded == "value size"
+
+
+def test_time_budget_is_one_deadline(monkeypatch):
+    # every reading of the clock is one second later
+    clock = itertools.count()
+    monkeypatch.setattr(abs_interp.time, "monotonic", lambda: next(clock))
+    analyzer = analyze_string_loop(max_seconds=5, max_states=1)
+    assert analyzer.degraded == "states"
+    assert not analyzer.converged
+    # the clock reads 0 at entry and n at iteration n, degrading gives no new window
+    assert analyzer.iteration_count == 6
+
+
+# the messages the analysis reported before the errors were records, with the record that replaced each
+OLD_MESSAGES = [
+    ("PC 3: Definite division by zero", abs_interp.ErrorKind.DIVIDE_BY_ZERO, abs_interp.DEFINITE, ""),
+    ("PC 3: Possible division by zero", abs_interp.ErrorKind.DIVIDE_BY_ZERO, abs_interp.POSSIBLE, ""),
+    ("PC 3: Possible division by zero (remainder)", abs_interp.ErrorKind.DIVIDE_BY_ZERO, abs_interp.POSSIBLE, "(remainder)"),
+    ("PC 3: Possible assertion error", abs_interp.ErrorKind.ASSERTION, abs_interp.POSSIBLE, ""),
+    ("PC 3: Assertion error", abs_interp.ErrorKind.ASSERTION, abs_interp.DEFINITE, ""),
+    ("PC 3: Exception thrown", abs_interp.ErrorKind.EXCEPTION, abs_interp.DEFINITE, ""),
+    ("PC 3: Definite null pointer exception in string concatenation", abs_interp.ErrorKind.NULL_POINTER,
+     abs_interp.DEFINITE, "in string concatenation"),
+    ("PC 3: Possible null pointer exception in charAt", abs_interp.ErrorKind.NULL_POINTER, abs_interp.POSSIBLE,
+     "in charAt"),
+    ("PC 3: Possible index out of bounds (negative index)", abs_interp.ErrorKind.INDEX_OUT_OF_BOUNDS,
+     abs_interp.POSSIBLE, "(negative index)"),
+    ("PC 3: Possible index out of bounds", abs_interp.ErrorKind.INDEX_OUT_OF_BOUNDS, abs_interp.POSSIBLE, ""),
+    ("PC 3: Definite index out of bounds (start > length)", abs_interp.ErrorKind.INDEX_OUT_OF_BOUNDS,
+     abs_interp.DEFINITE, "(start > length)"),
+    ("PC 3: Definite index range exception (start > end)", abs_interp.ErrorKind.INDEX_RANGE, abs_interp.DEFINITE,
+     "(start > end)"),
+    ("PC 3: Possible number format exception", abs_interp.ErrorKind.NUMBER_FORMAT, abs_interp.POSSIBLE, ""),
+]
+
+
+def old_error_label(message):
+    """How get_error_set labelled a message before the error kinds"""
+    message = message.lower()
+    if "null" in message or "pointer" in message:
+        return "null pointer exception"
+    elif "assertion" in message:
+        return "assertion error"
+    elif "index out of bounds" in message or "out of bounds" in message:
+        return "index out of bounds"
+    elif "index range" in message:
+        return "index range exception"
+    elif "number format" in message or "parse" in message:
+        return "number format exception"
+    elif "division by zero" in message or "divide by zero" in message:
+        return "divide by zero"
+    return "error"
+
+
+@pytest.mark.parametrize("message, kind, certainty, detail", OLD_MESSAGES)
+def test_error_kinds_keep_the_old_labels(message, kind, certainty, detail):
+    record = abs_interp.ErrorRecord(3, kind, certainty, "integrated", detail)
+    assert kind.value == old_error_label(message)
+    assert old_error_label(str(record)) == kind.value
+
+
+def test_error_records_are_deduplicated_by_pc_and_kind():
+    errors = {}
+    definite = abs_interp.ErrorRecord(3, abs_interp.ErrorKind.DIVIDE_BY_ZERO, abs_interp.DEFINITE, "interval")
+    possible = abs_interp.ErrorRecord(3, abs_interp.ErrorKind.DIVIDE_BY_ZERO, abs_interp.POSSIBLE, "interval")
+    abs_interp.add_error(errors, definite)
+    abs_interp.add_error(errors, definite)
+    assert list(errors.values()) == [definite]
+    # met again as possible, the error is no longer definite, and stays possible
+    abs_interp.add_error(errors, possible)
+    abs_interp.add_error(errors, definite)
+    assert list(errors.values()) == [possible]
+    abs_interp.add_error(errors, abs_interp.ErrorRecord(3, abs_interp.ErrorKind.ASSERTION, abs_interp.POSSIBLE, "interval"))
+    assert len(errors) == 2
+    assert str(possible) == "PC 3: Possible divide by zero"
+
+
+def test_analysis_reports_each_error_once():
+    analyzer = abs_interp.AbstractInterpreter((["public", "static"], REMAINDER), use_interval=True)
+    analyzer.analyze(2, ["int", "int"])
+    assert list(analyzer.errors) == [(2, abs_interp.ErrorKind.DIVIDE_BY_ZERO)]
+    assert analyzer.get_error_set() == {"divide by zero"}
+
+
+def test_liveness_of_the_string_loop():
+    live = abs_interp.AbstractInterpreter((["public", "static"], STRING_LOOP)).live_locals
+    # the string and the counter are written before they are read
+    assert live[0] == {0}
+    assert live[5] == {0, 1, 2}
+    # the concatenation consumes the string, after the loop only the string is read
+    assert live[11] == {0, 2}
+    assert live[23] == {1}
+    assert live[27] == set()
+
+
+def test_dead_locals_are_dropped_without_changing_the_result():
+    kept = analyze_string_loop()
+    analyzer = abs_interp.AbstractInterpreter((["public", "static"], STRING_LOOP), use_interval=True, use_widening=True,
+                                              use_string=True, string_abstraction_type="integrated", use_liveness=False)
+    analyzer.analyze(1, ["int"])
+    assert set(kept.state_set.get_state(23).frame.locals) == {1}
+    assert set(analyzer.state_set.get_state(23).frame.locals) == {0, 1, 2}
+    assert kept.get_error_set() == analyzer.get_error_set()
+    assert kept.pc_set == analyzer.pc_set
+    assert kept.get_path_counts() == analyzer.get_path_counts()
+
+
+def reset_loop_x(**options):
+    analyzer = abs_interp.AbstractInterpreter((["public", "static"], RESET_LOOP), use_interval=True, **options)
+    analyzer.analyze(1, ["int"])
+    assert analyzer.converged
+    return str(analyzer.state_set.get_state(4).frame.locals[2]), str(analyzer.state_set.get_state(19).frame.locals[2])
+
+
+def test_widening_delay_and_narrowing_bound_the_loop():
+    # 7 is not a widening threshold, widening right away jumps to infinity
+    assert reset_loop_x(widening_delay=0, narrowing_passes=0) == ("[0,+inf]", "[0,+inf]")
+    assert reset_loop_x(widening_delay=2, narrowing_passes=0) == ("[0,7]", "[0,7]")
+    # one descending pass narrows the loop head and the code after the loop
+    assert reset_loop_x(widening_delay=0, narrowing_passes=1) == ("[0,7]", "[0,7]")
+
+
+def test_interval_narrow_replaces_only_infinite_bounds():
+    inf = float("inf")
+    assert IntervalInt(0, inf).narrow(IntervalInt(2, 7)) == IntervalInt(0, 7)
+    assert IntervalInt(-inf, 5).narrow(IntervalInt(-3, 9)) == IntervalInt(-3, 5)
+    assert IntervalInt(1, 2).narrow(IntervalInt(0, 9)) == IntervalInt(1, 2)
+
+
+def test_interval_division_with_infinite_bounds():
+    inf = float("inf")
+    assert IntervalInt(10, inf) / IntervalInt(2, 5) == IntervalInt(2, inf)
+    assert IntervalInt(-inf, inf) / IntervalInt(-inf, -1) == IntervalInt.top()
+
+
+STRING_METHODS = {
+    "matches either": (["str", "int"], MATCHES_EITHER),
+    "string loop": (["int"], STRING_LOOP),
+    "length guard": (["str"], LENGTH_GUARD),
+    "charAt guard": (["str"], CHAR_AT_GUARD),
+    "equals guard": (["str"], EQUALS_GUARD),
+    "startsWith guard": (["str"], STARTS_WITH_GUARD),
+}
+
+
+def analyze_strings(method, abstraction):
+    analyzer = abs_interp.AbstractInterpreter(method.bytecodes, use_interval=True, use_widening=True, use_string=True,
+                                              string_abstraction_type=abstraction)
+    analyzer.analyze(len(method.parameters), [fuzz_guidance.ANALYZER_TYPES[p["type"][0]] for p in method.parameters])
+    return analyzer
+
+
+@pytest.mark.parametrize("name", sorted(STRING_METHODS))
+def test_product_components_match_separate_analyses(name):
+    method = make_method(*STRING_METHODS[name])
+    product = analyze_strings(method, "product")
+    for abstraction in ["integrated", "prefix", "bricks"]:
+        separate = analyze_strings(method, abstraction)
+        component = None if abstraction == "integrated" else abstraction
+        assert product.get_error_set(component) == separate.get_error_set()
+        assert product.get_string_analysis_summary(component) == separate.get_string_analysis_summary()
@@ -0,0 +1,64 @@
+import os
+
+import analysis_server
+from analyzers import result_store, syntaxer
+from tests.bytecodes import INCREMENT, make_method
+
+
+def write_case(root, name, source):
+    case_dir = root / syntaxer.JAVA_MAIN_PATH / syntaxer.JAVA_CASE_PATH
+    case_dir.mkdir(parents=True, exist_ok=True)
+    path = case_dir / "{}.java".format(name)
+    path.write_text(source)
+    return path
+
+
+def test_case_is_recompiled_only_when_its_source_changes(tmp_path, monkeypatch):
+    compiled = []
+
+    def get_simplify_ast(name):
+        compiled.append(name)
+        method = make_method(["int"], INCREMENT)
+        method.name = "increment"
+        return [method]
+
+    monkeypatch.setattr(syntaxer, "JAVA_ROOT_PATH", str(tmp_path))
+    monkeypatch.setattr(syntaxer, "get_simplify_ast", get_simplify_ast)
+    path = write_case(tmp_path, "Simple", "class Simple {}")
+    server = analysis_server.AnalysisServer()
+
+    assert list(server.get_methods("Simple")) == ["increment"]
+    server.get_methods("Simple")
+    assert compiled == ["Simple"]
+
+    # touched but unchanged
+    os.utime(path, (0, 0))
+    server.get_methods("Simple")
+    assert compiled == ["Simple"]
+
+    path.write_text("class Simple { }")
+    os.utime(path, (1, 1))
+    server.get_methods("Simple")
+    assert compiled == ["Simple", "Simple"]
+
+
+def test_result_store_reuses_by_fingerprint(tmp_path):
+    path = str(tmp_path / "results.pkl")
+    store = result_store.ResultStore(path)
+    key = result_store.method_fingerprint(INCREMENT, {"phase": "static"})
+    assert key == result_store.method_fingerprint(INCREMENT, {"phase": "static"})
+    assert key != result_store.method_fingerprint(INCREMENT, {"phase": "cases"})
+
+    assert store.fetch(key, lambda: "computed") == ("computed", False)
+    assert store.fetch(key, lambda: "again") == ("computed", True)
+    assert (store.hits, store.misses) == (1, 1)
+    store.save()
+
+    reloaded = result_store.ResultStore(path)
+    assert reloaded.get(key) == "computed"
+
+
+def test_unreadable_result_store_starts_empty(tmp_path):
+    path = tmp_path / "results.pkl"
+    path.write_bytes(b"not a pickle")
+    assert len(result_store.ResultStore(str(path))) == 0
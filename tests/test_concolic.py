@@ -0,0 +1,38 @@
+import pytest
+
+from analyzers import concolic
+from tests.bytecodes import (ASSERTION, CHAR_AT_GUARD, EQUALS_GUARD, LENGTH_GUARD, REMAINDER, STARTS_WITH_GUARD,
+                             make_method)
+
+
+def test_evaluate_uses_java_int_semantics():
+    a, b = ("param", 0), ("param", 1)
+    assert concolic.evaluate(("div", a, b), (-7, 2)) == -3
+    assert concolic.evaluate(("rem", a, b), (-7, 2)) == -1
+    assert concolic.evaluate(("mul", a, b), (65536, 65536)) == 0
+
+
+def test_explore_solves_remainder_divisor():
+    method = make_method(["int", "int"], REMAINDER)
+    results = {outcome[0] for _, outcome in concolic.explore(method, [(1, 1)])}
+    assert "divide by zero" in results
+
+
+@pytest.mark.parametrize("instructions", [LENGTH_GUARD, CHAR_AT_GUARD, EQUALS_GUARD, STARTS_WITH_GUARD])
+def test_explore_flips_string_guards(instructions):
+    method = make_method(["str"], instructions)
+    runs = list(concolic.explore(method, [("zz",)]))
+    assert runs[0][1][0] == "ok"
+    assert "assertion error" in {outcome[0] for _, outcome in runs}
+
+
+def test_unknown_method_consumes_its_arguments():
+    # if (flag == 0) ...; with s.foo(2) called on the stack above flag
+    instructions = [(0, "iload", "1"), (1, "aload", "0"), (2, "iconst", "2"),
+                    (3, "invokevirtual", ("method", "java/lang/String.foo:(I)V")), (6, "ifeq", "18")] + ASSERTION
+    constraints = concolic.path_constraints((["public", "static"], instructions), ("s", 1), [(4, False)])
+    assert constraints == [((4, None), False, ("eq", ("param", 1), ("const", 0), False))]
+
+    instructions[3] = (3, "invokevirtual", ("method", "java/lang/String.foo:(I)I"))
+    constraints = concolic.path_constraints((["public", "static"], instructions), ("s", 1), [(4, False)])
+    assert constraints == [((4, None), False, ("eq", concolic.UNKNOWN, ("const", 0), False))]
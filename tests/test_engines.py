@@ -0,0 +1,65 @@
+import pytest
+
+from analyzers import batch_executor, bytecode_compiler, interpreter
+from tests.bytecodes import (HALF_IS_MINUS_THREE, INCREMENT, INTS, OVERFLOW, REMAINDER, RESET_LOOP, STRING_LOOP,
+                             SUBTRACT, make_method)
+
+METHODS = {
+    "half is minus three": (make_method(["int"], HALF_IS_MINUS_THREE), [(a,) for a in INTS]),
+    "remainder": (make_method(["int", "int"], REMAINDER), [(a, b) for a in INTS for b in INTS]),
+    "overflow": (make_method(["int"], OVERFLOW), [(a,) for a in INTS]),
+    "increment": (make_method(["int"], INCREMENT), [(a,) for a in INTS]),
+    "subtract": (make_method(["int", "int"], SUBTRACT), [(a, b) for a in INTS for b in INTS]),
+}
+
+
+def interpreted(method, inputs_list):
+    return [interpreter.run_test_case(method.bytecodes, inputs, method.parameters) for inputs in inputs_list]
+
+
+def test_java_int_semantics():
+    assert interpreter.java_div(-7, 2) == -3
+    assert interpreter.java_div(7, -2) == -3
+    assert interpreter.java_div(-2 ** 31, -1) == -2 ** 31
+    assert interpreter.java_rem(-7, 2) == -1
+    assert interpreter.java_rem(7, -2) == 1
+    assert interpreter.java_int(2 ** 31) == -2 ** 31
+    assert interpreter.java_int(65536 * 65536) == 0
+
+
+def test_truncating_division_takes_the_java_branch():
+    method, _ = METHODS["half is minus three"]
+    results = [result for result, _ in interpreted(method, [(-7,), (-6,), (-5,), (-8,)])]
+    assert results == ["assertion error", "assertion error", "ok", "ok"]
+
+
+@pytest.mark.parametrize("name", sorted(METHODS))
+def test_compiled_method_matches_interpreter(name):
+    method, inputs_list = METHODS[name]
+    compiled = bytecode_compiler.compile_method(method.bytecodes)
+    assert compiled is not None
+    assert [compiled.run_test_case(inputs) for inputs in inputs_list] == interpreted(method, inputs_list)
+
+
+@pytest.mark.parametrize("instructions", [STRING_LOOP, RESET_LOOP])
+def test_compiled_loops_match_interpreter(instructions):
+    method = make_method(["int"], instructions)
+    inputs_list = [(n,) for n in [-1, 0, 1, 2, 7]]
+    compiled = bytecode_compiler.compile_method(method.bytecodes)
+    assert [compiled.run_test_case(inputs) for inputs in inputs_list] == interpreted(method, inputs_list)
+
+
+def test_unsupported_opcode_is_not_compiled():
+    method = make_method(["int"], [(0, "iload", "0"), (1, "lookupswitch"), (2, "ireturn")])
+    assert bytecode_compiler.compile_method(method.bytecodes) is None
+    assert not batch_executor.supports(method)
+    assert not batch_executor.supports(make_method(["int"], STRING_LOOP))
+
+
+@pytest.mark.skipif(batch_executor.load_numpy() is None, reason="numpy is not installed")
+@pytest.mark.parametrize("name", sorted(METHODS))
+def test_batch_executor_matches_interpreter(name):
+    method, inputs_list = METHODS[name]
+    assert batch_executor.supports(method)
+    results = batch_executor.BatchExecutor(method.bytecodes).run_test_cases(inputs_list)
+    assert results == interpreted(method, inputs_list)
@@ -0,0 +1,38 @@
+from analyzers import execution_cache, interpreter
+from tests.bytecodes import HALF_IS_MINUS_THREE, make_method
+
+
+def test_input_runs_once_per_method():
+    method = make_method(["int"], HALF_IS_MINUS_THREE)
+    cache = execution_cache.ExecutionCache(None)
+    runs = []
+
+    def execute(inputs):
+        runs.append(inputs)
+        return interpreter.run_test_case(method.bytecodes, inputs, method.parameters)
+
+    first = cache.run(method.bytecodes, (-6,), execute)
+    assert cache.run(method.bytecodes, (-6,), execute) == first
+    assert runs == [(-6,)]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # an equal bytecode tuple shares the entries of the method
+    assert cache.get(tuple(method.bytecodes), (-6,)) == first
+    assert cache.get(method.bytecodes, (4,)) is None
+
+
+def test_array_inputs_are_hashable_keys():
+    assert execution_cache.hashable_inputs(([1, [2, 3]], "a")) == ((1, (2, 3)), "a")
+    cache = execution_cache.ExecutionCache(None)
+    cache.put((), ([1, 2],), "ok", {0, 1})
+    assert cache.get((), ((1, 2),)) == ("ok", {0, 1})
+
+
+def test_saved_executions_are_reloaded(tmp_path):
+    path = str(tmp_path / "executions.pkl")
+    cache = execution_cache.ExecutionCache(path)
+    cache.put((), (1,), "divide by zero", {2})
+    cache.save()
+    reloaded = execution_cache.ExecutionCache(path)
+    assert len(reloaded) == 1
+    assert reloaded.get((), (1,)) == ("divide by zero", {2})
@@ -0,0 +1,36 @@
+from analyzers import fuzz_corpus
+from tests.bytecodes import INCREMENT, make_method
+
+
+def test_seeds_round_trip_and_skip_mismatched_inputs(tmp_path):
+    method = make_method(["int", "str"], INCREMENT)
+    path = str(tmp_path / "corpus" / "Case.json")
+    corpus = fuzz_corpus.FuzzCorpus(path)
+    corpus.add(method, (1, "a"), "ok", {0})
+    corpus.add(method, (1, "a"), "assertion error", {0, 3})
+    corpus.add(method, ("1", "a"), "ok", {0})
+    corpus.save()
+
+    reloaded = fuzz_corpus.FuzzCorpus(path)
+    assert reloaded.seeds(method) == [(1, "a")]
+    assert reloaded.methods[method.name][0]["result"] == "assertion error"
+
+
+def test_array_parameters_come_back_as_tuples():
+    method = make_method(["int"], INCREMENT)
+    method.parameters = [{"name": "p0", "type": ("int", True)}]
+    corpus = fuzz_corpus.FuzzCorpus(None)
+    corpus.add(method, ((1, 2),), "ok", {0})
+    corpus.add(method, (("x",),), "ok", {0})
+    assert corpus.seeds(method) == [((1, 2),)]
+
+
+def test_minimize_keeps_smallest_error_and_covers_every_pc():
+    method = make_method(["int"], INCREMENT)
+    corpus = fuzz_corpus.FuzzCorpus(None)
+    corpus.add(method, (100000,), "divide by zero", {0, 1})
+    corpus.add(method, (0,), "divide by zero", {0, 1})
+    corpus.add(method, (1,), "ok", {0, 2})
+    corpus.add(method, (2,), "ok", {0, 2, 3})
+    kept = corpus.minimize(method)
+    assert [entry["inputs"] for entry in kept] == [[0], [2]]
@@ -0,0 +1,35 @@
+from analyzers import fuzz_guidance
+from analyzers.intervalInt import IntervalInt
+from tests.bytecodes import ASSERTION, make_method
+
+# if (a > 5 && a < 3) throw new AssertionError();
+BETWEEN = [(0, "iload", "0"), (1, "iconst", "5"), (2, "if_icmple", "18"), (5, "iload", "0"), (6, "iconst", "3"),
+           (7, "if_icmpge", "18")] + ASSERTION
+
+
+def test_bound_values_skip_infinite_bounds():
+    assert fuzz_guidance.bound_values(IntervalInt(3, float("inf"))) == [2, 3, 4]
+    assert fuzz_guidance.bound_values(IntervalInt(float("-inf"), float("inf"))) == []
+
+
+def test_guided_values_come_from_the_compared_bounds():
+    guidance = fuzz_guidance.FuzzGuidance(make_method(["int", "bool"], BETWEEN), (0, False))
+    # the athrow
+    assert 9 in guidance.error_pcs
+    assert guidance.unreachable == set()
+    assert {4, 5, 6, 2, 3} <= set(guidance.values[0])
+    assert guidance.values[1] == []
+
+
+def test_inputs_vary_one_parameter_then_combine():
+    guidance = fuzz_guidance.FuzzGuidance(make_method(["int", "bool"], BETWEEN), (0, False))
+    guidance.values = [[1, 2], [True]]
+    assert guidance.inputs() == [(1, False), (2, False), (0, True),
+                                 (0, False), (0, True), (1, False), (1, True), (2, False), (2, True)]
+    assert guidance.inputs(2) == [(1, False), (2, False)]
+
+
+def test_skipped_code_is_unreachable_once_converged():
+    guidance = fuzz_guidance.FuzzGuidance(make_method(["int"], [(0, "goto", "18")] + ASSERTION), (0,))
+    assert guidance.error_pcs == []
+    assert guidance.unreachable == {1, 2, 3, 4}
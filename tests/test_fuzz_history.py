@@ -0,0 +1,33 @@
+import pytest
+
+from analyzers import fuzz_history
+
+
+@pytest.mark.parametrize("kind", ["exact", "hashed", "bloom"])
+def test_repeated_inputs_are_not_new(kind):
+    history = fuzz_history.make_history(kind, 10000)
+    inputs = [(i, "s{}".format(i % 7), (i, i + 1)) for i in range(3000)]
+    added = sum(history.add(item) for item in inputs)
+    # a bloom filter may take a few new inputs for already run ones
+    assert added == len(inputs) if kind != "bloom" else added > len(inputs) * 0.99
+    assert not any(history.add(item) for item in inputs)
+
+
+def test_hashed_history_grows_past_its_capacity():
+    history = fuzz_history.make_history("hashed", 4)
+    assert all(history.add((i,)) for i in range(1000))
+    assert history.count == 1000
+    assert len(history.table) >= 2000
+
+
+def test_bloom_false_positive_rate():
+    history = fuzz_history.BloomHistory(10000, 0.01)
+    skipped = sum(not history.add((i,)) for i in range(10000))
+    assert skipped < 10000 * 0.01 * 2
+
+
+def test_no_history_and_unknown_kind():
+    history = fuzz_history.make_history("none", 10)
+    assert history.add((1,)) and history.add((1,))
+    with pytest.raises(NotImplementedError):
+        fuzz_history.make_history("list", 10)
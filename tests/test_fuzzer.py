@@ -0,0 +1,61 @@
+import itertools
+import os
+import re
+import subprocess
+import sys
+
+from analyzers import batch_executor, fuzz_corpus, fuzzer
+from tests.bytecodes import REMAINDER, make_method
+
+
+def test_product_sequence_matches_itertools_product():
+    values = ["a", "b", "c"]
+    sequence = fuzzer.ProductSequence(values, 3)
+    expected = [item for n in range(1, 4) for item in itertools.product(values, repeat=n)]
+    assert len(sequence) == len(expected)
+    assert list(sequence) == expected
+    assert list(fuzzer.ProductSequence(values, 2, join=True)) == ["".join(item) for item in expected if len(item) <= 2]
+
+
+def test_param_loader_order_matches_itertools_product():
+    params = [{"name": "a", "type": ("int", False)}, {"name": "b", "type": ("bool", False)}]
+    loader = fuzzer.ParamLoader(params, {"a": [1, 2], "b": [True, False]})
+    a_values, b_values = loader.values["a"], loader.values["b"]
+    # the first parameter changes fastest
+    expected = [(a, b) for b, a in itertools.product(b_values, a_values)]
+    assert len(loader) == len(expected)
+    assert [loader.next() for _ in range(len(loader))] == expected
+    assert not loader.has_next()
+
+
+def test_stop_estimate_counts_the_seeds(capsys):
+    method = make_method(["int", "int"], REMAINDER)
+    method.ast_values = {1, 2}
+    corpus = fuzz_corpus.FuzzCorpus(None)
+    seeds = [(100, 7), (200, 7), (300, 7)]
+    for seed in seeds:
+        corpus.add(method, seed, "ok", {0})
+    param_values, _ = method.parameter_filter(method.ast_values | method.get_bytecode_values())
+    space = len(fuzzer.ParamLoader(method.parameters, param_values)) + 1 + len(seeds)
+
+    fuzzer.coverage_guided_fuzzing(method, corpus=corpus, max_executions=len(seeds) + 1)
+    stopped = re.search(r"\[Stopped\]: execution limit after (\d+) inputs \| at most (\d+) of (\d+) inputs", capsys.readouterr().out)
+    assert stopped is not None
+    tried, not_run, total = map(int, stopped.groups())
+    assert (tried, not_run, total) == (len(seeds) + 1, space - len(seeds) - 1, space)
+
+
+def test_numpy_is_only_imported_for_int_methods():
+    script = "\n".join([
+        "import sys",
+        "from analyzers import batch_executor, fuzzer",
+        "from tests.bytecodes import REMAINDER, STRING_LOOP, make_method",
+        "print('numpy' in sys.modules)",
+        "print(batch_executor.supports(make_method(['str'], STRING_LOOP)), 'numpy' in sys.modules)",
+        "batch_executor.supports(make_method(['int', 'int'], REMAINDER))",
+        "print('numpy' in sys.modules)",
+    ])
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.split("\n")
+    assert output[:2] == ["False", "False False"]
+    assert output[2] == str(batch_executor.load_numpy() is not None)
@@ -0,0 +1,154 @@
+import pytest
+
+from analyzers import bytecode_compiler, interpreter
+from tests.bytecodes import MATCHES_EITHER, make_method, string_builder_call
+
+
+def test_matches_uses_the_regex_on_the_stack():
+    method = make_method(["str", "int"], MATCHES_EITHER)
+    inputs_list = [("aaa", 1), ("aaa", 0), ("bbb", 0), ("bbb", 1)]
+    results = [interpreter.run_test_case(method.bytecodes, inputs, method.parameters)[0] for inputs in inputs_list]
+    assert results == ["ok", "assertion error", "ok", "assertion error"]
+
+
+def test_matches_constant_regex_is_cached_with_its_source():
+    regexes = interpreter.prepare_method(MATCHES_EITHER)
+    assert list(regexes) == [6]
+    assert regexes[6][0] == "b+"
+
+
+def test_prepared_methods_are_bounded(monkeypatch):
+    monkeypatch.setattr(interpreter, "MAX_PREPARED_METHODS", 3)
+    monkeypatch.setattr(interpreter, "_prepared_methods", interpreter.OrderedDict())
+    methods = [list(MATCHES_EITHER) for _ in range(4)]
+    for instructions in methods[:3]:
+        interpreter.prepare_method(instructions)
+    # the first method is used again, so the second is the least recently used
+    interpreter.prepare_method(methods[0])
+    interpreter.prepare_method(methods[3])
+    assert list(interpreter._prepared_methods) == [id(methods[2]), id(methods[0]), id(methods[3])]
+
+
+def test_compiled_matches_agrees_with_interpreter():
+    method = make_method(["str", "int"], MATCHES_EITHER)
+    compiled = bytecode_compiler.compile_method(method.bytecodes)
+    for inputs in [("aaa", 1), ("aaa", 0), ("bbb", 0), (None, 1)]:
+        assert compiled.run_test_case(inputs) == interpreter.run_test_case(method.bytecodes, inputs, method.parameters)
+
+
+def run_string_builder_call(name, descriptor, s):
+    method = make_method(["str"], string_builder_call(name, descriptor))
+    return interpreter.run_test_case(method.bytecodes, (s,), method.parameters)[0]
+
+
+def test_string_builder_supported_methods():
+    assert run_string_builder_call("length", "()I", "abc") == "ok"
+    assert run_string_builder_call("reverse", "()Ljava/lang/StringBuilder;", "abc") == "ok"
+    assert run_string_builder_call("length", "()I", None) == "null pointer exception"
+
+
+def string_builder(stack, method, descriptor):
+    """Calls the method with the stack holding the builder and the arguments, returns what it pushed"""
+    error = interpreter.invoke_string_builder("java/lang/StringBuilder.{}:{}".format(method, descriptor), stack)
+    assert error is None
+    return stack.pop() if stack else None
+
+
+def test_string_builder_values():
+    builder = interpreter.StringBuilderModel("ab")
+    returns_builder = "Ljava/lang/StringBuilder;"
+    assert string_builder([builder, 120], "append", "(C){}".format(returns_builder)) is builder
+    string_builder([builder, "y"], "append", "(C){}".format(returns_builder))
+    string_builder([builder, -12], "append", "(I){}".format(returns_builder))
+    string_builder([builder, True], "append", "(Z){}".format(returns_builder))
+    string_builder([builder, None], "append", "(Ljava/lang/String;){}".format(returns_builder))
+    assert string_builder([builder], "toString", "()Ljava/lang/String;") == "abxy-12truenull"
+    assert string_builder([builder], "length", "()I") == 15
+
+    string_builder([builder, 2, "--"], "insert", "(ILjava/lang/String;){}".format(returns_builder))
+    string_builder([builder, 0, False], "insert", "(IZ){}".format(returns_builder))
+    assert str(builder) == "falseab--xy-12truenull"
+    assert string_builder([builder, 5], "charAt", "(I)C") == "a"
+
+    assert string_builder([builder, 7], "setLength", "(I)V") is None
+    assert str(builder) == "falseab"
+    string_builder([builder, 9], "setLength", "(I)V")
+    assert str(builder) == "falseab\0\0"
+    string_builder([builder, 5], "setLength", "(I)V")
+    assert string_builder([builder], "reverse", "(){}".format(returns_builder)) is builder
+    assert string_builder([builder], "toString", "()Ljava/lang/String;") == "eslaf"
+    assert builder.length() == 5
+
+
+def test_string_builder_errors():
+    builder = interpreter.StringBuilderModel("ab")
+    assert interpreter.invoke_string_builder("java/lang/StringBuilder.charAt:(I)C", [builder, 2]) == "index out of bounds"
+    assert interpreter.invoke_string_builder("java/lang/StringBuilder.insert:(ILjava/lang/String;)Ljava/lang/StringBuilder;",
+                                             [builder, 3, "x"]) == "index out of bounds"
+    assert interpreter.invoke_string_builder("java/lang/StringBuilder.setLength:(I)V", [builder, -1]) == "index out of bounds"
+    assert interpreter.invoke_string_builder("java/lang/StringBuilder.length:()I", [None]) == "null pointer exception"
+
+
+def test_string_builder_unsupported_method_is_a_result():
+    assert run_string_builder_call("capacity", "()I", "abc") == "*"
+
+
+def test_ropes_flatten_after_deep_concatenation():
+    rope = ""
+    for i in range(100000):
+        rope = interpreter.concat_strings((rope, "ab"[i % 2]), use_rope=True)
+    assert isinstance(rope, interpreter.RopeString)
+    assert len(rope) == 100000
+    assert str(rope) == "ab" * 50000
+    # a rope built on a flattened one reuses its characters
+    longer = interpreter.concat_strings((rope, "!"), use_rope=True)
+    assert longer.flatten() == "ab" * 50000 + "!"
+
+
+def test_concat_strings_without_ropes():
+    assert interpreter.concat_strings(("a", "", "b"), use_rope=False) == "ab"
+    assert interpreter.concat_strings(("", "a"), use_rope=True) == "a"
+    assert interpreter.concat_strings(("", ""), use_rope=True) == ""
+    stack = [1, interpreter.concat_strings(("a", "b"), use_rope=True), None]
+    interpreter.flatten_ropes(stack)
+    assert stack == [1, "ab", None]
+
+
+def repeat_then(tail):
+    """String r = ""; for (int i = 0; i < n; i = i + 1) r = r + s; <tail on r>, with n and s the parameters"""
+    return [(0, "ldc", ("str", "")), (2, "astore", "2"), (3, "iconst", "0"), (4, "istore", "3"), (5, "iload", "3"),
+            (6, "iload", "0"), (7, "if_icmpge", "25"), (10, "aload", "2"), (11, "aload", "1"),
+            (12, "invokedynamic", {"name": "makeConcatWithConstants", "parameters": ["str", "str"],
+                                   "values": [None, None], "return": ["str"]}),
+            (17, "astore", "2"), (18, "iload", "3"), (19, "iconst", "1"), (20, "iadd"), (21, "istore", "3"),
+            (22, "goto", "5"), (25, "aload", "2")] + tail
+
+
+def throw_unless(opcode, pc):
+    """<opcode> to pc + 11, else throw new AssertionError() at pc"""
+    return [(pc, opcode, str(pc + 11)), (pc + 3, "new", ("class", "java/lang/AssertionError")), (pc + 6, "dup"),
+            (pc + 7, "invokespecial", ("method", 'java/lang/AssertionError."<init>":()V')), (pc + 10, "athrow"),
+            (pc + 11, "return")]
+
+
+ROPE_TAILS = {
+    # if (r.length() == 6) throw
+    "length": [(26, "invokevirtual", ("method", "java/lang/String.length:()I")), (29, "bipush", "6")]
+              + throw_unless("if_icmpne", 31),
+    # if (r.charAt(4) == 'x') throw
+    "charAt": [(26, "iconst", "4"), (27, "invokevirtual", ("method", "java/lang/String.charAt:(I)C")),
+               (30, "bipush", "120")] + throw_unless("if_icmpne", 32),
+    # if (r.equals("xyxy")) throw
+    "equals": [(26, "ldc", ("str", "xyxy")), (28, "invokevirtual", ("method", "java/lang/String.equals:(Ljava/lang/Object;)Z"))]
+              + throw_unless("ifeq", 31),
+}
+
+
+@pytest.mark.parametrize("name", sorted(ROPE_TAILS))
+def test_ropes_give_the_flat_string_results(name):
+    method = make_method(["int", "str"], repeat_then(ROPE_TAILS[name]))
+    inputs_list = [(n, s) for n in range(5) for s in ["", "x", "xy", "abx", None]]
+    with_ropes = [interpreter.run_test_case(method.bytecodes, inputs, method.parameters, True) for inputs in inputs_list]
+    flat = [interpreter.run_test_case(method.bytecodes, inputs, method.parameters, False) for inputs in inputs_list]
+    assert with_ropes == flat
+    assert "assertion error" in {result for result, _ in flat}
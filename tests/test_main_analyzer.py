@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+import pytest
+
+import main_analyzer
+from analyzers import syntaxer
+from tests.bytecodes import REMAINDER, make_method
+
+
+@pytest.fixture
+def phase_calls(monkeypatch):
+    calls = []
+    method = make_method(["int", "int"], REMAINDER)
+    method.cases = [{"inputs": [1, 0], "result": "divide by zero"}]
+
+    def run_cases(method, executions=None):
+        calls.append("test")
+        return [("divide by zero", {0, 1, 2})]
+
+    def run_fuzz(method, executions=None, options=None, corpus=None):
+        calls.append("fuzz")
+        return [{0}, {0}], {0, 1, 2}, {"ok": 1, "divide by zero": 1}, {}
+
+    def run_static(method, is_strings, product=False, budget=None):
+        calls.append("analyze")
+        return {"sign": ("divide by zero", Counter({"ok": 1})), "interval": ("divide by zero", Counter({"ok": 1})),
+                "degraded": {}}
+
+    monkeypatch.setattr(syntaxer, "get_simplify_ast", lambda case_name: [method])
+    monkeypatch.setattr(main_analyzer, "run_cases", run_cases)
+    monkeypatch.setattr(main_analyzer, "run_fuzz", run_fuzz)
+    monkeypatch.setattr(main_analyzer, "run_static", run_static)
+    return calls
+
+
+@pytest.mark.parametrize("command", sorted(main_analyzer.COMMAND_PHASES))
+def test_command_runs_only_its_phases(command, phase_calls, capsys):
+    main_analyzer.main([command, "-abs", "int", "-no-store"])
+    assert set(phase_calls) == main_analyzer.COMMAND_PHASES[command]
+    assert len(phase_calls) == len(main_analyzer.COMMAND_PHASES[command])
+    output = capsys.readouterr().out
+    assert ("[Case Pass Rate]: 100.00% (1/1)" in output) == ("test" in phase_calls)
+    assert ("[Interval Domain - Overall Probabilities]" in output) == ("analyze" in phase_calls)
+
+
+def test_all_is_the_default_command():
+    assert main_analyzer.parse_args([]).command == "all"
+
+
+def test_parsing_does_not_import_the_heavy_modules():
+    script = "\n".join([
+        "import sys",
+        "import main_analyzer",
+        "main_analyzer.parse_args(['fuzz', '-case', 'Strings'])",
+        "try:",
+        "    main_analyzer.parse_args(['-h'])",
+        "except SystemExit:",
+        "    pass",
+        "print(sorted(name for name in ['tree_sitter', 'numpy'] if name in sys.modules))",
+    ])
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    assert output.strip().splitlines()[-1] == "[]"
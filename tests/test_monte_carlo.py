@@ -0,0 +1,51 @@
+import math
+import random
+
+import pytest
+
+from analyzers import monte_carlo
+from tests.bytecodes import REMAINDER, make_method
+
+
+def test_wilson_interval():
+    assert monte_carlo.wilson_interval(0, 0, 1.96) == (0.0, 1.0)
+    low, high = monte_carlo.wilson_interval(0, 100, 1.96)
+    assert low == 0.0
+    assert high == pytest.approx(1.96 ** 2 / (100 + 1.96 ** 2))
+    low, high = monte_carlo.wilson_interval(50, 100, 1.96)
+    assert (low + high) / 2 == pytest.approx(0.5)
+    assert high - 0.5 == pytest.approx(1.96 * math.sqrt(0.25 / 100 + 1.96 ** 2 / 40000) / (1 + 1.96 ** 2 / 100))
+
+
+def test_estimate_is_seeded_and_covers_the_probability():
+    method = make_method(["int", "int"], REMAINDER)
+    # b is uniform in {-1, 0, 1}
+    options = {"int_range": 1, "margin": 0.02}
+    estimate = monte_carlo.estimate_outcomes(method, options)
+    assert estimate.stop_reason == "margin reached"
+    assert estimate.samples == sum(estimate.counts.values())
+    low, high = estimate.interval("divide by zero")
+    assert low <= 1 / 3 <= high
+    assert high - low <= 2 * 0.02 + 1e-9
+    assert estimate.unseen_bound() < 0.01
+
+    again = monte_carlo.estimate_outcomes(method, options)
+    assert (again.counts, again.samples) == (estimate.counts, estimate.samples)
+
+
+def test_sample_limit():
+    estimate = monte_carlo.estimate_outcomes(make_method(["int", "int"], REMAINDER), {"int_range": 1, "max_samples": 150})
+    assert (estimate.samples, estimate.stop_reason) == (150, "sample limit")
+
+
+def test_sampler_draws_each_parameter_type():
+    options = dict(monte_carlo.DEFAULT_OPTIONS, null_rate=0, max_length=3)
+    parameters = [{"name": "a", "type": ("int", True)}, {"name": "s", "type": ("str", False)},
+                  {"name": "c", "type": ("chr", False)}]
+    sampler = monte_carlo.InputSampler(parameters, options, random.Random(0))
+    for _ in range(50):
+        array, text, char = sampler.sample()
+        assert isinstance(array, tuple) and len(array) <= 3
+        assert all(-options["int_range"] <= value <= options["int_range"] for value in array)
+        assert isinstance(text, str) and len(text) <= 3
+        assert len(char) == 1
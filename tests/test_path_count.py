@@ -0,0 +1,42 @@
+from collections import Counter
+
+from analyzers import abstractInterpreter as abs_interp
+from analyzers import path_count
+from tests.bytecodes import HALF_IS_MINUS_THREE, STRING_LOOP
+
+
+def test_components_come_in_reverse_topological_order():
+    edges = {0: [1], 1: [2], 2: [1, 3], 3: [4], 4: [3, 5]}
+    components = path_count.strongly_connected_components(range(6), edges)
+    assert [sorted(component) for component in components] == [[5], [3, 4], [1, 2], [0]]
+
+
+def test_deep_chains_do_not_recurse():
+    edges = {i: [i + 1] for i in range(100000)}
+    assert len(path_count.strongly_connected_components(range(100001), edges)) == 100001
+
+
+def test_count_paths_passes_each_loop_once():
+    # a diamond, then a loop with an exit
+    edges = {0: [1, 2], 1: [3], 2: [3], 3: [4], 4: [3, 5]}
+    outcomes = {5: {"ok"}, 2: {"divide by zero"}}
+    assert path_count.count_paths(0, edges, outcomes) == Counter({"ok": 2, "divide by zero": 1})
+
+
+def test_paths_double_with_each_diamond():
+    edges = {}
+    for i in range(0, 60, 3):
+        edges[i] = [i + 1, i + 2]
+        edges[i + 1] = edges[i + 2] = [i + 3]
+    assert path_count.count_paths(0, edges, {60: {"ok"}}) == Counter({"ok": 2 ** 20})
+
+
+def test_analysis_path_counts():
+    analyzer = abs_interp.AbstractInterpreter((["public", "static"], HALF_IS_MINUS_THREE), use_interval=True)
+    analyzer.analyze(1, ["int"])
+    assert analyzer.get_path_counts() == Counter({"assertion error": 1, "ok": 1})
+
+    analyzer = abs_interp.AbstractInterpreter((["public", "static"], STRING_LOOP), use_interval=True, use_string=True,
+                                              string_abstraction_type="integrated")
+    analyzer.analyze(1, ["int"])
+    assert analyzer.get_path_counts() == Counter({"ok": 1})
@@ -0,0 +1,32 @@
+from analyzers import reducer
+from tests.bytecodes import REMAINDER, make_method
+
+
+def test_ddmin_finds_the_failure_inducing_items():
+    items = list("abcdefghij")
+    assert reducer.ddmin(items, lambda subset: "c" in subset and "h" in subset) == ["c", "h"]
+    assert reducer.ddmin(items, lambda subset: True) == []
+
+
+def test_shrink_int_finds_the_smallest_magnitude():
+    assert reducer.shrink_int(1000, lambda value: value >= 17) == 17
+    assert reducer.shrink_int(-1000, lambda value: value <= -17) == -17
+    # the positive value is preferred when both signs hold
+    assert reducer.shrink_int(-1000, lambda value: abs(value) >= 17) == 17
+    assert reducer.shrink_int(5, lambda value: True) == 0
+
+
+def test_reduce_keeps_the_result():
+    method = make_method(["int", "int"], REMAINDER)
+    input_reducer = reducer.Reducer(method.bytecodes, method.parameters)
+    inputs = (123456, 0)
+    result = input_reducer.result_of(inputs)
+    reduced = input_reducer.reduce(inputs)
+    assert input_reducer.result_of(reduced) == result
+    assert reduced == (0, 0)
+
+
+def test_reduce_value_shrinks_strings_and_arrays():
+    value_reducer = reducer.Reducer((), [])
+    assert value_reducer.reduce_value("xxaxxbxx", lambda value: "a" in value and "b" in value) == "ab"
+    assert value_reducer.reduce_value((9, 40, 7), lambda value: any(element > 30 for element in value)) == (31,)
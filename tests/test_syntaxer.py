@@ -0,0 +1,90 @@
+import importlib.util
+import itertools
+import os
+import random
+
+import pytest
+
+from analyzers import syntaxer
+
+requires_tree_sitter = pytest.mark.skipif(importlib.util.find_spec("tree_sitter_java") is None,
+                                          reason="tree-sitter-java is not installed")
+
+FIXTURE = b'''package jpamb.cases;
+
+public class Fixture {
+
+    @Case("(\\"ab\\", 2) -> index out of bounds")
+    @Case("(null, 0) -> null pointer exception")
+    public static char pick(String s, int i) {
+        if (i > -3 && s.startsWith("x")) {
+            return 'q';
+        }
+        return s.charAt(i / 7);
+    }
+
+    public static void check(boolean b, int[] xs) {
+        assert b != false && xs.length == 4;
+    }
+}
+'''
+
+
+def permutation_sums(lengths):
+    return {sum(chosen) for n in range(2, len(lengths) + 1) for chosen in itertools.permutations(lengths, n)}
+
+
+def test_length_sums_match_the_permutation_sums():
+    generator = random.Random(0)
+    for _ in range(200):
+        lengths = [generator.randint(0, 12) for _ in range(generator.randint(0, 6))]
+        assert syntaxer.length_sums(lengths) == permutation_sums(lengths)
+
+
+def test_length_sums_are_capped():
+    assert syntaxer.length_sums([3, 5, 9], cap=10) == {8}
+    assert syntaxer.length_sums([7]) == set()
+
+
+@requires_tree_sitter
+def test_methods_are_extracted_in_source_order():
+    pick, check = syntaxer.analyze_ast(syntaxer.parse_source(FIXTURE))
+    assert (pick.name, check.name) == ("pick", "check")
+    assert pick.parameters == [{"name": "s", "type": ("str", False)}, {"name": "i", "type": ("int", False)}]
+    assert check.parameters == [{"name": "b", "type": ("bool", False)}, {"name": "xs", "type": ("int", True)}]
+    assert (pick.return_type, check.return_type) == ("char", "void")
+
+
+@requires_tree_sitter
+def test_cases_and_test_values():
+    pick, check = syntaxer.analyze_ast(syntaxer.parse_source(FIXTURE))
+    assert pick.cases == [{"inputs": ["ab", 2], "result": "index out of bounds"},
+                          {"inputs": [None, 0], "result": "null pointer exception"}]
+    # -3 is one value, a division adds 0
+    assert pick.ast_values == {-3, 7, 0, "x", "q"}
+    assert not pick.has_assert
+    assert check.cases == []
+    assert check.ast_values == {False, 4}
+    assert check.has_assert
+
+
+@requires_tree_sitter
+def test_parsers_are_pooled():
+    with syntaxer.pooled_parser() as parser:
+        with syntaxer.pooled_parser() as other:
+            assert other is not parser
+    with syntaxer.pooled_parser() as again:
+        assert again in (parser, other)
+    assert syntaxer.parse_source(FIXTURE).root_node.type == "program"
+
+
+@requires_tree_sitter
+def test_benchmark_methods():
+    path = os.path.join(os.path.dirname(__file__), "..", syntaxer.JAVA_MAIN_PATH, syntaxer.JAVA_CASE_PATH, "Strings.java")
+    with open(path, "rb") as f:
+        methods = syntaxer.analyze_ast(syntaxer.parse_source(f.read()))
+    assert len(methods) == 49
+    assert len({method.name for method in methods}) == 49
+    get_char_at = next(method for method in methods if method.name == "getCharAt")
+    assert get_char_at.parameters == [{"name": "s", "type": ("str", False)}, {"name": "index", "type": ("int", False)}]
+    assert len(get_char_at.cases) == 6